@@ -0,0 +1,60 @@
+"""Synthetic inputs for the offline benchmarks: a scratch workspace with its own config, and tiny MP4s."""
+import json
+import os
+import struct
+
+STUB_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stubs")
+
+
+def _box(box_type, payload):
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def synthetic_mp4(size=64 * 1024):
+    """A minimal ftyp + moov/mvhd + mdat file of roughly size bytes that mp4meta can patch."""
+    ftyp = _box(b"ftyp", b"isom" + struct.pack(">I", 512) + b"isomiso2mp41")
+    mvhd = _box(b"mvhd", b"\x00" * 4 + struct.pack(">IIII", 0, 0, 1000, 0) + b"\x00" * 80)
+    moov = _box(b"moov", mvhd)
+    padding = max(0, size - len(ftyp) - len(moov) - 8)
+    return ftyp + moov + _box(b"mdat", b"\x00" * padding)
+
+
+def write_synthetic_mp4(path, size=64 * 1024):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(synthetic_mp4(size))
+
+
+def video_id(channel_index, index):
+    """Deterministic 11-character YouTube-style ID."""
+    return f"c{channel_index:02d}v{index:07d}"
+
+
+def channel_url(channel_index):
+    return f"https://www.youtube.com/@BenchChannel{channel_index:02d}"
+
+
+def create_workspace(root, channels=1):
+    """Lays out staging/plex/state folders plus a config.json that points everything inside root."""
+    for folder in ("staging", "plex", "state"):
+        os.makedirs(os.path.join(root, folder), exist_ok=True)
+    os.makedirs(os.path.join(root, "config"), exist_ok=True)
+
+    config = {
+        "staging_directory": os.path.join(root, "staging"),
+        "plex_directory": os.path.join(root, "plex"),
+        "download_archive": os.path.join(root, "state", "downloaded.txt"),
+        "cache_file": os.path.join(root, "state", "video_cache.json"),
+        "watermark_file": os.path.join(root, "state", "channel_watermarks.json"),
+        "full_scan": False,
+        "engine": "subprocess",
+        "pacing": {"initial_delay": 0, "min_delay": 0, "max_delay": 0, "burst": 1},
+        "concurrency": {"max_processes": 8, "max_per_channel": 4, "max_channels": 2},
+        "pipeline": {"metadata_workers": 2, "download_workers": 4, "finalize_workers": 2, "queue_size": 64},
+        "transfers": {"workers": 4},
+        "channels": [{"url": channel_url(i), "enabled": True} for i in range(channels)],
+    }
+    config_file = os.path.join(root, "config", "config.json")
+    with open(config_file, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=4)
+    return config_file, config
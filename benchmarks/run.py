@@ -0,0 +1,254 @@
+"""Offline benchmarks for the orchestration layer: no network, no real yt-dlp or ffmpeg.
+
+Each scenario runs in a fresh interpreter with its own scratch workspace and config.json, with
+benchmarks/stubs first on PATH so every yt-dlp/ffmpeg call hits the stand-ins. Results are written
+as JSON (tagged with the current commit) for comparison across commits:
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --quick --scenario cache --scenario archive
+    python -m benchmarks.run --scenario get_all_videos --set entries=2000 --set new=50
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from benchmarks.fixtures import STUB_DIRECTORY, create_workspace, write_synthetic_mp4, video_id, channel_url
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return round(time.perf_counter() - start, 4)
+
+
+def _use_archive(archive_file):
+    """Points the downloader at the workspace archive instead of the project's downloaded.txt."""
+    from youtube import downloader, fetcher
+    downloader.DOWNLOAD_ARCHIVE = fetcher.DOWNLOAD_ARCHIVE = archive_file
+    options = downloader.YTDLP_OPTIONS
+    options[options.index("--download-archive") + 1] = archive_file
+
+
+def _write_archive(archive_file, ids):
+    with open(archive_file, "w", encoding="utf-8") as f:
+        f.writelines(f"youtube {vid}\n" for vid in ids)
+
+
+def bench_get_all_videos(workspace, config, channels=1, entries=10000, new=20, download_seconds=0.0):
+    """Full-scan run over large channels where all but `new` videos are already archived, then a steady-state run."""
+    os.environ["BENCH_ENTRIES"] = str(entries)
+    os.environ["BENCH_DOWNLOAD_SECONDS"] = str(download_seconds)
+    _write_archive(config["download_archive"],
+                   (video_id(c, i) for c in range(channels) for i in range(entries - new)))
+    _use_archive(config["download_archive"])
+
+    from youtube.fetcher import get_all_videos
+    full_scan = timed(get_all_videos, full_scan=True)
+    incremental = timed(get_all_videos)
+
+    downloaded = sum(len(files) for _, _, files in os.walk(config["plex_directory"]))
+    return {
+        "full_scan_seconds": full_scan,
+        "entries_per_second": round(channels * entries / full_scan, 1),
+        "downloaded": downloaded,
+        "incremental_seconds": incremental,
+    }
+
+
+def bench_cache(workspace, config, entries=100000, channels=50):
+    """save_cache / load_cache / compact_cache at scale."""
+    import utils.cache
+    from utils.cache import JOURNAL_SUFFIX, save_cache, load_cache, compact_cache
+
+    # ✅ Keep every record in the journal until compact_cache(), so the load really replays it and the compaction
+    # has the whole journal to fold (past COMPACT_EVERY, save_cache would compact on its own)
+    utils.cache.COMPACT_EVERY = entries + 101
+    cache_file = config["cache_file"]
+    cache = {channel_url(c): [] for c in range(channels)}
+    for index in range(entries):
+        c = index % channels
+        vid = video_id(c, index)
+        cache[channel_url(c)].append({"id": vid, "title": f"Benchmark Video {index}", "uploader": f"Bench {c}",
+                                      "url": f"https://www.youtube.com/watch?v={vid}", "upload_date": "20200101"})
+
+    first_save = timed(save_cache, cache, cache_file)
+    journal_bytes = os.path.getsize(cache_file + JOURNAL_SUFFIX)
+    load_journal = timed(load_cache, cache_file)
+    compact = timed(compact_cache, cache_file)
+    load_snapshot = timed(load_cache, cache_file)
+
+    for index in range(entries, entries + 100):
+        vid = video_id(0, index)
+        cache[channel_url(0)].append({"id": vid, "title": "New", "uploader": "Bench 0",
+                                      "url": f"https://www.youtube.com/watch?v={vid}", "upload_date": "20200101"})
+    incremental_save = timed(save_cache, cache, cache_file)
+
+    return {
+        "entries": entries,
+        "first_save_seconds": first_save,
+        "journal_bytes": journal_bytes,
+        "load_from_journal_seconds": load_journal,
+        "compact_seconds": compact,
+        "load_from_snapshot_seconds": load_snapshot,
+        "save_100_new_seconds": incremental_save,
+        "loaded_entries": sum(len(videos) for videos in load_cache(cache_file).values()),
+    }
+
+
+def bench_archive(workspace, config, lines=1000000, lookups=100000):
+    """is_video_downloaded() against a large downloaded.txt: cold index build, lookups, incremental refresh."""
+    archive_file = config["download_archive"]
+    _write_archive(archive_file, (video_id(0, i) for i in range(lines)))
+    _use_archive(archive_file)
+
+    from youtube.downloader import is_video_downloaded
+    url = "https://www.youtube.com/watch?v={}"
+    cold = timed(is_video_downloaded, url.format(video_id(0, 0)))
+
+    start = time.perf_counter()
+    hits = sum(is_video_downloaded(url.format(video_id(0, (i * 7919) % (2 * lines)))) for i in range(lookups))
+    warm = time.perf_counter() - start
+
+    with open(archive_file, "a", encoding="utf-8") as f:
+        f.writelines(f"youtube {video_id(1, i)}\n" for i in range(1000))
+    refresh = timed(is_video_downloaded, url.format(video_id(1, 999)))
+
+    return {
+        "archive_lines": lines,
+        "cold_lookup_seconds": cold,
+        "lookups_per_second": round(lookups / warm, 1),
+        "hit_ratio": round(hits / lookups, 3),
+        "refresh_after_1000_appends_seconds": refresh,
+    }
+
+
+def bench_embed(workspace, config, files=200, size=1024 * 1024, workers=4):
+    """Stamping upload dates onto library files: first pass, then the no-op pass the stamp index allows."""
+    from plex.stamper import stamp_library
+
+    plex_directory = config["plex_directory"]
+    cache = {channel_url(0): []}
+    for index in range(files):
+        name = f"Bench 00 - Benchmark Video {index}.mp4"
+        write_synthetic_mp4(os.path.join(plex_directory, "Bench 00", name), size)
+        cache[channel_url(0)].append({"id": video_id(0, index), "title": f"Benchmark Video {index}",
+                                      "uploader": "Bench 00", "url": video_id(0, index),
+                                      "upload_date": "20200101", "filepath": os.path.join("staging", name)})
+
+    state_file = os.path.join(workspace, "state", "stamp_state.json")
+    first = timed(stamp_library, cache, plex_directory, state_file, workers)
+    second = timed(stamp_library, cache, plex_directory, state_file, workers)
+    return {"files": files, "file_size": size, "first_pass_seconds": first,
+            "files_per_second": round(files / first, 1), "unchanged_pass_seconds": second}
+
+
+def bench_move(workspace, config, files=200, size=8 * 1024 * 1024, destination=None):
+    """Staging -> library transfers on the transfer pool (pass destination on another filesystem for copies)."""
+    from utils.transfer import TransferPool
+
+    destination = destination or config["plex_directory"]
+    sources = []
+    for index in range(files):
+        path = os.path.join(config["staging_directory"], "Bench 00", f"Bench 00 - Benchmark Video {index}.mp4")
+        write_synthetic_mp4(path, size)
+        sources.append(path)
+
+    pool = TransferPool(config.get("transfers", {}).get("workers", 4))
+    start = time.perf_counter()
+    futures = [pool.submit(path, os.path.join(destination, "Bench 00", os.path.basename(path))) for path in sources]
+    for future in futures:
+        future.result()
+    seconds = time.perf_counter() - start
+    pool.shutdown()
+
+    return {"files": files, "file_size": size, "seconds": round(seconds, 4),
+            "megabytes_per_second": round(files * size / (1024 * 1024) / seconds, 1),
+            "cross_device": os.stat(destination).st_dev != os.stat(config["staging_directory"]).st_dev}
+
+
+SCENARIOS = {
+    "get_all_videos": (bench_get_all_videos, {"entries": 1000, "new": 10}),
+    "cache": (bench_cache, {"entries": 10000}),
+    "archive": (bench_archive, {"lines": 100000, "lookups": 20000}),
+    "embed": (bench_embed, {"files": 50}),
+    "move": (bench_move, {"files": 50}),
+}  # Second element: parameters used by --quick
+
+
+def run_worker(name, params):
+    """Runs one scenario in this (fresh) interpreter and prints its result as JSON."""
+    workspace = tempfile.mkdtemp(prefix=f"ytpd-bench-{name}-")
+    try:
+        config_file, config = create_workspace(workspace, channels=params.get("channels", 1))
+        from config import loader
+        loader.CONFIG_FILE = config_file  # Must happen before any project module loads its config
+        os.chdir(workspace)  # logs/ and other relative paths land in the scratch workspace
+        logging.basicConfig(level=logging.WARNING)
+
+        result = SCENARIOS[name][0](workspace, config, **params)
+        print(json.dumps(result))
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+def run_scenario(name, params):
+    env = dict(os.environ, PATH=STUB_DIRECTORY + os.pathsep + os.environ.get("PATH", ""))
+    process = subprocess.run([sys.executable, "-m", "benchmarks.run", "--worker", name, "--params", json.dumps(params)],
+                             cwd=PROJECT_ROOT, env=env, capture_output=True, text=True)
+    if process.returncode != 0:
+        return {"error": process.stderr.strip().splitlines()[-1:] or ["exit code " + str(process.returncode)]}
+    return {"params": params, **json.loads(process.stdout.strip().splitlines()[-1])}
+
+
+def _parse_value(value):
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks with stub yt-dlp/ffmpeg.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Run only these (repeatable)")
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes for a fast sanity run")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="Override a parameter")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON results")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--params", default="{}", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, json.loads(args.params))
+        return
+
+    overrides = dict(item.split("=", 1) for item in args.set)
+    commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                            capture_output=True, text=True).stdout.strip() or None
+    results = {"commit": commit, "timestamp": datetime.now().isoformat(timespec="seconds"),
+               "python": platform.python_version(), "platform": platform.platform(), "scenarios": {}}
+
+    for name in args.scenario or list(SCENARIOS):
+        function, quick_params = SCENARIOS[name]
+        params = dict(quick_params) if args.quick else {}
+        params.update({key: _parse_value(value) for key, value in overrides.items()
+                       if key in function.__code__.co_varnames})
+        print(f"⏱ {name} {params or ''}", flush=True)
+        results["scenarios"][name] = run_scenario(name, params)
+        print(f"   {json.dumps(results['scenarios'][name])}", flush=True)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    print(f"📝 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
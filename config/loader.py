@@ -1,7 +1,39 @@
 import json
+import os
+import threading
 
 CONFIG_FILE = "config/config.json"
 
+_config = {}  # Parsed once and shared by every module; reload_config() updates it in place
+_config_state = {"mtime_ns": None}
+_config_lock = threading.Lock()
+
 def load_config():
     with open(CONFIG_FILE, "r", encoding="utf-8") as f:
         return json.load(f)
+
+def get_config():
+    """The shared config dict, parsed on first use only."""
+    with _config_lock:
+        if _config_state["mtime_ns"] is None:
+            _config_state["mtime_ns"] = os.stat(CONFIG_FILE).st_mtime_ns
+            _config.update(load_config())
+        return _config
+
+def reload_config():
+    """Re-reads config.json if it changed on disk. Returns True if the shared config was updated.
+
+    Settings read at call time (channels, poll intervals, worker counts) pick up the change;
+    paths captured at import time still need a restart.
+    """
+    get_config()
+    with _config_lock:
+        mtime_ns = os.stat(CONFIG_FILE).st_mtime_ns
+        if mtime_ns == _config_state["mtime_ns"]:
+            return False
+        new_config = load_config()  # A parse error keeps the current config and propagates
+        _config_state["mtime_ns"] = mtime_ns
+        _config.update(new_config)  # Update before dropping keys so readers never see an empty config
+        for key in set(_config) - set(new_config):
+            del _config[key]
+        return True
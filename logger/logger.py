@@ -1,37 +1,138 @@
+import atexit
+import gzip
 import logging
+import logging.handlers
 import os
+import queue
+import random
+import re
+import shutil
+import time
+from collections import deque
 from datetime import datetime, timedelta
 
-def setup_logger():
-    log_directory = "logs"
-    os.makedirs(log_directory, exist_ok=True)
+LOG_DIRECTORY = "logs"
+YT_DLP_LOGGER = "yt-dlp"  # Child output goes here, not to the console
+TRAFFIC_PATTERN = re.compile(r"^(send|reply|header): ")  # --print-traffic output
 
-    log_filename = os.path.join(log_directory, f"error_logging_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.txt")
+_options = {
+    "max_bytes_mb": 10,  # Rotate a log segment at this size...
+    "max_age_hours": 24,  # ...or once it's this old
+    "backup_count": 5,  # Compressed segments kept per log
+    "retention_days": 30,  # Older run logs are deleted at startup
+    "traffic_sample_rate": 0.01,  # Share of successful downloads whose traffic dump is kept
+    "traffic_buffer_lines": 5000,  # Traffic lines held per download until its outcome is known
+}
+_listeners = []
 
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.FileHandler(log_filename, mode="w", encoding="utf-8"),
-            logging.StreamHandler()
-        ],
+
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotates on size or age and gzips rotated segments, so a log never holds more than backupCount files."""
+
+    def __init__(self, filename, max_bytes, backup_count, max_age):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.max_age = max_age
+        self.opened_at = time.time()
+        self.namer = lambda name: name + ".gz"
+        self.rotator = self._compress
+
+    @staticmethod
+    def _compress(source, destination):
+        with open(source, "rb") as raw, gzip.open(destination, "wb") as compressed:
+            shutil.copyfileobj(raw, compressed)
+        os.remove(source)
+
+    def shouldRollover(self, record):
+        if self.max_age and time.time() - self.opened_at >= self.max_age and self.stream is not None:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.opened_at = time.time()
+
+
+def _file_handler(path):
+    return CompressingRotatingFileHandler(
+        path,
+        max_bytes=int(_options["max_bytes_mb"] * 1024 * 1024),
+        backup_count=_options["backup_count"],
+        max_age=_options["max_age_hours"] * 3600,
     )
 
-def get_yt_dlp_log_path():
-    """Returns the file path for yt-dlp logging."""
-    log_directory = "logs"
-    os.makedirs(log_directory, exist_ok=True)
-    return os.path.join(log_directory, f"yt-dlp-debug_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.log")
 
-def cleanup_old_logs(log_directory="logs", prefix="yt-dlp-debug_", days=30):
-    """Deletes yt-dlp logs older than 30 days."""
-    cutoff_date = datetime.now() - timedelta(days=days)
+def _queued(logger, *handlers):
+    """Attaches a QueueHandler to logger; a listener thread does the actual (blocking) writes."""
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+
+
+def _stop_listeners():
+    while _listeners:
+        _listeners.pop().stop()  # Flushes whatever is still queued
+
+
+def setup_logger(options=None):
+    _options.update(options or {})
+    os.makedirs(LOG_DIRECTORY, exist_ok=True)
+    run_stamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+
+    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+    file_handler = _file_handler(os.path.join(LOG_DIRECTORY, f"error_logging_{run_stamp}.txt"))
+    stream_handler = logging.StreamHandler()
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    _queued(root, file_handler, stream_handler)
+
+    # ✅ One rotating sink per run for all yt-dlp output, instead of one file per video
+    yt_dlp_handler = _file_handler(os.path.join(LOG_DIRECTORY, f"yt-dlp-run_{run_stamp}.log"))
+    yt_dlp_handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    yt_dlp_logger = logging.getLogger(YT_DLP_LOGGER)
+    yt_dlp_logger.setLevel(logging.INFO)
+    yt_dlp_logger.propagate = False
+    _queued(yt_dlp_logger, yt_dlp_handler)
+
+    atexit.register(_stop_listeners)
+    cleanup_old_logs(days=_options["retention_days"])  # Once per run, not after every download
+
+
+class YtDlpOutput:
+    """One download's yt-dlp output: regular lines go straight to the run sink, tagged with the video;
+    --print-traffic lines are held in a bounded buffer and only written if the download fails (or is sampled).
+    """
+
+    def __init__(self, tag):
+        self.tag = tag
+        self.logger = logging.getLogger(YT_DLP_LOGGER)
+        self.traffic = deque(maxlen=_options["traffic_buffer_lines"])
+
+    def write(self, line):
+        if TRAFFIC_PATTERN.match(line):
+            self.traffic.append(line)
+        else:
+            self.logger.info(f"[{self.tag}] {line}")
+
+    def close(self, failed):
+        if self.traffic and (failed or random.random() < _options["traffic_sample_rate"]):
+            reason = "failed download" if failed else "sampled"
+            self.logger.info(f"[{self.tag}] --- traffic dump ({reason}, last {len(self.traffic)} lines) ---")
+            for line in self.traffic:
+                self.logger.info(f"[{self.tag}] {line}")
+        self.traffic.clear()
+
 
-    for filename in os.listdir(log_directory):
-        if filename.startswith(prefix):
-            log_path = os.path.join(log_directory, filename)
-            file_time = datetime.fromtimestamp(os.path.getmtime(log_path))
+def cleanup_old_logs(log_directory=LOG_DIRECTORY, prefixes=("yt-dlp-debug_", "yt-dlp-run_", "error_logging_"), days=30):
+    """Deletes logs (including rotated .gz segments) older than 30 days."""
+    cutoff = (datetime.now() - timedelta(days=days)).timestamp()
 
-            if file_time < cutoff_date:
-                os.remove(log_path)
-                logging.info(f"🗑 Deleted old log: {log_path}")
\ No newline at end of file
+    with os.scandir(log_directory) as entries:
+        for entry in entries:
+            if entry.name.startswith(prefixes) and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                logging.info(f"🗑 Deleted old log: {entry.path}")
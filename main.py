@@ -1,13 +1,26 @@
-from config.loader import load_config
+import argparse
+from config.loader import get_config
 from logger.logger import setup_logger
 from youtube.fetcher import get_all_videos
+from youtube.daemon import start_daemon, update_interval, UPDATE_STAMP_FILE
 from youtube.utils import update_yt_dlp
 
 def main():
-    load_config()
-    setup_logger()
-    update_yt_dlp()
-    get_all_videos()
+    parser = argparse.ArgumentParser(description="Download YouTube channels into a Plex library.")
+    parser.add_argument("--full-scan", action="store_true",
+                        help="Walk every channel's full catalogue instead of stopping at its watermark")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Keep running and poll each channel on its own interval")
+    args = parser.parse_args()
+
+    config = get_config()
+    setup_logger(config.get("logging", {}))
+    if args.daemon:
+        start_daemon()  # Checks for yt-dlp updates itself, at most once per update_check_hours
+        return
+
+    update_yt_dlp(UPDATE_STAMP_FILE, update_interval())
+    get_all_videos(full_scan=args.full_scan)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from config.loader import get_config
+from plex.library import library_index
+
+config = get_config()
+
+POLICIES = ("off", "skip", "hardlink")
+JOURNAL_SUFFIX = ".journal"
+COMPACT_EVERY = 1000  # Fold the journal into the snapshot after this many appended records
+DURATION_TOLERANCE = 2  # Seconds; re-encodes and SponsorBlock-free mirrors rarely match to the second
+# Bracketed tags re-uploads and mirrors tend to add or drop, e.g. "(Re-upload)", "[4K]", "(Official Video)"
+TITLE_TAGS = re.compile(r"[(\[][^)\]]*\b(?:re-?upload(?:ed)?|mirror|hd|4k|1080p|official|remaster(?:ed)?)\b[^)\]]*[)\]]",
+                        re.IGNORECASE)
+
+
+def normalize_title(title):
+    """Case, punctuation, emoji and re-upload tags removed; Unicode letters kept so non-Latin titles still match."""
+    title = TITLE_TAGS.sub(" ", title or "").casefold()
+    return re.sub(r"[\W_]+", " ", title).strip()
+
+
+def fingerprint(path, size_kb):
+    """SHA-1 of a file's first size_kb KB, or None if it can't be read."""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read(size_kb * 1024)).hexdigest()
+    except OSError:
+        return None
+
+
+class DedupeIndex:
+    """Library videos by normalised title + duration (+ channel), consulted before a download starts.
+
+    policy "skip" leaves a matching video out, "hardlink" links the existing library file in under the new
+    video's name instead of downloading it, and "off" only records. With fingerprint_kb set, finished downloads
+    are also compared by the hash of their first KBs, which catches exact copies under a different title.
+    """
+
+    def __init__(self, state_file, policy="off", match_uploader=True, fingerprint_kb=0):
+        self.state_file = state_file
+        self.policy = policy if policy in POLICIES else "off"
+        self.match_uploader = match_uploader  # False also matches mirrors posted by other channels
+        self.fingerprint_kb = fingerprint_kb
+        self.journal_file = state_file + JOURNAL_SUFFIX
+        self._lock = threading.Lock()
+        try:
+            with open(state_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            state = {}
+        self._videos = state.get("videos", {})  # video ID -> {"title", "duration", "channel", "fingerprint"}
+        self._duplicates = state.get("duplicates", {})  # duplicate video ID -> original video ID
+        self._appended = 0
+        intact = self._replay()
+        self._by_title = {}
+        self._by_fingerprint = {}
+        for video_id, record in self._videos.items():
+            self._add_lookups(video_id, record)
+        if not intact:
+            self._save_locked()  # ✅ Fold a torn journal away before anything is appended after it
+
+    @classmethod
+    def from_config(cls, config):
+        options = config.get("dedupe", {})
+        return cls(
+            options.get("state_file", os.path.join(os.path.dirname(config["cache_file"]), "dedupe_index.json")),
+            policy=options.get("policy", "off"),
+            match_uploader=options.get("match_uploader", True),
+            fingerprint_kb=options.get("fingerprint_kb", 0),
+        )
+
+    def _replay(self):
+        """Applies journaled records on top of the snapshot. Returns False if a line was torn by a crash."""
+        intact = True
+        try:
+            with open(self.journal_file, "r", encoding="utf-8") as journal:
+                for line in journal:
+                    self._appended += 1
+                    try:
+                        entry = json.loads(line)
+                        if "original" in entry:
+                            self._duplicates[entry["id"]] = entry["original"]
+                        else:
+                            self._videos.setdefault(entry["id"], entry["video"])
+                    except (json.JSONDecodeError, KeyError, TypeError):
+                        intact = False
+        except FileNotFoundError:
+            pass
+        return intact
+
+    def _append(self, entry):
+        """Journals one record instead of rewriting the index. Call with the lock held."""
+        try:
+            with open(self.journal_file, "a", encoding="utf-8") as journal:
+                journal.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logging.error(f"⚠ Failed to journal dedupe index update: {e}")
+            return
+        self._appended += 1
+        if self._appended >= COMPACT_EVERY:
+            self._save_locked()
+
+    def _add_lookups(self, video_id, record):
+        self._by_title.setdefault(record["title"], []).append(video_id)
+        if record.get("fingerprint"):
+            self._by_fingerprint[record["fingerprint"]] = video_id
+
+    @property
+    def enabled(self):
+        return self.policy != "off"
+
+    def is_duplicate(self, video_id):
+        with self._lock:
+            return video_id in self._duplicates
+
+    def find(self, video_id, title, duration, channel):
+        """The ID of a library video this one duplicates, judged from listing fields alone, or None."""
+        if not self.enabled or duration is None:
+            return None
+        key = normalize_title(title)
+        if not key:
+            return None
+        with self._lock:
+            candidates = [(other_id, self._videos[other_id]) for other_id in self._by_title.get(key, ())]
+        for other_id, record in candidates:
+            if other_id == video_id or abs(record["duration"] - duration) > DURATION_TOLERANCE:
+                continue
+            if self.match_uploader and record["channel"] != channel:
+                continue
+            if library_index.get(other_id):  # Only a file that's still in the library counts
+                return other_id
+        return None
+
+    def find_file(self, video_id, path):
+        """The ID of a library video whose first KBs match this downloaded file, or None."""
+        if not self.enabled or not self.fingerprint_kb:
+            return None
+        digest = fingerprint(path, self.fingerprint_kb)
+        with self._lock:
+            other_id = self._by_fingerprint.get(digest)
+        if other_id and other_id != video_id and library_index.get(other_id):
+            return other_id
+        return None
+
+    def record(self, video_id, title, duration, channel, path):
+        """Adds a video that's now in the library."""
+        key = normalize_title(title)
+        if not key or duration is None:
+            return
+        record = {"title": key, "duration": duration, "channel": channel,
+                  "fingerprint": fingerprint(path, self.fingerprint_kb) if self.fingerprint_kb else None}
+        with self._lock:
+            if video_id in self._videos:
+                return
+            self._videos[video_id] = record
+            self._add_lookups(video_id, record)
+            self._append({"id": video_id, "video": record})
+
+    def mark_duplicate(self, video_id, original_id):
+        with self._lock:
+            self._duplicates[video_id] = original_id
+            self._append({"id": video_id, "original": original_id})
+
+    def save(self):
+        """Rewrites the snapshot and empties the journal."""
+        with self._lock:
+            self._save_locked()
+
+    def _save_locked(self):
+        try:
+            temp_file = self.state_file + ".tmp"
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump({"videos": self._videos, "duplicates": self._duplicates}, f)
+            os.replace(temp_file, self.state_file)
+            # Replaying the journal again after a crash here is harmless: it only repeats what the snapshot has
+            open(self.journal_file, "w").close()
+            self._appended = 0
+        except OSError as e:
+            logging.error(f"⚠ Failed to save dedupe index: {e}")
+
+
+def link_duplicate(original_path, duplicate_path):
+    """Hardlinks the library file in under the duplicate's name. Returns False if the filesystem refuses."""
+    try:
+        os.makedirs(os.path.dirname(duplicate_path), exist_ok=True)
+        if not os.path.exists(duplicate_path):
+            os.link(original_path, duplicate_path)
+        return True
+    except OSError as e:
+        logging.error(f"⚠ Failed to hardlink {original_path} -> {duplicate_path}: {e}")
+        return False
+
+
+dedupe_index = DedupeIndex.from_config(config)  # Shared by the pipeline stages
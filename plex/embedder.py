@@ -1,15 +1,32 @@
 import os
-import json
-from datetime import datetime
 import subprocess
 import logging
+from config.loader import get_config
+from utils.cache import load_cache
+from plex.mp4meta import patch_upload_date, Mp4PatchError
+
+config = get_config()
+
+CACHE_FILE = config["cache_file"]
+PLEX_DIRECTORY = config["plex_directory"]
+STAMP_STATE_FILE = config.get("stamping", {}).get(
+    "state_file", os.path.join(os.path.dirname(CACHE_FILE), "stamp_state.json"))
+STAMP_WORKERS = config.get("stamping", {}).get("workers", 4)
 
 
 def apply_upload_dates(video_path, upload_date):
-    """Apply the correct upload date timestamp to a single downloaded video."""
+    """Apply the correct upload date timestamp to a single downloaded video. Returns True on success."""
     if not os.path.exists(video_path):
         logging.error(f"⚠️ File not found: {video_path}")
-        return
+        return False
+
+    # ✅ Patch the moov box in place; only remux with FFmpeg if the file's layout isn't supported
+    try:
+        patch_upload_date(video_path, upload_date)
+        logging.info(f"✅ Embedded metadata into {video_path}")
+        return True
+    except (Mp4PatchError, OSError) as e:
+        logging.warning(f"⚠️ In-place patch failed for {video_path} ({e}), falling back to FFmpeg")
 
     formatted_plex_date = upload_date.strftime("%Y-%m-%dT%H:%M:%SZ")
     temp_video_path = video_path.replace(".mp4", "_temp.mp4")
@@ -27,45 +44,24 @@ def apply_upload_dates(video_path, upload_date):
 
         os.replace(temp_video_path, video_path)
         logging.info(f"✅ Embedded metadata into {video_path}")
+        return True
 
     except subprocess.CalledProcessError as e:
         logging.error(f"⚠️ Failed to embed metadata for {video_path}: {e}")
     except Exception as e:
         logging.error(f"⚠️ Unexpected error embedding metadata for {video_path}: {e}")
+    return False
 
 
-def process_videos(cache_data):
-    """Loops through downloaded videos and applies correct upload dates."""
-    for channel, videos in cache_data.items():
-        for video in videos:
-            video_title = video["title"].replace("?", "？").replace("/", "⧸").replace(":", "：")
-            upload_date_str = video["upload_date"]
-            uploader_folder = os.path.join("/mnt/data/plex_directory", video["uploader"])
-            video_file = os.path.join(uploader_folder, f"{video['uploader']} - {video_title}.mp4")
-
-            # ✅ Log folder contents for debugging
-            if os.path.exists(uploader_folder):
-                logging.info(f"\n📂 Files in {uploader_folder}:")
-                for filename in os.listdir(uploader_folder):
-                    logging.info(f" - {filename}")
-
-            logging.info(f"🔍 Looking for: {video_file}")
-            if not os.path.exists(video_file):
-                logging.error(f"⚠️ File not found: {video_file}")
-                continue
+def process_videos(cache_data, plex_directory=PLEX_DIRECTORY, state_file=STAMP_STATE_FILE, workers=STAMP_WORKERS):
+    """Applies correct upload dates to downloaded videos that are new or changed since the last run."""
+    from plex.stamper import stamp_library  # Imported here: the stamper's workers import this module
 
-            try:
-                upload_date = datetime.strptime(upload_date_str, "%Y%m%d")
-                apply_upload_dates(video_file, upload_date)
-            except ValueError as e:
-                logging.error(f"⚠️ Error parsing upload date for {video_title}: {e}")
+    return stamp_library(cache_data, plex_directory, state_file, workers=workers)
 
 
 if __name__ == "__main__":
-    CACHE_FILE = "/mnt/data/video_cache.json"
     if os.path.exists(CACHE_FILE):
-        with open(CACHE_FILE, "r", encoding="utf-8") as f:
-            video_cache = json.load(f)
-        process_videos(video_cache)
+        process_videos(load_cache(CACHE_FILE))
     else:
-        logging.error("⚠️ video_cache.json not found! Cannot process videos.")
\ No newline at end of file
+        logging.error("⚠️ video_cache.json not found! Cannot process videos.")
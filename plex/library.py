@@ -0,0 +1,145 @@
+import json
+import logging
+import os
+import threading
+from config.loader import get_config
+from utils.sanitizer import sanitize_filename
+from youtube.utils import extract_video_id
+
+config = get_config()
+
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".webm")
+JOURNAL_SUFFIX = ".journal"
+COMPACT_EVERY = 1000  # Fold the journal into the snapshot after this many appended paths
+
+
+def staged_video_path(video, staging_directory):
+    """yt-dlp's own final path for a download, or the legacy guess for entries cached before it was recorded."""
+    if video.get("filepath"):
+        return video["filepath"]
+    return os.path.join(staging_directory, video["uploader"],
+                        f"{video['uploader']} - {sanitize_filename(video['title'])}.mp4")
+
+
+def library_video_path(video, plex_directory):
+    """Where a cached video lands in the Plex library: its uploader folder plus yt-dlp's file name."""
+    file_name = (os.path.basename(video["filepath"]) if video.get("filepath")
+                 else f"{video['uploader']} - {sanitize_filename(video['title'])}.mp4")
+    return os.path.join(plex_directory, video["uploader"], file_name)
+
+
+def scan_library(plex_directory):
+    """Yields every video file under the library with os.scandir (no per-file stat calls)."""
+    pending = [plex_directory]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.name.endswith(VIDEO_EXTENSIONS):
+                        yield entry.path
+        except OSError as e:
+            logging.error(f"⚠ Failed to scan {directory}: {e}")
+
+
+class LibraryIndex:
+    """Persistent video ID -> library path map, so nothing has to list a folder to find a video."""
+
+    def __init__(self, state_file):
+        self.state_file = state_file
+        self.journal_file = state_file + JOURNAL_SUFFIX
+        self._lock = threading.Lock()
+        try:
+            with open(state_file, "r", encoding="utf-8") as f:
+                self._paths = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._paths = {}
+        self._appended = 0
+        if not self._replay():
+            self._save_locked()  # ✅ Fold a torn journal away before anything is appended after it
+
+    def _replay(self):
+        """Applies the journaled paths on top of the snapshot. Returns False if a line was torn by a crash."""
+        intact = True
+        try:
+            with open(self.journal_file, "r", encoding="utf-8") as journal:
+                for line in journal:
+                    self._appended += 1
+                    try:
+                        self._paths.update(json.loads(line))
+                    except (json.JSONDecodeError, TypeError, ValueError):
+                        intact = False
+        except FileNotFoundError:
+            pass
+        return intact
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config.get("library_index", os.path.join(os.path.dirname(config["cache_file"]),
+                                                            "library_index.json")))
+
+    def __len__(self):
+        return len(self._paths)
+
+    def get(self, video_id, verify=True):
+        """The library path for a video ID, or None if it isn't (or, with verify, is no longer) in the library."""
+        with self._lock:
+            path = self._paths.get(video_id)
+        if path and (not verify or os.path.exists(path)):
+            return path
+        return None
+
+    def record(self, video_id, path):
+        self.update({video_id: path})
+
+    def update(self, paths):
+        """Records several video ID -> path pairs by appending one journal line, not rewriting the index."""
+        if not paths:
+            return
+        with self._lock:
+            self._paths.update(paths)
+            try:
+                with open(self.journal_file, "a", encoding="utf-8") as journal:
+                    journal.write(json.dumps(paths, ensure_ascii=False) + "\n")
+            except OSError as e:
+                logging.error(f"⚠ Failed to journal library index update: {e}")
+                return
+            self._appended += 1
+            if self._appended >= COMPACT_EVERY:
+                self._save_locked()
+
+    def rebuild(self, plex_directory, cache):
+        """Re-derives the index from one scandir walk of the library, matched against the cache's entries."""
+        on_disk = {os.path.normcase(path): path for path in scan_library(plex_directory)}
+        paths = {}
+        for videos in cache.values():
+            for video in videos:
+                path = on_disk.get(os.path.normcase(library_video_path(video, plex_directory)))
+                if path:
+                    paths[video.get("id") or extract_video_id(video["url"])] = path  # Legacy entries have no "id"
+        with self._lock:
+            self._paths = paths
+        self.save()
+        logging.info(f"📚 Library index rebuilt: {len(paths)} of {len(on_disk)} file(s) matched to the cache")
+        return len(paths)
+
+    def save(self):
+        """Rewrites the snapshot and empties the journal."""
+        with self._lock:
+            self._save_locked()
+
+    def _save_locked(self):
+        try:
+            temp_file = self.state_file + ".tmp"
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(self._paths, f)
+            os.replace(temp_file, self.state_file)
+            # Replaying the journal again after a crash here is harmless: it only repeats paths the snapshot has
+            open(self.journal_file, "w").close()
+            self._appended = 0
+        except OSError as e:
+            logging.error(f"⚠ Failed to save library index: {e}")
+
+library_index = LibraryIndex.from_config(config)  # Shared by the pipeline, organizer and stamper
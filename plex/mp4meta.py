@@ -0,0 +1,168 @@
+"""Edits the upload-date metadata of an MP4 in place instead of remuxing the whole file.
+
+Only the moov box is rewritten: mvhd creation/modification times are patched at fixed offsets,
+and the ©day item in moov/udta/meta/ilst is replaced (created if missing). The media data never
+moves, so chunk offsets stay valid. If the rebuilt moov no longer fits in its old slot (plus any
+trailing free box), it is appended to the end of the file and the old slot becomes a free box.
+"""
+import mmap
+import os
+import struct
+from datetime import datetime
+
+MP4_EPOCH = datetime(1904, 1, 1)
+DAY_ITEM = b"\xa9day"
+# meta handler box for iTunes-style metadata: version/flags, pre_defined, 'mdir', 'appl', reserved, empty name
+ITUNES_HDLR = struct.pack(">I4s", 33, b"hdlr") + b"\x00" * 8 + b"mdirappl" + b"\x00" * 9
+
+
+class Mp4PatchError(Exception):
+    """The file's layout isn't something the in-place patcher handles; fall back to ffmpeg."""
+
+
+def _read_header(buf, offset, end):
+    if offset + 8 > end:
+        raise Mp4PatchError(f"Truncated box header at {offset}")
+    size, box_type = struct.unpack_from(">I4s", buf, offset)
+    header_size = 8
+    if size == 1:
+        if offset + 16 > end:
+            raise Mp4PatchError(f"Truncated 64-bit box header at {offset}")
+        size = struct.unpack_from(">Q", buf, offset + 8)[0]
+        header_size = 16
+    elif size == 0:
+        size = end - offset  # Box runs to the end of its container
+    if size < header_size or offset + size > end:
+        raise Mp4PatchError(f"Invalid size for {box_type!r} at {offset}")
+    return box_type, size, header_size
+
+
+def _iter_boxes(buf, start, end):
+    """Yields (type, offset, size, header_size) for the boxes laid out between start and end."""
+    offset = start
+    while offset < end:
+        box_type, size, header_size = _read_header(buf, offset, end)
+        yield box_type, offset, size, header_size
+        offset += size
+
+
+def _box(box_type, payload):
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def _children(data, payload_start):
+    """Splits a container's bytes into a list of [type, whole-box bytes]."""
+    return [[box_type, bytes(data[offset:offset + size])]
+            for box_type, offset, size, _ in _iter_boxes(data, payload_start, len(data))]
+
+
+def _meta_payload_start(meta):
+    # ISO meta is a full box (4 bytes version/flags); some QuickTime writers omit them
+    return 8 if meta[12:16] == b"hdlr" else 12
+
+
+def _replace_child(children, box_type, new_box):
+    for child in children:
+        if child[0] == box_type:
+            child[1] = new_box
+            return
+    children.append([box_type, new_box])
+
+
+def _find_child(children, box_type):
+    return next((data for child_type, data in children if child_type == box_type), None)
+
+
+def _patch_mvhd(moov, seconds):
+    """Sets mvhd creation/modification times (seconds since 1904) at their fixed offsets."""
+    moov = bytearray(moov)
+    for box_type, offset, size, header_size in _iter_boxes(moov, 8, len(moov)):
+        if box_type != b"mvhd":
+            continue
+        version = moov[offset + header_size]
+        times_at = offset + header_size + 4
+        if version == 1:
+            struct.pack_into(">QQ", moov, times_at, seconds, seconds)
+        else:
+            struct.pack_into(">II", moov, times_at, seconds & 0xFFFFFFFF, seconds & 0xFFFFFFFF)
+        return bytes(moov)
+    raise Mp4PatchError("moov has no mvhd")
+
+
+def _with_day_item(moov, date_string):
+    """Returns moov rebuilt with moov/udta/meta/ilst/©day set to date_string."""
+    day_item = _box(DAY_ITEM, _box(b"data", struct.pack(">II", 1, 0) + date_string.encode("utf-8")))
+
+    moov_children = _children(moov, 8)
+    udta = _find_child(moov_children, b"udta")
+    udta_children = _children(udta, 8) if udta else []
+
+    meta = _find_child(udta_children, b"meta")
+    if meta:
+        meta_start = _meta_payload_start(meta)
+        meta_prefix, meta_children = meta[8:meta_start], _children(meta, meta_start)
+    else:
+        meta_prefix, meta_children = b"\x00\x00\x00\x00", [[b"hdlr", ITUNES_HDLR]]
+
+    ilst = _find_child(meta_children, b"ilst")
+    ilst_children = _children(ilst, 8) if ilst else []
+
+    _replace_child(ilst_children, DAY_ITEM, day_item)
+    _replace_child(meta_children, b"ilst", _box(b"ilst", b"".join(data for _, data in ilst_children)))
+    _replace_child(udta_children, b"meta",
+                   _box(b"meta", meta_prefix + b"".join(data for _, data in meta_children)))
+    _replace_child(moov_children, b"udta", _box(b"udta", b"".join(data for _, data in udta_children)))
+    return _box(b"moov", b"".join(data for _, data in moov_children))
+
+
+def _locate_moov(path):
+    """Finds the top-level moov and the free space right after it, reading the file through mmap."""
+    with open(path, "rb") as f:
+        file_size = os.fstat(f.fileno()).st_size
+        if file_size < 8:
+            raise Mp4PatchError("File too small to be an MP4")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            top_level = list(_iter_boxes(view, 0, file_size))
+            if any(struct.unpack_from(">I", view, offset)[0] == 0 for _, offset, _, _ in top_level):
+                # A box that runs to EOF (typically a final mdat) would swallow a moov appended after it
+                raise Mp4PatchError("A top-level box has size 0 (runs to the end of the file)")
+            for index, (box_type, offset, size, header_size) in enumerate(top_level):
+                if box_type != b"moov":
+                    continue
+                if header_size != 8:
+                    raise Mp4PatchError("64-bit moov headers are not supported")
+                slot = size
+                following = top_level[index + 1] if index + 1 < len(top_level) else None
+                if following and following[0] == b"free" and following[3] == 8:
+                    slot += following[2]  # Padding we may grow into
+                is_last = following is None
+                return bytes(view[offset:offset + size]), offset, slot, is_last, file_size
+    raise Mp4PatchError("No moov box found")
+
+
+def patch_upload_date(video_path, upload_date):
+    """Writes upload_date into mvhd and the ©day tag without copying the media data."""
+    moov, offset, slot, is_last, file_size = _locate_moov(video_path)
+
+    seconds = int((upload_date - MP4_EPOCH).total_seconds())
+    new_moov = _with_day_item(_patch_mvhd(moov, seconds), upload_date.strftime("%Y-%m-%dT%H:%M:%SZ"))
+
+    fd = os.open(video_path, os.O_RDWR)
+    try:
+        if is_last:
+            # moov is the final box: rewrite it where it is and trim or extend the file
+            os.pwrite(fd, new_moov, offset)
+            os.ftruncate(fd, offset + len(new_moov))
+        elif len(new_moov) == slot or len(new_moov) + 8 <= slot:
+            # Fits in the old slot: pad whatever is left with a free box
+            padding = slot - len(new_moov)
+            free_box = struct.pack(">I4s", padding, b"free") + b"\x00" * (padding - 8) if padding else b""
+            os.pwrite(fd, new_moov + free_box, offset)
+        else:
+            # Too big: append the new moov first, then retire the old one, so a crash leaves a valid file
+            os.pwrite(fd, new_moov, file_size)
+            os.fsync(fd)
+            os.pwrite(fd, struct.pack(">I4s", len(moov), b"free"), offset)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -1,6 +1,11 @@
-import shutil
 import os
 import logging
+from utils.transfer import transfer_pool
+from plex.library import library_index
+from youtube.utils import extract_video_id
+
+# Files yt-dlp writes next to a video with the same base name (thumbnails, metadata)
+SIDECAR_EXTENSIONS = (".jpg", ".webp", ".info.json", ".description")
 
 def organize_files(video: dict, staging_directory: str, plex_directory: str, sanitized_title: str):
     uploader = str(video.get("uploader", "UnknownUploader"))
@@ -14,25 +19,34 @@ def organize_files(video: dict, staging_directory: str, plex_directory: str, san
     if not os.path.exists(final_uploader_folder):
         os.makedirs(final_uploader_folder, exist_ok=True)
 
-    # Move all related files (video, thumbnails, metadata) clearly and explicitly
-    expected_prefix = f"{uploader} - {sanitized_title}"
+    # ✅ yt-dlp's recorded path names the video exactly; older cache entries fall back to the sanitized title
+    video_path = video.get("filepath") or os.path.join(uploader_folder, f"{uploader} - {sanitized_title}.mp4")
+    base_path = os.path.splitext(video_path)[0]
+
+    # Move all related files (video, thumbnails, metadata) without listing the whole uploader folder
     files_moved = False
+    transfers = {}
 
-    for file in os.listdir(uploader_folder):
-        if file.startswith(expected_prefix):
-            source_path = os.path.join(uploader_folder, file)
-            destination_path = os.path.join(final_uploader_folder, file)
+    for source_path in (video_path, *(base_path + extension for extension in SIDECAR_EXTENSIONS)):
+        if not os.path.exists(source_path):
+            continue
+        file = os.path.basename(source_path)
+        destination_path = os.path.join(final_uploader_folder, file)
+        transfers[file] = (destination_path, transfer_pool.submit(source_path, destination_path))
 
-            if os.path.exists(source_path):
-                shutil.move(source_path, destination_path)
-                logging.info(f"✅ Moved {file} to Plex: {destination_path}")
-                files_moved = True
-            else:
-                logging.error(f"⚠️ File not found for moving: {source_path}")
+    # ✅ Related files move in parallel on the transfer pool; wait for all of them
+    for file, (destination_path, future) in transfers.items():
+        try:
+            future.result()
+            logging.info(f"✅ Moved {file} to Plex: {destination_path}")
+            files_moved = True
+        except OSError as e:
+            logging.error(f"⚠️ Failed to move {file} to Plex: {e}")
 
     # Clearly confirm if main video file moved successfully
-    final_video_path = os.path.join(final_uploader_folder, f"{uploader} - {sanitized_title}.mp4")
+    final_video_path = os.path.join(final_uploader_folder, os.path.basename(video_path))
     if files_moved and os.path.exists(final_video_path):
+        library_index.record(video.get("id") or extract_video_id(video["url"]), final_video_path)
         logging.info(f"🎬 Video successfully moved to Plex: {final_video_path}")
     else:
         logging.warning(f"⚠️ No files were moved for video: {final_video_path}")
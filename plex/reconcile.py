@@ -0,0 +1,184 @@
+"""Reconciles the Plex library against video_cache.json and downloaded.txt.
+
+The library is walked with os.scandir on a thread pool (one task per directory), which keeps many
+metadata requests in flight on network storage. The result is persisted as a manifest; on the next
+scan a directory whose mtime hasn't changed reuses its manifest listing instead of being re-read.
+Adding, removing or renaming a file changes its directory's mtime, so those are always picked up.
+"""
+import argparse
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from config.loader import get_config
+from plex.library import library_index, library_video_path, VIDEO_EXTENSIONS
+from utils.archive import archived_ids
+from utils.cache import load_cache
+from utils.transfer import PARTIAL_SUFFIX
+from youtube.downloader import DOWNLOAD_ARCHIVE
+from youtube.utils import extract_video_id
+
+config = get_config()
+
+PLEX_DIRECTORY = config["plex_directory"]
+CACHE_FILE = config["cache_file"]
+RECONCILE_WORKERS = config.get("reconcile", {}).get("workers", 16)
+MANIFEST_FILE = config.get("reconcile", {}).get(
+    "manifest_file", os.path.join(os.path.dirname(CACHE_FILE), "library_manifest.json"))
+
+
+@dataclass
+class ReconcileReport:
+    present: dict = field(default_factory=dict)  # video ID -> {"path", "size", "mtime_ns"}
+    missing: list = field(default_factory=list)  # cache entries with no file in the library
+    orphans: list = field(default_factory=list)  # library files no cache entry accounts for
+    archived_missing: list = field(default_factory=list)  # IDs in downloaded.txt that aren't in the library
+    directories_scanned: int = 0
+    directories_reused: int = 0
+
+    def summary(self):
+        return {
+            "present": len(self.present),
+            "missing": len(self.missing),
+            "orphans": len(self.orphans),
+            "archived_missing": len(self.archived_missing),
+            "directories_scanned": self.directories_scanned,
+            "directories_reused": self.directories_reused,
+        }
+
+
+def load_manifest(manifest_file):
+    try:
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_manifest(manifest, manifest_file):
+    try:
+        temp_file = manifest_file + ".tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(temp_file, manifest_file)
+    except OSError as e:
+        logging.error(f"⚠ Failed to save library manifest: {e}")
+
+
+def _scan_directory(path, previous):
+    """Lists one directory. Returns (record, reused); record is None if the directory can't be read."""
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError as e:
+        logging.error(f"⚠ Failed to stat {path}: {e}")
+        return None, False
+
+    if previous and previous.get("mtime_ns") == mtime_ns:
+        return previous, True  # ✅ Nothing was added, removed or renamed here since the last scan
+
+    files, subdirs = {}, []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    files[entry.name] = [stat.st_size, stat.st_mtime_ns]
+    except OSError as e:
+        logging.error(f"⚠ Failed to scan {path}: {e}")
+        return None, False
+    return {"mtime_ns": mtime_ns, "files": files, "subdirs": subdirs}, False
+
+
+def scan_tree(root, manifest, workers=RECONCILE_WORKERS):
+    """Walks root in parallel. Returns (directories, scanned, reused) with directories keyed by path."""
+    previous = manifest.get("directories", {}) if manifest.get("root") == root else {}
+    directories = {}
+    scanned = reused = 0
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reconcile") as pool:
+        pending = {pool.submit(_scan_directory, root, previous.get(root)): root}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                record, was_reused = future.result()
+                if record is None:
+                    continue
+                directories[path] = record
+                reused += was_reused
+                scanned += not was_reused
+                for name in record["subdirs"]:
+                    subdir = os.path.join(path, name)
+                    pending[pool.submit(_scan_directory, subdir, previous.get(subdir))] = subdir
+
+    return directories, scanned, reused
+
+
+def reconcile(cache, plex_directory=PLEX_DIRECTORY, archive_file=DOWNLOAD_ARCHIVE,
+              manifest_file=MANIFEST_FILE, workers=RECONCILE_WORKERS):
+    """Scans the library and diffs it against the cache and the download archive."""
+    manifest = load_manifest(manifest_file)
+    directories, scanned, reused = scan_tree(plex_directory, manifest, workers)
+    save_manifest({"root": plex_directory, "directories": directories}, manifest_file)
+
+    on_disk = {}  # normalised path -> (path, size, mtime_ns)
+    for directory, record in directories.items():
+        for name, (size, mtime_ns) in record["files"].items():
+            path = os.path.join(directory, name)
+            on_disk[os.path.normcase(path)] = (path, size, mtime_ns)
+
+    report = ReconcileReport(directories_scanned=scanned, directories_reused=reused)
+    claimed = set()
+    for videos in cache.values():
+        for video in videos:
+            video_id = video.get("id") or extract_video_id(video["url"])
+            expected = library_index.get(video_id, verify=False) or library_video_path(video, plex_directory)
+            found = on_disk.get(os.path.normcase(expected))
+            if found:
+                path, size, mtime_ns = found
+                report.present[video_id] = {"path": path, "size": size, "mtime_ns": mtime_ns}
+                claimed.add(os.path.normcase(os.path.splitext(path)[0]))
+            else:
+                report.missing.append(video)
+
+    for key, (path, _, _) in on_disk.items():
+        if path.endswith(PARTIAL_SUFFIX):
+            report.orphans.append(path)  # Leftover of an interrupted transfer
+        elif path.endswith(VIDEO_EXTENSIONS) and os.path.splitext(key)[0] not in claimed:
+            report.orphans.append(path)
+
+    report.archived_missing = sorted(archived_ids(archive_file) - set(report.present))
+
+    changed = {video_id: entry["path"] for video_id, entry in report.present.items()
+               if library_index.get(video_id, verify=False) != entry["path"]}
+    if changed:
+        library_index.update(changed)  # ✅ Keep the library index in step with the disk
+
+    logging.info(f"📚 Library reconciled: {report.summary()}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the Plex library with the cache and download archive.")
+    parser.add_argument("--workers", type=int, default=RECONCILE_WORKERS, help="Parallel directory scans")
+    parser.add_argument("--report", help="Write the full report (missing, orphans, ...) to this JSON file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    report = reconcile(load_cache(CACHE_FILE), workers=args.workers)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({
+                "summary": report.summary(),
+                "missing": [video.get("url") for video in report.missing],
+                "orphans": report.orphans,
+                "archived_missing": report.archived_missing,
+            }, f, indent=4)
+        logging.info(f"📝 Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from plex.embedder import apply_upload_dates
+from plex.library import library_index, library_video_path
+from utils.metrics import tracer
+
+SAVE_EVERY = 100  # Persist the stamp index after this many newly stamped files
+
+
+class StampIndex:
+    """Remembers which files already carry their upload date, keyed by path and checked by size + mtime."""
+
+    def __init__(self, state_file):
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        try:
+            with open(state_file, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._entries = {}
+
+    def is_current(self, path, stat, upload_date):
+        entry = self._entries.get(path)
+        return (entry is not None and entry["size"] == stat.st_size
+                and entry["mtime_ns"] == stat.st_mtime_ns and entry["upload_date"] == upload_date)
+
+    def record(self, path, upload_date):
+        stat = os.stat(path)  # Stamping rewrites the file, so record the stamped size/mtime
+        with self._lock:
+            self._entries[path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "upload_date": upload_date}
+
+    def save(self):
+        with self._lock:
+            try:
+                temp_file = self.state_file + ".tmp"
+                with open(temp_file, "w", encoding="utf-8") as f:
+                    json.dump(self._entries, f)
+                os.replace(temp_file, self.state_file)
+            except OSError as e:
+                logging.error(f"⚠️ Failed to save stamp index: {e}")
+
+
+def expected_video_path(video, plex_directory):
+    """Where a cached video lives in the Plex library: the library index first, then its recorded file name."""
+    return (video.get("id") and library_index.get(video["id"])) or library_video_path(video, plex_directory)
+
+
+def _stamp_file(video_path, upload_date_str):
+    """Process-pool worker: embeds one upload date. Returns (path, upload_date_str, success, start, end)."""
+    start = time.time()
+    upload_date = datetime.strptime(upload_date_str, "%Y%m%d")
+    success = apply_upload_dates(video_path, upload_date)
+    return video_path, upload_date_str, success, start, time.time()
+
+
+def find_pending(cache, plex_directory, index):
+    """Yields (path, upload_date) for cached videos that are new or changed since they were stamped."""
+    for channel, videos in cache.items():
+        for video in videos:
+            upload_date_str = video.get("upload_date", "")
+            try:
+                datetime.strptime(upload_date_str, "%Y%m%d")
+            except ValueError:
+                logging.error(f"⚠️ Error parsing upload date for {video.get('title')}: {upload_date_str}")
+                continue
+
+            video_path = expected_video_path(video, plex_directory)
+            try:
+                stat = os.stat(video_path)
+            except FileNotFoundError:
+                logging.debug(f"DEBUG: Not in library yet: {video_path}")
+                continue
+
+            if not index.is_current(video_path, stat, upload_date_str):
+                yield video_path, upload_date_str
+
+
+def stamp_library(cache, plex_directory, state_file, workers=4):
+    """Stamps upload dates onto new or changed library files only, fanning ffmpeg out over a process pool."""
+    index = StampIndex(state_file)
+    pending = list(find_pending(cache, plex_directory, index))
+
+    if not pending:
+        logging.info("✅ All library files already carry their upload date.")
+        return 0
+
+    logging.info(f"🕒 Stamping upload dates onto {len(pending)} file(s) with {workers} worker(s)...")
+    stamped = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_stamp_file, path, upload_date) for path, upload_date in pending]
+        for future in as_completed(futures):
+            try:
+                video_path, upload_date, success, start, end = future.result()
+            except Exception as e:
+                logging.error(f"⚠️ Stamping worker failed: {e}")
+                continue
+            tracer.record("stamp", video_path, start, end, outcome="ok" if success else "failed")
+            if success:
+                index.record(video_path, upload_date)
+                stamped += 1
+                if stamped % SAVE_EVERY == 0:
+                    index.save()
+
+    index.save()
+    logging.info(f"✅ Stamped {stamped}/{len(pending)} file(s).")
+    return stamped
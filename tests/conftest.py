@@ -0,0 +1,11 @@
+"""Every project module loads config/config.json on import, so point the loader at a scratch workspace first."""
+import atexit
+import shutil
+import tempfile
+from benchmarks.fixtures import create_workspace
+from config import loader
+
+WORKSPACE = tempfile.mkdtemp(prefix="ytpd-tests-")
+CONFIG_FILE, CONFIG = create_workspace(WORKSPACE)
+loader.CONFIG_FILE = CONFIG_FILE
+atexit.register(shutil.rmtree, WORKSPACE, ignore_errors=True)
@@ -0,0 +1,51 @@
+import os
+from utils.archive import append_archived, archived_ids, is_archived, mark_archived
+
+
+def write(path, text, mode="w"):
+    with open(path, mode, encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_lookups_match_whole_ids_only(tmp_path):
+    archive = str(tmp_path / "downloaded.txt")
+    write(archive, "youtube dQw4w9WgXcQ\nvimeo 12345\n")
+
+    assert is_archived(archive, "dQw4w9WgXcQ")
+    assert not is_archived(archive, "dQw4w9WgXc")  # No substring matches
+    assert not is_archived(archive, "12345")  # Different extractor
+    assert is_archived(archive, "12345", extractor="Vimeo")
+
+
+def test_appended_lines_are_read_incrementally(tmp_path):
+    archive = str(tmp_path / "downloaded.txt")
+    write(archive, "youtube aaaaaaaaaaa\n")
+    assert archived_ids(archive) == {"aaaaaaaaaaa"}
+
+    write(archive, "youtube bbbbbbbbbbb\nyoutube ccccc", mode="a")  # yt-dlp mid-write: no newline yet
+    assert archived_ids(archive) == {"aaaaaaaaaaa", "bbbbbbbbbbb"}
+
+    write(archive, "cccccc\n", mode="a")
+    assert is_archived(archive, "ccccccccccc")
+
+    append_archived(archive, ["ddddddddddd"])
+    assert is_archived(archive, "ddddddddddd")
+
+
+def test_replaced_archive_is_reindexed(tmp_path):
+    archive = str(tmp_path / "downloaded.txt")
+    write(archive, "youtube aaaaaaaaaaa\n")
+    assert is_archived(archive, "aaaaaaaaaaa")
+
+    write(archive + ".new", "youtube bbbbbbbbbbb\n")
+    os.replace(archive + ".new", archive)
+    assert archived_ids(archive) == {"bbbbbbbbbbb"}
+
+
+def test_mark_archived_is_visible_before_the_file_changes(tmp_path):
+    archive = str(tmp_path / "downloaded.txt")
+    write(archive, "")
+    assert not is_archived(archive, "aaaaaaaaaaa")
+
+    mark_archived(archive, "aaaaaaaaaaa")
+    assert is_archived(archive, "aaaaaaaaaaa")
@@ -0,0 +1,61 @@
+import json
+import os
+import pytest
+from utils import cache
+from utils.cache import JOURNAL_SUFFIX, compact_cache, load_cache, save_cache, update_cache_entry
+
+CHANNEL = "https://www.youtube.com/@Chan"
+
+
+def video(video_id, **fields):
+    return {"id": video_id, "url": f"https://www.youtube.com/watch?v={video_id}", "title": video_id, **fields}
+
+
+@pytest.fixture
+def cache_file(tmp_path):
+    return str(tmp_path / "video_cache.json")
+
+
+def test_journal_replays_on_top_of_the_snapshot(cache_file):
+    save_cache({CHANNEL: [video("a")]}, cache_file)
+    update_cache_entry(CHANNEL, video("b"), cache_file)
+    update_cache_entry(CHANNEL, video("a", filepath="/plex/a.mp4"), cache_file)  # Later record updates the entry
+
+    assert not os.path.exists(cache_file)  # Nothing compacted yet, only journaled
+    assert load_cache(cache_file) == {CHANNEL: [video("a", filepath="/plex/a.mp4"), video("b")]}
+
+
+def test_torn_final_journal_line_is_ignored(cache_file):
+    update_cache_entry(CHANNEL, video("a"), cache_file)
+    with open(cache_file + JOURNAL_SUFFIX, "a", encoding="utf-8") as journal:
+        journal.write('{"channel": "' + CHANNEL + '", "video": {"id": "b", "ur')
+
+    assert load_cache(cache_file) == {CHANNEL: [video("a")]}
+
+
+def test_compaction_folds_the_journal_into_the_snapshot(cache_file):
+    update_cache_entry(CHANNEL, video("a"), cache_file)
+    update_cache_entry(CHANNEL, video("b"), cache_file)
+    compact_cache(cache_file)
+
+    assert os.path.getsize(cache_file + JOURNAL_SUFFIX) == 0
+    with open(cache_file, encoding="utf-8") as f:
+        assert json.load(f) == {CHANNEL: [video("a"), video("b")]}
+    assert load_cache(cache_file) == {CHANNEL: [video("a"), video("b")]}
+
+
+def test_journal_compacts_itself_past_the_threshold(cache_file, monkeypatch):
+    monkeypatch.setattr(cache, "COMPACT_EVERY", 3)
+    for video_id in "abc":
+        update_cache_entry(CHANNEL, video(video_id), cache_file)
+
+    assert os.path.getsize(cache_file + JOURNAL_SUFFIX) == 0
+    assert [entry["id"] for entry in load_cache(cache_file)[CHANNEL]] == ["a", "b", "c"]
+
+
+def test_save_cache_only_journals_new_entries(cache_file):
+    save_cache({CHANNEL: [video("a")]}, cache_file)
+    save_cache({CHANNEL: [video("a"), video("b")]}, cache_file)
+
+    with open(cache_file + JOURNAL_SUFFIX, encoding="utf-8") as journal:
+        assert [json.loads(line)["video"]["id"] for line in journal] == ["a", "b"]
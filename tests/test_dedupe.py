@@ -0,0 +1,25 @@
+import os
+from plex.dedupe import DedupeIndex, normalize_title
+
+
+def test_title_normalisation_drops_case_punctuation_and_reupload_tags():
+    assert normalize_title("The Big Video! (Re-upload) [4K]") == normalize_title("the big video")
+    assert normalize_title("Видео: часть 1") == "видео часть 1"
+
+
+def test_records_and_duplicates_are_journaled_and_replayed(tmp_path):
+    state_file = str(tmp_path / "dedupe_index.json")
+    index = DedupeIndex(state_file, policy="skip")
+    index.record("aaaaaaaaaaa", "The Big Video", 600, "@Bench", "/plex/a.mp4")
+    index.mark_duplicate("bbbbbbbbbbb", "aaaaaaaaaaa")
+
+    assert not os.path.exists(state_file)  # No full rewrite per finished video
+    with open(state_file + ".journal", "a", encoding="utf-8") as journal:
+        journal.write('{"id": "ccccccccccc", "orig')  # Torn by a crash
+    reloaded = DedupeIndex(state_file, policy="skip")
+    assert reloaded.is_duplicate("bbbbbbbbbbb")
+    assert not reloaded.is_duplicate("ccccccccccc")
+    assert reloaded._by_title["the big video"] == ["aaaaaaaaaaa"]
+
+    reloaded.mark_duplicate("ddddddddddd", "aaaaaaaaaaa")  # Not glued onto the torn line
+    assert DedupeIndex(state_file).is_duplicate("ddddddddddd")
@@ -0,0 +1,73 @@
+import json
+import threading
+import pytest
+from benchmarks.fixtures import write_synthetic_mp4
+
+yt_dlp = pytest.importorskip("yt_dlp")
+
+from youtube.engine import InProcessEngine  # noqa: E402
+
+
+@pytest.fixture
+def clip(tmp_path):
+    path = tmp_path / "clip.mp4"
+    write_synthetic_mp4(str(path))
+    return path
+
+
+def test_capture_returns_stdout_output(clip, capsys):
+    returncode, lines = InProcessEngine().capture(["yt-dlp", "--enable-file-urls", "--dump-json", clip.as_uri()])
+
+    assert returncode == 0
+    info = json.loads(next(line for line in lines if line.startswith("{")))
+    assert info["id"] == "clip"
+    assert capsys.readouterr().out == ""  # Nothing leaked to the real stdout
+
+
+def test_capture_returns_print_output_after_download(clip, tmp_path):
+    command = ["yt-dlp", "--enable-file-urls", "-o", str(tmp_path / "out" / "%(title)s.%(ext)s"),
+               "--print", "after_move:[info-json] %(.{id,filepath})j", clip.as_uri()]
+    returncode, lines = InProcessEngine().capture(command)
+
+    assert returncode == 0
+    info = json.loads(next(line for line in lines if line.startswith("[info-json] "))[len("[info-json] "):])
+    assert info == {"id": "clip", "filepath": str(tmp_path / "out" / "clip.mp4")}
+
+
+def test_run_sync_stops_between_entries(tmp_path):
+    urls = []
+    for index in range(5):
+        path = tmp_path / f"clip{index}.mp4"
+        write_synthetic_mp4(str(path))
+        urls.append(path.as_uri())
+    stopped = threading.Event()
+    entries = []
+
+    def on_line(line):
+        if line.startswith("{"):
+            entries.append(line)
+            stopped.set()  # Like a scan breaking out after the first entry
+
+    returncode = InProcessEngine().run_sync(["yt-dlp", "--enable-file-urls", "--dump-json", *urls], on_line,
+                                            stopped=stopped)
+
+    assert returncode == 1
+    assert len(entries) == 1
+
+
+def test_failure_does_not_stick_to_the_worker(clip, tmp_path):
+    engine = InProcessEngine()
+
+    assert engine.run_sync(["yt-dlp", "--enable-file-urls", "--dump-json", (tmp_path / "missing.mp4").as_uri()]) == 1
+    assert engine.run_sync(["yt-dlp", "--enable-file-urls", "--dump-json", clip.as_uri()]) == 0
+
+
+def test_format_changes_between_calls_on_the_same_worker(clip):
+    engine = InProcessEngine()
+
+    def dump(format_spec):
+        return engine.run_sync(["yt-dlp", "--enable-file-urls", "-f", format_spec, "--dump-json", clip.as_uri()])
+
+    assert dump("b") == 0
+    assert dump("b[height<=1]") == 1  # The file has no known height, so nothing matches
+    assert dump("b") == 0
@@ -0,0 +1,76 @@
+import json
+import pytest
+from youtube import filters
+from youtube.filters import FilterEngine, compile_rules
+
+CHANNEL = "https://www.youtube.com/@BenchChannel00"
+
+
+def listing(video_id, duration=600, **fields):
+    return {"id": video_id, "url": f"https://www.youtube.com/watch?v={video_id}", "duration": duration, **fields}
+
+
+@pytest.fixture
+def state_file(tmp_path):
+    return str(tmp_path / "rejected_videos.json")
+
+
+@pytest.mark.parametrize("duration", [45, 180, 600])
+def test_regular_urls_are_never_shorts_by_default(duration):
+    assert compile_rules()(listing("a", duration)) is None
+
+
+@pytest.mark.parametrize("duration, reason", [(45, "short"), (180, "short"), (181, None)])
+def test_shorts_duration_limit_is_opt_in(duration, reason):
+    assert compile_rules({"shorts_max_seconds": 180})(listing("a", duration)) == reason
+
+
+def test_shorts_url_is_rejected_whatever_the_duration():
+    assert compile_rules()({"id": "a", "url": "https://www.youtube.com/shorts/a", "duration": 600}) == "short"
+
+
+def test_rejections_are_remembered_while_the_rules_stay_the_same(state_file):
+    engine = FilterEngine(state_file)
+    is_rejected, accept, rules_changed = engine.for_channel(CHANNEL)
+    assert not accept({"id": "short", "url": "https://www.youtube.com/shorts/short", "duration": 40})
+    assert accept(listing("long", 600))
+    assert not accept(listing("live", 600, live_status="is_live"))
+    engine.save()
+
+    is_rejected, _, rules_changed = FilterEngine(state_file).for_channel(CHANNEL)
+    assert not rules_changed
+    assert is_rejected("short")
+    assert not is_rejected("live")  # Transient: checked again once the stream has ended
+
+
+def test_changed_rules_drop_older_rejections(state_file, monkeypatch):
+    monkeypatch.setitem(filters.config, "filters", {"shorts_max_seconds": 180})
+    engine = FilterEngine(state_file)
+    _, accept, _ = engine.for_channel(CHANNEL)
+    accept(listing("short", 100))
+
+    monkeypatch.setitem(filters.config, "filters", {"shorts_max_seconds": 60})
+    is_rejected, accept, rules_changed = engine.for_channel(CHANNEL)
+    assert rules_changed  # The caller rescans the whole channel
+    assert not is_rejected("short")
+    assert accept(listing("short", 100))
+
+
+def test_changed_defaults_drop_older_rejections(state_file, monkeypatch):
+    engine = FilterEngine(state_file)
+    _, accept, _ = engine.for_channel(CHANNEL)
+    accept({"id": "short", "url": "https://www.youtube.com/shorts/short", "duration": 40})
+
+    monkeypatch.setitem(filters.DEFAULT_RULES, "shorts_max_seconds", 60)
+    is_rejected, _, rules_changed = engine.for_channel(CHANNEL)
+    assert rules_changed
+    assert not is_rejected("short")
+
+
+def test_unversioned_state_is_rechecked(state_file):
+    with open(state_file, "w", encoding="utf-8") as f:
+        json.dump({CHANNEL: {"rules": "{}", "videos": {"short": "short"}}}, f)
+
+    is_rejected, _, rules_changed = FilterEngine(state_file).for_channel(CHANNEL)
+    assert rules_changed
+    assert not is_rejected("short")
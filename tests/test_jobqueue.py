@@ -0,0 +1,85 @@
+import asyncio
+import pytest
+from utils.jobqueue import JobQueue
+
+
+@pytest.fixture
+def database(tmp_path):
+    return str(tmp_path / "jobs.sqlite")
+
+
+def job(queue, key):
+    return queue._execute("SELECT state, owner, attempts FROM jobs WHERE key = ?", (key,)).fetchone()
+
+
+def test_claim_is_refused_while_another_worker_holds_a_live_lease(database):
+    first = JobQueue(database, worker_id="a", lease_seconds=300)
+    second = JobQueue(database, worker_id="b", lease_seconds=300)
+
+    assert first.claim("vid1")
+    assert not second.claim("vid1")
+    assert first.claim("vid1")  # The holder may re-claim its own job
+    assert job(first, "vid1") == ("leased", "a", 0)
+
+
+def test_claim_takes_over_an_expired_lease(database):
+    crashed = JobQueue(database, worker_id="a", lease_seconds=0)  # Expires immediately
+    survivor = JobQueue(database, worker_id="b", lease_seconds=300)
+
+    assert crashed.claim("vid1")
+    assert survivor.claim("vid1")
+    assert job(survivor, "vid1") == ("leased", "b", 1)
+    assert not crashed.renew("vid1")  # The old holder learns it lost the lease
+
+
+def test_reclaim_expired_returns_jobs_to_pending(database):
+    crashed = JobQueue(database, worker_id="a", lease_seconds=0)
+    crashed.claim("vid1")
+
+    assert JobQueue(database, worker_id="b").reclaim_expired() == 1
+    assert job(crashed, "vid1") == ("pending", None, 1)
+
+
+def test_done_jobs_are_never_claimed_again(database):
+    first = JobQueue(database, worker_id="a")
+    first.claim("vid1")
+    first.complete("vid1", {"id": "vid1"})
+
+    assert not JobQueue(database, worker_id="b").claim("vid1")
+
+
+def test_failed_finish_returns_the_job_to_pending(database):
+    first = JobQueue(database, worker_id="a", lease_seconds=300)
+    second = JobQueue(database, worker_id="b", lease_seconds=300)
+
+    async def fail():
+        assert await first.acquire("vid1", channel="chan")
+        await first.finish("vid1", ok=False, result={"id": "vid1"})
+
+    asyncio.run(fail())
+    assert job(first, "vid1") == ("pending", None, 1)
+    assert first.results_since(0) == second.results_since(0) == []  # Nothing published
+    assert second.claim("vid1")
+
+
+def test_finish_without_done_returns_the_job_to_pending_without_a_failure(database):
+    queue = JobQueue(database, worker_id="a")
+
+    async def skip():
+        assert await queue.acquire("vid1")
+        await queue.finish("vid1", done=False)
+
+    asyncio.run(skip())
+    assert job(queue, "vid1") == ("pending", None, 0)
+
+
+def test_results_since_excludes_this_workers_own_results(database):
+    first = JobQueue(database, worker_id="a")
+    second = JobQueue(database, worker_id="b")
+    for queue, key in ((first, "mine"), (second, "theirs")):
+        queue.claim(key, channel="chan")
+        queue.complete(key, {"id": key})
+
+    results = first.results_since(0)
+    assert [(channel, key, entry) for channel, key, entry, _ in results] == [("chan", "theirs", {"id": "theirs"})]
+    assert first.results_since(results[0][3]) == []  # Nothing newer than what was already imported
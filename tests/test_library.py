@@ -0,0 +1,53 @@
+import os
+from plex.library import LibraryIndex
+
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "wb").close()
+
+
+def test_rebuild_matches_legacy_cache_entries_without_ids(tmp_path):
+    plex_directory = str(tmp_path / "plex")
+    touch(os.path.join(plex_directory, "Bench", "Bench - First video.mp4"))
+    touch(os.path.join(plex_directory, "Bench", "Bench - Second video.mp4"))
+    cache = {"https://www.youtube.com/@Bench": [
+        {"url": "https://www.youtube.com/watch?v=aaaaaaaaaaa", "uploader": "Bench", "title": "First video"},
+        {"url": "https://www.youtube.com/shorts/bbbbbbbbbbb", "uploader": "Bench", "title": "Second video"},
+        {"url": "https://www.youtube.com/watch?v=ccccccccccc", "uploader": "Bench", "title": "Not downloaded"},
+    ]}
+    index = LibraryIndex(str(tmp_path / "library_index.json"))
+
+    assert index.rebuild(plex_directory, cache) == 2
+    assert index.get("aaaaaaaaaaa") == os.path.join(plex_directory, "Bench", "Bench - First video.mp4")
+    assert index.get("bbbbbbbbbbb") == os.path.join(plex_directory, "Bench", "Bench - Second video.mp4")
+    assert index.get("ccccccccccc") is None
+    assert len(LibraryIndex(str(tmp_path / "library_index.json"))) == 2  # The rebuilt index was saved
+
+
+def test_recorded_paths_are_journaled_not_rewritten(tmp_path):
+    state_file = str(tmp_path / "library_index.json")
+    index = LibraryIndex(state_file)
+    index.record("aaaaaaaaaaa", "/plex/a.mp4")
+    index.update({"bbbbbbbbbbb": "/plex/b.mp4", "ccccccccccc": "/plex/c.mp4"})
+
+    assert not os.path.exists(state_file)  # No full rewrite per move
+    with open(state_file + ".journal", "a", encoding="utf-8") as journal:
+        journal.write('{"ddddddddddd": "/pl')  # Torn by a crash
+    reloaded = LibraryIndex(state_file)
+    assert len(reloaded) == 3
+    assert reloaded.get("bbbbbbbbbbb", verify=False) == "/plex/b.mp4"
+    reloaded.record("ddddddddddd", "/plex/d.mp4")  # Not glued onto the torn line
+    assert LibraryIndex(state_file).get("ddddddddddd", verify=False) == "/plex/d.mp4"
+
+
+def test_journal_folds_into_the_snapshot_past_the_threshold(tmp_path, monkeypatch):
+    monkeypatch.setattr("plex.library.COMPACT_EVERY", 3)
+    state_file = str(tmp_path / "library_index.json")
+    index = LibraryIndex(state_file)
+    for number in range(4):
+        index.record(f"video{number}", f"/plex/{number}.mp4")
+
+    with open(state_file + ".journal", encoding="utf-8") as journal:
+        assert len(journal.readlines()) == 1  # Compacted after the third, then the fourth appended
+    assert len(LibraryIndex(state_file)) == 4
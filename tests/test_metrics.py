@@ -0,0 +1,13 @@
+from utils.metrics import Tracer
+
+
+def test_quantiles_use_a_bounded_window_while_totals_stay_cumulative():
+    tracer = Tracer(quantile_window=3)
+    for seconds in (100, 100, 100, 1, 2, 3):
+        tracer.record("download", start=0, end=seconds)
+
+    stage = tracer.snapshot()["download"]
+    assert stage["count"] == 6
+    assert stage["seconds"] == 306
+    assert stage["p95"] == 3  # The 100 s spans have left the window
+    assert len(tracer._durations["download"]) == 3
@@ -0,0 +1,79 @@
+import struct
+from datetime import datetime
+import pytest
+from plex.mp4meta import DAY_ITEM, MP4_EPOCH, Mp4PatchError, _iter_boxes, patch_upload_date
+
+UPLOAD_DATE = datetime(2021, 6, 15)
+MEDIA = bytes(range(256)) * 64
+
+
+def box(box_type, payload):
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def ftyp():
+    return box(b"ftyp", b"isom" + struct.pack(">I", 512) + b"isomiso2mp41")
+
+
+def moov():
+    return box(b"moov", box(b"mvhd", b"\x00" * 4 + struct.pack(">IIII", 0, 0, 1000, 0) + b"\x00" * 80))
+
+
+def mdat():
+    return box(b"mdat", MEDIA)
+
+
+def top_level(data):
+    return {box_type: (offset, size) for box_type, offset, size, _ in _iter_boxes(data, 0, len(data))}
+
+
+def find(data, path, start=0, end=None):
+    """Payload of the first box along path, e.g. [b"moov", b"mvhd"]."""
+    end = len(data) if end is None else end
+    for box_type, offset, size, header_size in _iter_boxes(data, start, end):
+        if box_type == path[0]:
+            if len(path) == 1:
+                return data[offset + header_size:offset + size]
+            payload_start = offset + header_size + (4 if box_type == b"meta" else 0)
+            return find(data, path[1:], payload_start, offset + size)
+    return None
+
+
+def assert_patched(data, mdat_offset):
+    offset, size = top_level(data)[b"mdat"]
+    assert offset == mdat_offset  # Media never moves, so chunk offsets stay valid
+    assert data[offset + 8:offset + size] == MEDIA
+
+    mvhd = find(data, [b"moov", b"mvhd"])
+    seconds = int((UPLOAD_DATE - MP4_EPOCH).total_seconds())
+    assert struct.unpack_from(">II", mvhd, 4) == (seconds, seconds)
+    day = find(data, [b"moov", b"udta", b"meta", b"ilst", DAY_ITEM, b"data"])
+    assert day[8:] == b"2021-06-15T00:00:00Z"
+
+
+@pytest.mark.parametrize("layout", [
+    [ftyp, mdat, moov],  # moov last, as yt-dlp writes without faststart
+    [ftyp, moov, mdat],  # faststart: the grown moov has to move to the end
+    [ftyp, moov, lambda: box(b"free", b"\x00" * 1024), mdat],  # faststart with padding to grow into
+], ids=["moov-last", "faststart", "faststart-with-free"])
+def test_patch_round_trip_and_idempotency(tmp_path, layout):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"".join(part() for part in layout))
+    mdat_offset = top_level(path.read_bytes())[b"mdat"][0]
+
+    patch_upload_date(str(path), UPLOAD_DATE)
+    once = path.read_bytes()
+    assert_patched(once, mdat_offset)
+
+    patch_upload_date(str(path), UPLOAD_DATE)
+    assert path.read_bytes() == once
+
+
+def test_refuses_a_box_that_runs_to_the_end_of_the_file(tmp_path):
+    path = tmp_path / "video.mp4"
+    original = ftyp() + moov() + struct.pack(">I4s", 0, b"mdat") + MEDIA
+    path.write_bytes(original)
+
+    with pytest.raises(Mp4PatchError):
+        patch_upload_date(str(path), UPLOAD_DATE)
+    assert path.read_bytes() == original
@@ -0,0 +1,29 @@
+import pytest
+from youtube.pacer import Pacer
+
+
+@pytest.fixture
+def pacer(tmp_path):
+    return Pacer(str(tmp_path / "pacer_state.json"))
+
+
+@pytest.mark.parametrize("line", [
+    "ERROR: [youtube] abc: Sign in to confirm you're not a bot",
+    "WARNING: [youtube] HTTP Error 429: Too Many Requests. Retrying (1/10)...",
+    "reply: 'HTTP/1.1 429 Too Many Requests\\r\\n'",
+])
+def test_throttle_signals(pacer, line):
+    tracker = pacer.new_tracker()
+    pacer.observe_line(tracker, line)
+    assert tracker["throttled"]
+
+
+@pytest.mark.parametrize("line", [
+    "[download] Destination: /staging/Chan/Chan - Why I hit the rate limit, try again later.mp4",
+    "[youtube] abc: Downloading webpage",
+    "WARNING: [youtube] Falling back to generic n function search",
+])
+def test_titles_and_regular_output_are_not_throttle_signals(pacer, line):
+    tracker = pacer.new_tracker()
+    pacer.observe_line(tracker, line)
+    assert not tracker["throttled"]
@@ -0,0 +1,43 @@
+import asyncio
+from youtube.pipeline import Pipeline
+
+
+def test_items_a_stage_raises_on_are_handed_to_on_error():
+    finished, failed = [], []
+
+    async def check(item, emit):
+        if item % 2:
+            raise ValueError("odd")
+        await emit(item)
+
+    async def record(item, emit):
+        finished.append(item)
+
+    async def on_error(item):
+        failed.append(item)
+
+    pipeline = Pipeline()
+    pipeline.add_stage("check", check, workers=2, on_error=on_error)
+    pipeline.add_stage("record", record)
+    asyncio.run(pipeline.run(range(6)))
+
+    assert sorted(finished) == [0, 2, 4]
+    assert sorted(failed) == [1, 3, 5]
+
+
+def test_a_failing_on_error_does_not_stop_the_stage():
+    finished = []
+
+    async def check(item, emit):
+        if item == 0:
+            raise ValueError("first")
+        finished.append(item)
+
+    async def on_error(item):
+        raise RuntimeError("cleanup")
+
+    pipeline = Pipeline()
+    pipeline.add_stage("check", check, on_error=on_error)
+    asyncio.run(pipeline.run(range(3)))
+
+    assert finished == [1, 2]
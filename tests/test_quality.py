@@ -0,0 +1,85 @@
+import pytest
+from youtube import quality
+from youtube.quality import DEFAULT_PROFILE, format_selector, profile_for, selection_record
+
+CHANNEL = "https://www.youtube.com/@BenchChannel00"
+FORMATS = [
+    {"format_id": "137", "height": 1080, "vcodec": "avc1.640028", "acodec": "none", "tbr": 4000, "filesize": 400_000_000},
+    {"format_id": "398", "height": 720, "vcodec": "av01.0.05M.08", "acodec": "none", "tbr": 1200, "filesize": 90_000_000},
+    {"format_id": "140", "height": None, "vcodec": "none", "acodec": "mp4a.40.2", "tbr": 128, "filesize": 10_000_000},
+    {"format_id": "251", "height": None, "vcodec": "none", "acodec": "opus", "tbr": 130, "filesize_approx": 9_000_000},
+]
+
+
+@pytest.fixture
+def channel_quality(monkeypatch):
+    """Points the test channel at a quality setting and defines the "small" profile."""
+    monkeypatch.setitem(quality.config, "quality_profiles",
+                        {"small": {"max_height": 720, "codecs": ["av01", "vp09"], "bytes_per_minute": 6_000_000}})
+
+    def select(value):
+        monkeypatch.setitem(quality.config, "channels", [{"url": CHANNEL, "enabled": True, "quality": value}])
+    return select
+
+
+def test_default_profile_keeps_the_old_fixed_selector():
+    assert format_selector(DEFAULT_PROFILE) == "bv*[height<=1080]+ba/b[height<=1080]"
+    assert format_selector(DEFAULT_PROFILE, duration=600) == "bv*[height<=1080]+ba/b[height<=1080]"  # No budget
+
+
+def test_codecs_are_preferred_in_order_before_any_codec():
+    selector = format_selector({**DEFAULT_PROFILE, "max_height": 720, "codecs": ["av01", "vp09"]})
+    assert selector.split("/") == ["bv*[height<=720][vcodec^=av01]+ba", "bv*[height<=720][vcodec^=vp09]+ba",
+                                   "bv*[height<=720]+ba", "b[height<=720]"]
+
+
+def test_budget_leaves_room_for_audio_and_falls_back_without_it():
+    selector = format_selector({**DEFAULT_PROFILE, "bytes_per_minute": 6_000_000}, duration=120)
+    budget = "[filesize<?10000000][filesize_approx<?10000000]"  # (6 MB - 1 MB audio) x 2 minutes
+    assert selector.split("/") == [f"bv*[height<=1080]{budget}+ba", "bv*[height<=1080]+ba", "b[height<=1080]"]
+
+
+def test_budget_needs_a_duration():
+    assert "filesize" not in format_selector({**DEFAULT_PROFILE, "bytes_per_minute": 6_000_000})
+
+
+@pytest.mark.parametrize("max_height, expected", [(None, "bv*+ba/b"), (0, "bv*+ba/b"), (480, "bv*[height<=480]+ba/b[height<=480]")])
+def test_height_cap(max_height, expected):
+    assert format_selector({**DEFAULT_PROFILE, "max_height": max_height}) == expected
+
+
+def test_named_profile_maps_to_its_selector(channel_quality):
+    channel_quality("small")
+    name, profile = profile_for(CHANNEL)
+    assert name == "small"
+    assert profile["max_height"] == 720
+    assert format_selector(profile).startswith("bv*[height<=720][vcodec^=av01]+ba/")
+
+
+def test_inline_profile_fills_in_the_defaults(channel_quality):
+    channel_quality({"codecs": ["vp09"]})
+    assert profile_for(CHANNEL) == ("custom", {**DEFAULT_PROFILE, "codecs": ["vp09"]})
+
+
+def test_unknown_profile_falls_back_to_the_default(channel_quality, caplog):
+    channel_quality("tiny")
+    assert profile_for(CHANNEL) == ("tiny", DEFAULT_PROFILE)
+    assert "Unknown quality profile 'tiny'" in caplog.text
+
+
+def test_unlisted_channel_uses_the_default(channel_quality):
+    channel_quality("small")
+    assert profile_for("https://www.youtube.com/@Elsewhere") == ("default", DEFAULT_PROFILE)
+
+
+def test_selection_record_sums_the_chosen_formats():
+    record = selection_record("small", {"format_id": "398+251", "height": 720, "vcodec": "av01.0.05M.08"}, FORMATS)
+    assert record == {"profile": "small", "format_id": "398+251", "height": 720, "vcodec": "av01.0.05M.08",
+                      "bytes": 99_000_000, "baseline_bytes": 409_000_000}  # Default: 137 + the best audio (251)
+
+
+def test_selection_record_without_formats_uses_the_reported_size():
+    record = selection_record("default", {"format_id": "22", "height": 720, "vcodec": "avc1",
+                                          "filesize_approx": 50_000_000}, None)
+    assert record["bytes"] == 50_000_000
+    assert record["baseline_bytes"] is None
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import pytest
+from utils.watermarks import get_watermark, set_watermark
+from youtube.scanner import ChannelScan, scan_channel
+
+CHANNEL = "https://www.youtube.com/@Chan"
+
+
+def entry(index):
+    video_id = f"vid{index:08d}"
+    return {"id": video_id, "url": f"https://www.youtube.com/watch?v={video_id}", "upload_date": f"2024{index:04d}"}
+
+
+class FakeSupervisor:
+    """Streams a channel listing newest-first (oldest-first with --playlist-reverse), counting what was read."""
+
+    def __init__(self, entries):
+        self.entries = entries  # Newest first, as YouTube lists them
+        self.read = 0
+
+    async def stream(self, command, limited=True, channel=None):
+        for listed in (reversed(self.entries) if "--playlist-reverse" in command else self.entries):
+            self.read += 1
+            yield json.dumps(listed)
+
+
+def scan(watermark_file, entries, is_known=lambda video_id: False, full_scan=False):
+    supervisor = FakeSupervisor(entries)
+    channel_scan = ChannelScan(CHANNEL, watermark_file, lambda video_id: None)
+    emitted = []
+
+    async def emit(item):
+        emitted.append(item[2]["id"])
+
+    asyncio.run(scan_channel(supervisor, channel_scan, "cookies.txt", is_known, emit, full_scan=full_scan))
+    return channel_scan, emitted, supervisor
+
+
+@pytest.fixture
+def watermark_file(tmp_path):
+    return str(tmp_path / "channel_watermarks.json")
+
+
+def test_incremental_scan_stops_at_the_watermark(watermark_file):
+    entries = [entry(index) for index in range(9, -1, -1)]  # vid9 is the newest
+    set_watermark(watermark_file, CHANNEL, {"video_id": entry(6)["id"]})
+
+    channel_scan, emitted, supervisor = scan(watermark_file, entries)
+
+    assert emitted == [entry(7)["id"], entry(8)["id"], entry(9)["id"]]  # Oldest first
+    assert supervisor.read == 4  # Stopped at the watermark entry
+    for _ in emitted:
+        channel_scan.video_done()
+    assert get_watermark(watermark_file, CHANNEL)["video_id"] == entry(9)["id"]
+
+
+def test_failed_video_keeps_the_previous_watermark(watermark_file):
+    entries = [entry(index) for index in range(9, -1, -1)]
+    set_watermark(watermark_file, CHANNEL, {"video_id": entry(6)["id"]})
+
+    channel_scan, emitted, _ = scan(watermark_file, entries)
+    channel_scan.video_done()
+    channel_scan.video_done(ok=False)
+    channel_scan.video_done()
+
+    assert get_watermark(watermark_file, CHANNEL)["video_id"] == entry(6)["id"]
+
+
+def test_watermark_waits_for_every_emitted_video(watermark_file):
+    channel_scan, emitted, _ = scan(watermark_file, [entry(index) for index in range(2, -1, -1)])
+
+    assert emitted == [entry(0)["id"], entry(1)["id"], entry(2)["id"]]  # No watermark yet: full scan
+    channel_scan.video_done()
+    channel_scan.video_done()
+    assert get_watermark(watermark_file, CHANNEL) is None
+    channel_scan.video_done()
+    assert get_watermark(watermark_file, CHANNEL)["video_id"] == entry(2)["id"]
+
+
+def test_known_streak_ends_the_scan_when_the_watermark_video_is_gone(watermark_file):
+    entries = [entry(index) for index in range(40, -1, -1)]
+    set_watermark(watermark_file, CHANNEL, {"video_id": "deleted0000"})
+
+    _, emitted, supervisor = scan(watermark_file, entries, is_known=lambda video_id: video_id != entry(40)["id"])
+
+    assert emitted == [entry(40)["id"]]
+    assert supervisor.read == 11  # One new entry, then KNOWN_STREAK_LIMIT known ones
@@ -0,0 +1,89 @@
+import os
+import pytest
+from utils import transfer
+from utils.transfer import CHECKPOINT_SUFFIX, PARTIAL_SUFFIX, transfer_file
+
+CHUNK = 1024
+
+
+@pytest.fixture
+def cross_device(monkeypatch, tmp_path):
+    """Makes the library folder look like another filesystem, so transfers copy instead of renaming."""
+    library = tmp_path / "library"
+    library.mkdir()
+    real_stat = os.stat
+
+    def stat(path, *args, **kwargs):
+        result = real_stat(path, *args, **kwargs)
+        if os.fspath(path) == str(library):
+            fields = list(result[:10])
+            fields[2] = result.st_dev + 1
+            return os.stat_result(fields)
+        return result
+
+    monkeypatch.setattr(transfer.os, "stat", stat)
+    return library
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(os.urandom(10 * CHUNK + 123))
+    return path
+
+
+def test_copies_across_devices_and_removes_the_source(cross_device, source):
+    data = source.read_bytes()
+    destination = cross_device / "video.mp4"
+
+    transfer_file(str(source), str(destination), chunk_size=CHUNK)
+
+    assert destination.read_bytes() == data
+    assert not source.exists()
+    assert not os.path.exists(str(destination) + PARTIAL_SUFFIX)
+    assert not os.path.exists(str(destination) + CHECKPOINT_SUFFIX)
+
+
+def test_resumes_from_the_checkpoint(cross_device, source):
+    data = source.read_bytes()
+    destination = cross_device / "video.mp4"
+    checkpoint = 4 * CHUNK
+    # Bytes before the checkpoint are kept as they are (zeros here, so a re-copy would show); the torn tail after it
+    # is dropped and copied again
+    (cross_device / ("video.mp4" + PARTIAL_SUFFIX)).write_bytes(bytes(checkpoint) + b"torn tail")
+    (cross_device / ("video.mp4" + CHECKPOINT_SUFFIX)).write_text(str(checkpoint))
+
+    transfer_file(str(source), str(destination), chunk_size=CHUNK)
+
+    copied = destination.read_bytes()
+    assert copied[:checkpoint] == bytes(checkpoint)
+    assert copied[checkpoint:] == data[checkpoint:]
+    assert not os.path.exists(str(destination) + CHECKPOINT_SUFFIX)
+
+
+def test_checkpoint_past_the_source_restarts_the_copy(cross_device, source):
+    data = source.read_bytes()
+    destination = cross_device / "video.mp4"
+    (cross_device / ("video.mp4" + PARTIAL_SUFFIX)).write_bytes(b"from an older, larger source")
+    (cross_device / ("video.mp4" + CHECKPOINT_SUFFIX)).write_text(str(len(data) + 1))
+
+    transfer_file(str(source), str(destination), chunk_size=CHUNK)
+
+    assert destination.read_bytes() == data
+
+
+def test_size_mismatch_keeps_the_source(cross_device, source, monkeypatch):
+    destination = cross_device / "video.mp4"
+    real_copy_range = transfer._copy_range
+
+    def truncating_copy_range(src_fd, dst_fd, offset, count):
+        copied = real_copy_range(src_fd, dst_fd, offset, count)
+        os.ftruncate(dst_fd, max(offset + copied - 1, 0))  # The destination loses a byte behind the copy's back
+        return copied
+
+    monkeypatch.setattr(transfer, "_copy_range", truncating_copy_range)
+    with pytest.raises(OSError, match="Size mismatch"):
+        transfer_file(str(source), str(destination), chunk_size=CHUNK)
+
+    assert source.exists()
+    assert not destination.exists()
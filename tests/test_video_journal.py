@@ -0,0 +1,69 @@
+import json
+import pytest
+from utils.video_journal import VideoJournal
+
+ENTRY = {"id": "a", "title": "A", "url": "https://www.youtube.com/watch?v=a"}
+
+
+@pytest.fixture
+def journal_file(tmp_path):
+    return str(tmp_path / "video_journal.jsonl")
+
+
+def lines(journal_file):
+    with open(journal_file, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_replay_merges_each_videos_steps(journal_file):
+    journal = VideoJournal(journal_file)
+    journal.advance("a", "discovered", channel="@Chan", url=ENTRY["url"])
+    journal.advance("a", "downloaded", entry=ENTRY)
+    journal.advance("b", "discovered", channel="@Chan")
+    journal.advance("b", "dropped")
+
+    [record] = VideoJournal(journal_file).unfinished()
+    assert record["id"] == "a"
+    assert record["state"] == "downloaded"
+    assert record["channel"] == "@Chan"  # Learned at an earlier step
+    assert record["entry"] == ENTRY
+
+
+def test_replay_ignores_a_partial_last_line(journal_file):
+    journal = VideoJournal(journal_file)
+    journal.advance("a", "downloaded", channel="@Chan", entry=ENTRY)
+    with open(journal_file, "a", encoding="utf-8") as f:
+        f.write('{"id": "a", "state": "mov')  # Torn by a crash
+
+    [record] = VideoJournal(journal_file).unfinished()
+    assert record["state"] == "downloaded"
+
+
+def test_startup_compacts_to_the_unfinished_videos(journal_file):
+    journal = VideoJournal(journal_file)
+    journal.advance("a", "downloaded", channel="@Chan", entry=ENTRY)
+    journal.advance("a", "moved")
+    journal.advance("b", "discovered", channel="@Chan")
+    journal.advance("b", "metadata")
+    with open(journal_file, "a", encoding="utf-8") as f:
+        f.write('{"id": "c", "sta')
+
+    VideoJournal(journal_file)
+
+    [record] = lines(journal_file)  # One merged line per unfinished video, the torn line gone
+    assert record["id"] == "b"
+    assert record["state"] == "metadata"
+    assert record["channel"] == "@Chan"
+
+
+def test_journal_compacts_itself_past_the_threshold(journal_file, monkeypatch):
+    monkeypatch.setattr("utils.video_journal.COMPACT_EVERY", 4)
+    journal = VideoJournal(journal_file)
+    for video_id in ("a", "b"):
+        journal.advance(video_id, "discovered")
+        journal.advance(video_id, "dropped")
+    assert lines(journal_file) == []  # Compacted on the fourth append, nothing left unfinished
+
+    journal.advance("c", "discovered")
+    assert [record["id"] for record in lines(journal_file)] == ["c"]
+    assert [record["id"] for record in VideoJournal(journal_file).unfinished()] == ["c"]
@@ -0,0 +1,92 @@
+import logging
+import os
+import threading
+
+archive_lock = threading.Lock()  # Shared by download workers reading/updating the index
+
+# In-memory index of yt-dlp's download archive, keyed by (extractor, video_id)
+_archive_index = set()
+_archive_state = {"path": None, "inode": None, "offset": 0, "mtime": None}
+
+
+def _reset_index(archive_file):
+    _archive_index.clear()
+    _archive_state.update({"path": archive_file, "inode": None, "offset": 0, "mtime": None})
+
+
+def _parse_archive_line(line):
+    """Archive lines look like 'youtube dQw4w9WgXcQ'. Returns (extractor, id) or None."""
+    parts = line.strip().split(maxsplit=1)
+    if len(parts) != 2:
+        return None
+    return parts[0].lower(), parts[1].strip()
+
+
+def _refresh_index(archive_file):
+    """Reads only the bytes appended to the archive since the last refresh."""
+    if _archive_state["path"] != archive_file:
+        _reset_index(archive_file)
+
+    try:
+        stat = os.stat(archive_file)
+    except FileNotFoundError:
+        if _archive_state["inode"] is not None:
+            _reset_index(archive_file)  # Archive was removed, forget what we knew
+        return
+
+    # ✅ Archive was replaced or truncated: rebuild from scratch
+    if stat.st_ino != _archive_state["inode"] or stat.st_size < _archive_state["offset"]:
+        _reset_index(archive_file)
+        _archive_state["inode"] = stat.st_ino
+
+    # ✅ Nothing changed since the last look, skip the read entirely
+    if stat.st_size == _archive_state["offset"] and stat.st_mtime == _archive_state["mtime"]:
+        return
+
+    with open(archive_file, "rb") as f:
+        f.seek(_archive_state["offset"])
+        chunk = f.read()
+
+    # Only consume complete lines; a partial tail is picked up on the next refresh
+    complete = chunk[:chunk.rfind(b"\n") + 1]
+    for raw_line in complete.splitlines():
+        entry = _parse_archive_line(raw_line.decode("utf-8", errors="ignore"))
+        if entry:
+            _archive_index.add(entry)
+
+    _archive_state["offset"] += len(complete)
+    _archive_state["mtime"] = stat.st_mtime
+    logging.debug(f"DEBUG: Archive index holds {len(_archive_index)} entries from {archive_file}")
+
+
+def is_archived(archive_file, video_id, extractor="youtube"):
+    """Returns True if (extractor, video_id) is recorded in the download archive."""
+    with archive_lock:
+        _refresh_index(archive_file)
+        return (extractor.lower(), video_id) in _archive_index
+
+
+def mark_archived(archive_file, video_id, extractor="youtube"):
+    """Records a finished download in memory; yt-dlp itself appends the line to the archive file."""
+    with archive_lock:
+        if _archive_state["path"] != archive_file:
+            _refresh_index(archive_file)
+        _archive_index.add((extractor.lower(), video_id))
+
+
+def archived_ids(archive_file, extractor="youtube"):
+    """Returns a snapshot of every video ID the archive holds for one extractor."""
+    extractor = extractor.lower()
+    with archive_lock:
+        _refresh_index(archive_file)
+        return {video_id for entry_extractor, video_id in _archive_index if entry_extractor == extractor}
+
+
+def append_archived(archive_file, video_ids, extractor="youtube"):
+    """Appends downloads finished elsewhere (another host) to the archive, as yt-dlp would have."""
+    if not video_ids:
+        return
+    with archive_lock:
+        with open(archive_file, "a", encoding="utf-8") as f:
+            f.writelines(f"{extractor.lower()} {video_id}\n" for video_id in video_ids)
+    # The index picks the new lines up on its next incremental refresh
@@ -5,9 +5,20 @@ import threading
 
 cache_lock = threading.Lock()  # Prevent multiple processes from corrupting the cache
 
+# video_cache.json is the compacted snapshot; new entries are appended to a JSONL journal next to it
+JOURNAL_SUFFIX = ".journal"
+COMPACT_EVERY = 500  # Fold the journal into the snapshot after this many appended records
 
-def load_cache(cache_file):
-    """Loads the cache from file, handling JSON errors and empty files gracefully."""
+_persisted_urls = {}  # cache_file -> {channel: set(urls)} already on disk
+_journal_counts = {}  # cache_file -> number of records in the journal
+
+
+def _journal_path(cache_file):
+    return cache_file + JOURNAL_SUFFIX
+
+
+def _read_snapshot(cache_file):
+    """Loads the compacted snapshot, handling JSON errors and empty files gracefully."""
     try:
         if os.path.exists(cache_file) and os.path.getsize(cache_file) == 0:
             return {}  # Avoid JSON errors for empty files
@@ -17,27 +28,127 @@ def load_cache(cache_file):
         return {}
 
 
+def _replay_journal(cache_file, cache):
+    """Applies journal records on top of the snapshot. Later records for a URL update the earlier entry."""
+    entries_by_url = {
+        channel: {video["url"]: video for video in videos}
+        for channel, videos in cache.items()
+    }
+    count = 0
+
+    try:
+        with open(_journal_path(cache_file), "r", encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    record = json.loads(line)
+                    channel, video = record["channel"], record["video"]
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    continue  # ✅ A torn final line from a crash is simply ignored
+                count += 1
+
+                channel_entries = entries_by_url.setdefault(channel, {})
+                if video["url"] in channel_entries:
+                    channel_entries[video["url"]].update(video)
+                else:
+                    channel_entries[video["url"]] = video
+                    cache.setdefault(channel, []).append(video)
+    except FileNotFoundError:
+        pass
+
+    return count
+
+
+def _load_locked(cache_file):
+    cache = _read_snapshot(cache_file)
+    _journal_counts[cache_file] = _replay_journal(cache_file, cache)
+    _persisted_urls[cache_file] = {
+        channel: {video["url"] for video in videos}
+        for channel, videos in cache.items()
+    }
+    return cache
+
+
+def _append_records(cache_file, records):
+    """Appends records to the journal and fsyncs so a crash never loses an acknowledged entry."""
+    with open(_journal_path(cache_file), "a", encoding="utf-8") as journal:
+        for channel, video in records:
+            journal.write(json.dumps({"channel": channel, "video": video}, ensure_ascii=False) + "\n")
+        journal.flush()
+        os.fsync(journal.fileno())
+
+    _journal_counts[cache_file] = _journal_counts.get(cache_file, 0) + len(records)
+    if _journal_counts[cache_file] >= COMPACT_EVERY:
+        _compact_locked(cache_file)
+
+
+def _compact_locked(cache_file):
+    """Atomically rewrites the snapshot from snapshot + journal, then truncates the journal."""
+    cache = _read_snapshot(cache_file)
+    _replay_journal(cache_file, cache)
+
+    temp_file = cache_file + ".tmp"
+    with open(temp_file, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_file, cache_file)
+
+    # Replaying the journal again after a crash here is harmless: records are keyed by URL
+    open(_journal_path(cache_file), "w").close()
+    _journal_counts[cache_file] = 0
+    logging.info(f"🗜 Compacted metadata cache: {cache_file}")
+
+
+def load_cache(cache_file):
+    """Loads the cache from the snapshot plus any journaled entries."""
+    with cache_lock:
+        return _load_locked(cache_file)
+
+
 def save_cache(cache, cache_file, finalize=True):
-    """Saves the cache incrementally to prevent loss of metadata."""
+    """Saves the cache incrementally by journaling only entries that aren't on disk yet."""
     with cache_lock:
         try:
-            # Load existing cache to avoid overwriting old data
-            existing_cache = load_cache(cache_file)
+            if cache_file not in _persisted_urls:
+                _load_locked(cache_file)
+            persisted = _persisted_urls[cache_file]
 
-            # Merge new data with the existing cache
+            new_records = []
             for channel, videos in cache.items():
-                if channel not in existing_cache:
-                    existing_cache[channel] = []
+                channel_urls = persisted.setdefault(channel, set())
                 for video in videos:
-                    if video["url"] not in [v["url"] for v in existing_cache[channel]]:
-                        existing_cache[channel].append(video)
+                    if video["url"] not in channel_urls:
+                        channel_urls.add(video["url"])
+                        new_records.append((channel, video))
 
-            # Write updated cache back to file
-            with open(cache_file, "w", encoding="utf-8") as f:
-                json.dump(existing_cache, f, indent=4)
+            if new_records:
+                _append_records(cache_file, new_records)
 
             if finalize:
                 logging.info("✅ Metadata cache successfully updated.")
 
         except Exception as e:
             logging.error(f"⚠ Failed to save cache: {str(e)}")
+
+
+def update_cache_entry(channel, video, cache_file):
+    """Journals a single new or changed entry without touching the rest of the cache."""
+    with cache_lock:
+        try:
+            if cache_file not in _persisted_urls:
+                _load_locked(cache_file)
+            _persisted_urls[cache_file].setdefault(channel, set()).add(video["url"])
+            _append_records(cache_file, [(channel, video)])
+        except Exception as e:
+            logging.error(f"⚠ Failed to save cache entry {video.get('url')}: {str(e)}")
+
+
+def compact_cache(cache_file):
+    """Folds the journal into video_cache.json (e.g. at the end of a run)."""
+    with cache_lock:
+        try:
+            journal_file = _journal_path(cache_file)
+            if os.path.exists(journal_file) and os.path.getsize(journal_file) > 0:
+                _compact_locked(cache_file)
+        except Exception as e:
+            logging.error(f"⚠ Failed to compact cache: {str(e)}")
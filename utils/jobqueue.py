@@ -0,0 +1,192 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from config.loader import get_config
+
+config = get_config()
+
+LOCAL_BROKER = ":memory:"  # No shared database configured: leases only dedupe work inside this process
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    channel TEXT,
+    state TEXT NOT NULL,
+    owner TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated REAL NOT NULL,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_by_state ON jobs (state, updated);
+"""
+
+
+def channel_key(channel_url):
+    return f"channel:{channel_url}"
+
+
+class JobQueue:
+    """Leased channel/video jobs in SQLite, shared by every host pointed at the same database file.
+
+    A job is claimed with a lease that the holder renews while it works; a host that dies simply stops
+    renewing, and the job becomes claimable again once its lease expires. Finished videos stay "done"
+    with their cache entry attached, so other hosts can import them into their own archive and cache.
+    Channel jobs go back to "pending" after each scan; their lease only keeps two hosts from scanning
+    the same channel at once.
+    """
+
+    def __init__(self, database=LOCAL_BROKER, worker_id=None, lease_seconds=300, heartbeat_seconds=None):
+        self.database = database
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds or max(1, lease_seconds / 3)
+        self.synced_until = 0.0  # updated time of the newest foreign result imported so far
+        self._held = {}  # key -> (kind, heartbeat task)
+        self._lock = threading.Lock()
+
+        if database != LOCAL_BROKER:
+            os.makedirs(os.path.dirname(os.path.abspath(database)), exist_ok=True)
+        # Autocommit: every statement is its own transaction, so no lock is held between calls.
+        # The default rollback journal (not WAL) is used because WAL doesn't work on network filesystems.
+        self._connection = sqlite3.connect(database, timeout=30, isolation_level=None, check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+
+    @classmethod
+    def from_config(cls, config):
+        options = config.get("queue", {})
+        return cls(
+            database=options.get("database") or LOCAL_BROKER,
+            worker_id=options.get("worker_id"),
+            lease_seconds=options.get("lease_seconds", 300),
+            heartbeat_seconds=options.get("heartbeat_seconds"),
+        )
+
+    @property
+    def shared(self):
+        return self.database != LOCAL_BROKER
+
+    def _execute(self, sql, parameters=()):
+        with self._lock:
+            return self._connection.execute(sql, parameters)
+
+    def claim(self, key, kind="video", channel=None):
+        """Takes the lease on a job unless it's done or another worker holds a live lease. Returns True if claimed."""
+        now = time.time()
+        cursor = self._execute(
+            """
+            INSERT INTO jobs (key, kind, channel, state, owner, lease_until, updated)
+            VALUES (?, ?, ?, 'leased', ?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET
+                state = 'leased', owner = excluded.owner, lease_until = excluded.lease_until,
+                updated = excluded.updated,
+                attempts = jobs.attempts + (jobs.state = 'leased' AND jobs.owner != excluded.owner)
+            WHERE jobs.state != 'done'
+              AND (jobs.state != 'leased' OR jobs.owner = excluded.owner OR jobs.lease_until <= ?)
+            """,
+            (key, kind, channel, self.worker_id, now + self.lease_seconds, now, now),
+        )
+        return cursor.rowcount == 1
+
+    def renew(self, key):
+        """Extends a held lease. Returns False if the lease was lost (it expired and someone else took it)."""
+        now = time.time()
+        cursor = self._execute(
+            "UPDATE jobs SET lease_until = ?, updated = ? WHERE key = ? AND owner = ? AND state = 'leased'",
+            (now + self.lease_seconds, now, key, self.worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, key, result=None):
+        """Marks a video done for every host, publishing its cache entry."""
+        self._execute(
+            "UPDATE jobs SET state = 'done', owner = ?, lease_until = NULL, updated = ?, result = ? WHERE key = ?",
+            (self.worker_id, time.time(), json.dumps(result, ensure_ascii=False) if result else None, key),
+        )
+
+    def release(self, key, failed=False):
+        """Gives a job back so any worker can claim it again."""
+        self._execute(
+            """
+            UPDATE jobs SET state = 'pending', owner = NULL, lease_until = NULL, updated = ?,
+                attempts = attempts + ?
+            WHERE key = ? AND owner = ? AND state = 'leased'
+            """,
+            (time.time(), int(failed), key, self.worker_id),
+        )
+
+    def reclaim_expired(self):
+        """Returns jobs whose holder stopped renewing (crashed or hung host) to the pending state."""
+        cursor = self._execute(
+            """
+            UPDATE jobs SET state = 'pending', owner = NULL, lease_until = NULL, attempts = attempts + 1,
+                updated = ?
+            WHERE state = 'leased' AND lease_until <= ?
+            """,
+            (time.time(), time.time()),
+        )
+        return cursor.rowcount
+
+    def results_since(self, since):
+        """Videos other workers finished after since, as (channel, video ID, cache entry or None, updated)."""
+        rows = self._execute(
+            """
+            SELECT channel, key, result, updated FROM jobs
+            WHERE kind = 'video' AND state = 'done' AND owner != ? AND updated > ?
+            ORDER BY updated
+            """,
+            (self.worker_id, since),
+        ).fetchall()
+        return [(channel, key, json.loads(result) if result else None, updated)
+                for channel, key, result, updated in rows]
+
+    async def _heartbeat(self, key):
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            if not await asyncio.to_thread(self.renew, key):
+                logging.warning(f"⚠️ Lost the lease on {key}, another worker may pick it up")
+                return
+
+    async def acquire(self, key, kind="video", channel=None):
+        """Claims a job and keeps renewing its lease in the background until finish(). Returns True if claimed."""
+        if key in self._held:
+            return False  # Already being worked on in this process (the database can't tell us apart)
+        self._held[key] = (kind, None)
+        if not await asyncio.to_thread(self.claim, key, kind, channel):
+            del self._held[key]
+            return False
+        self._held[key] = (kind, asyncio.create_task(self._heartbeat(key)))
+        return True
+
+    async def finish(self, key, ok=True, result=None, done=True):
+        """Stops the heartbeat; a finished video becomes done, anything else goes back to pending.
+
+        done=False hands a video back without counting a failed attempt (handled here, but not downloaded).
+        """
+        held = self._held.pop(key, None)
+        if held is None:
+            return
+        kind, heartbeat = held
+        if heartbeat:
+            heartbeat.cancel()
+        if kind == "video" and ok and done:
+            await asyncio.to_thread(self.complete, key, result)
+        else:
+            await asyncio.to_thread(self.release, key, not ok)
+
+    async def release_held(self):
+        """Hands back every lease this process still holds (interrupted run), without counting a failed attempt."""
+        for key in list(self._held):
+            _, heartbeat = self._held.pop(key)
+            if heartbeat:
+                heartbeat.cancel()
+            await asyncio.to_thread(self.release, key)
+
+
+job_queue = JobQueue.from_config(config)  # Shared by every pipeline stage
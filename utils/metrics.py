@@ -0,0 +1,212 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from config.loader import get_config
+
+config = get_config()
+
+QUANTILES = (0.5, 0.95)
+METRIC_PREFIX = "youtube_plex"
+
+
+def _quantile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+class Tracer:
+    """Per-video, per-stage timing spans: appended to a JSONL trace and aggregated for Prometheus and a summary.
+
+    Stages used by the pipeline: pacing, metadata, download (whole yt-dlp run), transfer (bytes flowing),
+    pp:<postprocessor> (SponsorBlock cut, thumbnail embed, ...), move, stamp and video (end to end).
+    """
+
+    def __init__(self, trace_file=None, prometheus_file=None, quantile_window=1024):
+        self.trace_file = trace_file
+        self.prometheus_file = prometheus_file
+        self.quantile_window = quantile_window
+        self._lock = threading.Lock()
+        self._open = {}  # (key, stage) -> start time, for spans that begin and end in different places
+        self._durations = {}  # stage -> seconds of the latest quantile_window spans (p50/p95 only)
+        self._counts = {}  # stage -> spans recorded, all time
+        self._seconds = {}  # stage -> total seconds, all time
+        self._bytes = {}  # stage -> bytes moved
+        self._outcomes = {}  # (stage, outcome) -> count
+        self._queue_depths = {}
+        self._trace = self._trace_writer(trace_file) if trace_file else None
+
+    @staticmethod
+    def _trace_writer(trace_file):
+        """A logger whose records a listener thread appends to the trace file, off the event loop."""
+        handler = logging.FileHandler(trace_file, encoding="utf-8", delay=True)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        trace_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(trace_queue, handler)
+        listener.start()
+        atexit.register(listener.stop)  # Flushes whatever is still queued
+
+        trace = logging.Logger(f"trace:{trace_file}")  # Not registered: never reaches the root handlers
+        trace.addHandler(logging.handlers.QueueHandler(trace_queue))
+        return trace
+
+    @classmethod
+    def from_config(cls, config):
+        options = config.get("metrics", {})
+        state_directory = os.path.dirname(config["cache_file"])
+        return cls(
+            trace_file=options.get("trace_file", os.path.join(state_directory, "pipeline_trace.jsonl")),
+            prometheus_file=options.get("prometheus_file", os.path.join(state_directory, "youtube_plex.prom")),
+            quantile_window=options.get("quantile_window", 1024),
+        )
+
+    def record(self, stage, video=None, start=None, end=None, bytes_moved=0, outcome="ok"):
+        """Records one finished span. start/end are time.time() values."""
+        end = end if end is not None else time.time()
+        start = start if start is not None else end
+        duration = max(0.0, end - start)
+        span = {"stage": stage, "video": video, "start": round(start, 3), "end": round(end, 3),
+                "duration": round(duration, 3), "bytes": bytes_moved, "outcome": outcome}
+
+        with self._lock:
+            if stage not in self._durations:
+                self._durations[stage] = deque(maxlen=self.quantile_window)  # ✅ Bounded in daemon mode
+            self._durations[stage].append(duration)
+            self._counts[stage] = self._counts.get(stage, 0) + 1
+            self._seconds[stage] = self._seconds.get(stage, 0.0) + duration
+            self._bytes[stage] = self._bytes.get(stage, 0) + (bytes_moved or 0)
+            self._outcomes[(stage, outcome)] = self._outcomes.get((stage, outcome), 0) + 1
+        if self._trace:
+            self._trace.info(json.dumps(span))  # Queued; the listener thread does the file write
+
+    @contextmanager
+    def span(self, stage, video=None):
+        """Times a block. Set span["bytes"] / span["outcome"] inside it; an exception records "failed"."""
+        details = {"bytes": 0, "outcome": "ok"}
+        start = time.time()
+        try:
+            yield details
+        except BaseException:
+            details["outcome"] = "failed"
+            raise
+        finally:
+            self.record(stage, video, start, time.time(), details["bytes"], details["outcome"])
+
+    def begin(self, key, stage):
+        """Starts a span that another function will end (e.g. a video's end-to-end time across stages)."""
+        with self._lock:
+            self._open.setdefault((key, stage), time.time())
+
+    def end(self, key, stage, outcome="ok", bytes_moved=0):
+        with self._lock:
+            start = self._open.pop((key, stage), None)
+        if start is not None:
+            self.record(stage, key, start, time.time(), bytes_moved, outcome)
+
+    def discard(self, key, prefix=""):
+        """Drops key's open spans whose stage starts with prefix, when they will never end (e.g. a cancelled run)."""
+        with self._lock:
+            for open_key in [k for k in self._open if k[0] == key and k[1].startswith(prefix)]:
+                del self._open[open_key]
+
+    def set_queue_depths(self, depths):
+        with self._lock:
+            self._queue_depths = dict(depths)
+
+    def snapshot(self):
+        """Per-stage aggregates: count, outcomes, total seconds, bytes and throughput since start, and
+        p50/p95 over the latest quantile_window spans."""
+        with self._lock:
+            durations = {stage: sorted(values) for stage, values in self._durations.items()}
+            counts = dict(self._counts)
+            seconds = dict(self._seconds)
+            outcomes = dict(self._outcomes)
+            moved = dict(self._bytes)
+        stages = {}
+        for stage, values in durations.items():
+            total = seconds[stage]
+            stages[stage] = {
+                "count": counts[stage],
+                "outcomes": {outcome: count for (name, outcome), count in outcomes.items() if name == stage},
+                "p50": _quantile(values, 0.5),
+                "p95": _quantile(values, 0.95),
+                "seconds": total,
+                "bytes": moved.get(stage, 0),
+                "bytes_per_second": moved.get(stage, 0) / total if total else 0.0,
+            }
+        return stages
+
+    def write_prometheus(self):
+        """Writes the textfile-collector file atomically (node_exporter may read it at any time)."""
+        if not self.prometheus_file:
+            return
+        stages = self.snapshot()
+        with self._lock:
+            depths = dict(self._queue_depths)
+
+        lines = [
+            f"# HELP {METRIC_PREFIX}_stage_duration_seconds Time spent per video in each pipeline stage.",
+            f"# TYPE {METRIC_PREFIX}_stage_duration_seconds summary",
+        ]
+        for stage, data in stages.items():
+            for q in QUANTILES:
+                lines.append(f'{METRIC_PREFIX}_stage_duration_seconds{{stage="{_label(stage)}",quantile="{q}"}} '
+                             f'{data["p50"] if q == 0.5 else data["p95"]:.3f}')
+            lines.append(f'{METRIC_PREFIX}_stage_duration_seconds_sum{{stage="{_label(stage)}"}} {data["seconds"]:.3f}')
+            lines.append(f'{METRIC_PREFIX}_stage_duration_seconds_count{{stage="{_label(stage)}"}} {data["count"]}')
+
+        lines += [f"# HELP {METRIC_PREFIX}_stage_outcomes_total Spans per stage by outcome.",
+                  f"# TYPE {METRIC_PREFIX}_stage_outcomes_total counter"]
+        for stage, data in stages.items():
+            for outcome, count in data["outcomes"].items():
+                lines.append(f'{METRIC_PREFIX}_stage_outcomes_total{{stage="{_label(stage)}",'
+                             f'outcome="{_label(outcome)}"}} {count}')
+
+        lines += [f"# HELP {METRIC_PREFIX}_stage_bytes_total Bytes moved per stage.",
+                  f"# TYPE {METRIC_PREFIX}_stage_bytes_total counter"]
+        lines += [f'{METRIC_PREFIX}_stage_bytes_total{{stage="{_label(stage)}"}} {data["bytes"]}'
+                  for stage, data in stages.items() if data["bytes"]]
+
+        lines += [f"# HELP {METRIC_PREFIX}_throughput_bytes_per_second Bytes per second of stage time.",
+                  f"# TYPE {METRIC_PREFIX}_throughput_bytes_per_second gauge"]
+        lines += [f'{METRIC_PREFIX}_throughput_bytes_per_second{{stage="{_label(stage)}"}} '
+                  f'{data["bytes_per_second"]:.1f}' for stage, data in stages.items() if data["bytes"]]
+
+        lines += [f"# HELP {METRIC_PREFIX}_queue_depth Items waiting in front of each pipeline stage.",
+                  f"# TYPE {METRIC_PREFIX}_queue_depth gauge"]
+        lines += [f'{METRIC_PREFIX}_queue_depth{{stage="{_label(stage)}"}} {depth}' for stage, depth in depths.items()]
+
+        try:
+            temp_file = self.prometheus_file + ".tmp"
+            with open(temp_file, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            os.replace(temp_file, self.prometheus_file)
+        except OSError as e:
+            logging.error(f"⚠ Failed to write metrics file: {e}")
+
+    def summary_table(self):
+        """Plain-text table of the run's stages for the end-of-run log."""
+        rows = [("stage", "count", "ok", "failed", "skipped", "p50 s", "p95 s", "total s", "MB", "MB/s")]
+        for stage, data in sorted(self.snapshot().items(), key=lambda item: -item[1]["seconds"]):
+            rows.append((
+                stage, str(data["count"]), str(data["outcomes"].get("ok", 0)), str(data["outcomes"].get("failed", 0)),
+                str(data["outcomes"].get("skipped", 0)),
+                f'{data["p50"]:.2f}', f'{data["p95"]:.2f}', f'{data["seconds"]:.1f}',
+                f'{data["bytes"] / 1024 ** 2:.1f}', f'{data["bytes_per_second"] / 1024 ** 2:.2f}',
+            ))
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in rows)
+
+
+tracer = Tracer.from_config(config)  # Shared by every pipeline stage
@@ -1,75 +1,179 @@
 import os
+import json
+import time
 import logging
 import subprocess
-import shutil
-from config.loader import load_config
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from config.loader import get_config
+from youtube.engine import capture_yt_dlp
+from utils.transfer import transfer_file
 
-config = load_config()
+config = get_config()
 
 STAGING_DIRECTORY = config["staging_directory"]
 PLEX_DIRECTORY = config["plex_directory"]
-
-def download_channel_thumbnail(channel_url: str, uploader: str):
-    logging.info(f"🔍 Checking channel thumbnail for {uploader}...")
-
-    uploader = str(uploader)
-
-    plex_folder = os.path.join(str(PLEX_DIRECTORY), uploader)
-    plex_thumbnail_path = os.path.join(plex_folder, "folder.jpg")
-
-    if os.path.exists(plex_thumbnail_path):
-        logging.info(f"✅ Thumbnail already exists: {plex_thumbnail_path}")
+CHANNEL_METADATA = config.get("channel_metadata", {})
+CHANNEL_CACHE_FILE = CHANNEL_METADATA.get(
+    "state_file", os.path.join(os.path.dirname(config["cache_file"]), "channel_metadata.json"))
+CHANNEL_TTL = CHANNEL_METADATA.get("ttl_hours", 168) * 3600  # Re-check channel info/art weekly by default
+ART_WORKERS = CHANNEL_METADATA.get("art_workers", 4)
+ART_TIMEOUT = 30  # Seconds per artwork request
+
+def _pick_thumbnail(thumbnails, kind):
+    """Finds the channel avatar or banner in a channel's thumbnail list (uncropped preferred)."""
+    candidates = [t for t in thumbnails or [] if kind in str(t.get("id", "")) and t.get("url")]
+    for thumbnail in candidates:
+        if thumbnail.get("id") == f"{kind}_uncropped":
+            return thumbnail["url"]
+    return candidates[-1]["url"] if candidates else None
+
+
+def channel_record(info):
+    """Keeps the fields the channel cache stores from a channel's -J info dict."""
+    return {
+        "channel_id": info.get("channel_id") or info.get("id"),
+        "name": info.get("channel") or info.get("uploader") or info.get("title"),
+        "avatar_url": _pick_thumbnail(info.get("thumbnails"), "avatar"),
+        "banner_url": _pick_thumbnail(info.get("thumbnails"), "banner"),
+        "fetched_at": int(time.time()),
+    }
+
+
+class ChannelMetadataCache:
+    """Channel ID, display name and art URLs per channel URL, re-fetched only once their TTL runs out."""
+
+    def __init__(self, state_file, ttl=CHANNEL_TTL):
+        self.state_file = state_file
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        try:
+            with open(state_file, "r", encoding="utf-8") as f:
+                self._channels = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._channels = {}
+
+    def get(self, channel_url):
+        with self._lock:
+            return self._channels.get(channel_url)
+
+    def is_fresh(self, channel_url):
+        record = self.get(channel_url)
+        return bool(record) and time.time() - record["fetched_at"] < record.get("ttl", self.ttl)
+
+    def update(self, channel_url, record):
+        with self._lock:
+            previous = self._channels.get(channel_url, {})
+            record = {**record, "ttl": self.ttl, "art_fetched": previous.get("art_fetched")}
+            self._channels[channel_url] = record
+        return record
+
+    def mark_art_fetched(self, channel_url, art_url):
+        with self._lock:
+            self._channels[channel_url]["art_fetched"] = art_url
+
+    def save(self):
+        with self._lock:
+            try:
+                temp_file = self.state_file + ".tmp"
+                with open(temp_file, "w", encoding="utf-8") as f:
+                    json.dump(self._channels, f, indent=4)
+                os.replace(temp_file, self.state_file)
+            except OSError as e:
+                logging.error(f"⚠️ Failed to save channel metadata: {e}")
+
+
+channel_cache = ChannelMetadataCache(CHANNEL_CACHE_FILE)
+
+
+def fetch_channel_info(channel_urls):
+    """One lightweight extraction for all given channels: channel-level info only, no video entries."""
+    command = ["yt-dlp", "--flat-playlist", "--playlist-items", "0", "--ignore-errors", "-J", *channel_urls]
+    returncode, lines = capture_yt_dlp(command, config)
+
+    infos = {}
+    for line in lines:
+        try:
+            info = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(info, dict):
+            infos[info.get("original_url") or info.get("webpage_url")] = info
+    if returncode != 0:
+        logging.warning(f"⚠️ yt-dlp reported errors for {len(channel_urls) - len(infos)} channel(s)")
+    return infos
+
+
+def _download_art(art_url, staging_path):
+    """Fetches one artwork file into staging, converting it to JPEG with FFmpeg if needed."""
+    with urllib.request.urlopen(art_url, timeout=ART_TIMEOUT) as response:
+        data = response.read()
+
+    if data[:3] == b"\xff\xd8\xff":  # Already a JPEG
+        with open(staging_path, "wb") as f:
+            f.write(data)
         return
 
+    raw_path = staging_path + ".src"
+    with open(raw_path, "wb") as f:
+        f.write(data)
     try:
-        result = subprocess.run(
-            ["yt-dlp", "--flat-playlist", "--print", "%(url)s", channel_url],
-            capture_output=True, text=True, check=True
-        )
-        video_urls = result.stdout.splitlines()
-        if not video_urls:
-            raise ValueError("No videos found on the channel.")
+        subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-i", raw_path, staging_path], check=True)
+    finally:
+        os.remove(raw_path)
 
-        latest_video_url = video_urls[0]
 
-        result = subprocess.run(
-            ["yt-dlp", "--print", "%(uploader)s", latest_video_url],
-            capture_output=True, text=True, check=True
-        )
-        channel_name = result.stdout.strip() or uploader
-        logging.info(f"✅ Extracted channel name: {channel_name}")
+def refresh_folder_art(channel_url, record, force=False):
+    """Writes the channel avatar as folder.jpg in its Plex folder if it's missing or the art has changed."""
+    channel_name = str(record.get("name") or "UnknownUploader")
+    art_url = record.get("avatar_url")
+    plex_thumbnail_path = os.path.join(PLEX_DIRECTORY, channel_name, "folder.jpg")
 
-    except (subprocess.CalledProcessError, ValueError) as e:
-        logging.error(f"⚠️ Error extracting channel name: {e}")
-        channel_name = uploader
-
-    channel_name = str(channel_name)
+    if not art_url:
+        logging.warning(f"⚠️ No channel art found for {channel_name}")
+        return False
+    if not force and record.get("art_fetched") == art_url and os.path.exists(plex_thumbnail_path):
+        logging.info(f"✅ Thumbnail already up to date: {plex_thumbnail_path}")
+        return False
 
     staging_folder = os.path.join(str(STAGING_DIRECTORY), channel_name)
-    plex_folder = os.path.join(PLEX_DIRECTORY, channel_name)
-
     os.makedirs(staging_folder, exist_ok=True)
-    os.makedirs(plex_folder, exist_ok=True)
-
     staging_thumbnail_path = os.path.join(staging_folder, "folder.jpg")
 
     try:
-        subprocess.run([
-            "yt-dlp",
-            "--write-thumbnail",
-            "--skip-download",
-            "--convert-thumbnails", "jpg",
-            "--playlist-items", "0",
-            "-o", os.path.join(staging_folder, "folder"),
-            channel_url
-        ], check=True)
-
-        shutil.move(staging_thumbnail_path, plex_thumbnail_path)
+        _download_art(art_url, staging_thumbnail_path)
+        transfer_file(staging_thumbnail_path, plex_thumbnail_path)
+        channel_cache.mark_art_fetched(channel_url, art_url)
         logging.info(f"✅ Thumbnail moved to Plex: {plex_thumbnail_path}")
-
+        return True
     except subprocess.CalledProcessError as e:
-        logging.error(f"⚠️ yt-dlp failed: {e}")
-    except FileNotFoundError:
-        logging.error(f"⚠️ Thumbnail not found in staging: {staging_thumbnail_path}")
+        logging.error(f"⚠️ FFmpeg failed converting art for {channel_name}: {e}")
+    except OSError as e:  # urllib errors are OSErrors too
+        logging.error(f"⚠️ Failed to fetch art for {channel_name}: {e}")
     except Exception as e:
-        logging.error(f"⚠️ Unexpected error: {e}")
\ No newline at end of file
+        logging.error(f"⚠️ Unexpected error: {e}")
+    return False
+
+
+def refresh_channel_art(channel_urls, force=False):
+    """Batched pass over all channels: one extraction for those whose metadata expired, then parallel art fetches."""
+    stale = [url for url in channel_urls if force or not channel_cache.is_fresh(url)]
+    if stale:
+        logging.info(f"🔍 Refreshing channel metadata for {len(stale)} channel(s)...")
+        try:
+            infos = fetch_channel_info(stale)
+        except OSError as e:
+            logging.error(f"⚠️ Error extracting channel metadata: {e}")
+            infos = {}
+        for channel_url, info in infos.items():
+            if channel_url in stale:
+                channel_cache.update(channel_url, channel_record(info))
+
+    records = {url: channel_cache.get(url) for url in channel_urls if channel_cache.get(url)}
+    with ThreadPoolExecutor(max_workers=ART_WORKERS) as pool:
+        updated = sum(pool.map(lambda item: refresh_folder_art(item[0], item[1], force), records.items()))
+
+    channel_cache.save()
+    logging.info(f"🖼 Channel art: {updated} updated, {len(records) - updated} unchanged")
+    return updated
@@ -0,0 +1,193 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config.loader import get_config
+
+config = get_config()
+
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024  # Bytes copied per kernel call
+CHECKPOINT_EVERY = 4  # fsync + checkpoint the partial file after this many chunks
+PARTIAL_SUFFIX = ".partial"
+CHECKPOINT_SUFFIX = ".partial.offset"
+
+
+def _fsync_directory(path):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return  # Not supported on every platform/filesystem
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _copy_range(src_fd, dst_fd, offset, count):
+    """Copies count bytes at offset inside the kernel where possible. Returns bytes copied."""
+    if hasattr(os, "copy_file_range"):
+        try:
+            return os.copy_file_range(src_fd, dst_fd, count, offset, offset)
+        except OSError:
+            pass  # e.g. EXDEV on older kernels or unsupported filesystems
+    if hasattr(os, "sendfile"):
+        try:
+            os.lseek(dst_fd, offset, os.SEEK_SET)
+            return os.sendfile(dst_fd, src_fd, offset, count)
+        except OSError:
+            pass
+    data = os.pread(src_fd, count, offset)
+    return os.pwrite(dst_fd, data, offset)
+
+
+def _read_checkpoint(checkpoint_path):
+    try:
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def _write_checkpoint(checkpoint_path, offset):
+    with open(checkpoint_path, "w", encoding="utf-8") as f:
+        f.write(str(offset))
+
+
+def transfer_file(source_path, destination_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Moves a file into the library and only removes the source once the copy is verified.
+
+    Same device: a single atomic rename. Different devices: copy_file_range/sendfile into
+    '<dest>.partial' (resuming from the last fsync'd checkpoint), verify size, fsync, rename.
+    """
+    destination_folder = os.path.dirname(destination_path)
+    os.makedirs(destination_folder, exist_ok=True)
+
+    source_stat = os.stat(source_path)
+    if source_stat.st_dev == os.stat(destination_folder).st_dev:
+        os.replace(source_path, destination_path)  # ✅ Same filesystem: atomic rename, no data copied
+        return
+
+    partial_path = destination_path + PARTIAL_SUFFIX
+    checkpoint_path = destination_path + CHECKPOINT_SUFFIX
+    total = source_stat.st_size
+
+    # ✅ Resume an interrupted copy from its last durable checkpoint
+    offset = _read_checkpoint(checkpoint_path) if os.path.exists(partial_path) else 0
+    if offset > total:
+        offset = 0
+    if offset:
+        logging.info(f"↪ Resuming transfer of {source_path} at {offset / total:.0%}")
+
+    src_fd = os.open(source_path, os.O_RDONLY)
+    try:
+        dst_fd = os.open(partial_path, os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(dst_fd, offset)  # Drop anything written after the checkpoint
+            chunks = 0
+            while offset < total:
+                copied = _copy_range(src_fd, dst_fd, offset, min(chunk_size, total - offset))
+                if copied <= 0:
+                    raise OSError(f"Copy stalled at byte {offset} of {source_path}")
+                offset += copied
+                chunks += 1
+                if chunks % CHECKPOINT_EVERY == 0:
+                    os.fsync(dst_fd)
+                    _write_checkpoint(checkpoint_path, offset)
+            os.fsync(dst_fd)
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+
+    copied_size = os.path.getsize(partial_path)
+    if copied_size != total:
+        raise OSError(f"Size mismatch after copying {source_path}: {copied_size} != {total}")
+
+    os.replace(partial_path, destination_path)
+    _fsync_directory(destination_folder)
+    os.remove(source_path)  # ✅ Only now is the staging copy safe to drop
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+
+class TransferPool:
+    """Runs transfers on a bounded set of background threads and remembers unfinished ones across restarts."""
+
+    def __init__(self, workers=2, state_file=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.state_file = state_file
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="transfer")
+        self._lock = threading.Lock()
+        self._pending = self._load_pending()
+
+    @classmethod
+    def from_config(cls, config):
+        options = config.get("transfers", {})
+        return cls(
+            workers=options.get("workers", 2),
+            state_file=options.get("state_file", os.path.join(os.path.dirname(config["cache_file"]),
+                                                              "pending_transfers.json")),
+            chunk_size=options.get("chunk_size_mb", DEFAULT_CHUNK_SIZE // (1024 * 1024)) * 1024 * 1024,
+        )
+
+    def _load_pending(self):
+        if not self.state_file:
+            return {}
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_pending(self):
+        if not self.state_file:
+            return
+        try:
+            temp_file = self.state_file + ".tmp"
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(self._pending, f, indent=4)
+            os.replace(temp_file, self.state_file)
+        except OSError as e:
+            logging.error(f"⚠ Failed to save pending transfers: {e}")
+
+    def _run(self, source_path, destination_path):
+        # A failure propagates through the Future and leaves the entry pending, so the next start retries it
+        transfer_file(source_path, destination_path, self.chunk_size)
+        with self._lock:
+            self._pending.pop(source_path, None)
+            self._save_pending()
+        return destination_path
+
+    def submit(self, source_path, destination_path):
+        """Queues a transfer and returns its Future."""
+        with self._lock:
+            self._pending[source_path] = destination_path
+            self._save_pending()
+        return self._executor.submit(self._run, source_path, destination_path)
+
+    async def transfer(self, source_path, destination_path):
+        """Awaitable transfer for the download pipeline."""
+        return await asyncio.wrap_future(self.submit(source_path, destination_path))
+
+    def resume_pending(self):
+        """Re-queues transfers that were interrupted by a crash or shutdown. Returns their Futures."""
+        with self._lock:
+            pending = list(self._pending.items())
+        futures = []
+        for source_path, destination_path in pending:
+            if os.path.exists(source_path):
+                logging.info(f"↪ Resuming interrupted transfer: {source_path}")
+                futures.append(self.submit(source_path, destination_path))
+            else:
+                with self._lock:
+                    self._pending.pop(source_path, None)
+                    self._save_pending()
+        return futures
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+transfer_pool = TransferPool.from_config(config)  # Shared by the pipeline and the organizer
@@ -0,0 +1,95 @@
+import json
+import logging
+import os
+import threading
+import time
+from config.loader import get_config
+
+config = get_config()
+
+# A video moves through these in order; "dropped" ends a video that left the pipeline early (skipped or failed)
+STATES = ("discovered", "metadata", "downloading", "downloaded", "stamped", "moved")
+FINISHED = ("moved", "dropped")
+# Only these need to survive a power cut: losing any other line just means recovery leaves the video to the scan
+SYNCED_STATES = ("downloaded", "stamped", "moved")
+COMPACT_EVERY = 1000  # Rewrite the journal with only unfinished videos after this many appends
+
+
+class VideoJournal:
+    """Durable per-video pipeline state: one appended JSON line per transition, replayed on startup.
+
+    Each line carries the video ID, its new state and any fields learned at that step (channel, URL,
+    cache entry); replaying merges them, so the last line for a video says how far it got.
+    """
+
+    def __init__(self, journal_file):
+        self.journal_file = journal_file
+        self._lock = threading.Lock()
+        self._videos = {}  # video ID -> merged record, unfinished videos only
+        self._appended = 0
+        self._replay()
+        self._compact()  # ✅ Start from a journal that only holds what a previous run left unfinished
+
+    @classmethod
+    def from_config(cls, config):
+        state_directory = os.path.dirname(config["cache_file"])
+        return cls(config.get("video_journal", os.path.join(state_directory, "video_journal.jsonl")))
+
+    def _replay(self):
+        try:
+            with open(self.journal_file, "r", encoding="utf-8") as journal:
+                for line in journal:
+                    try:
+                        record = json.loads(line)
+                        video_id = record["id"]
+                    except (json.JSONDecodeError, KeyError, TypeError):
+                        continue  # ✅ A torn final line from a crash is simply ignored
+                    if record.get("state") in FINISHED:
+                        self._videos.pop(video_id, None)
+                    else:
+                        self._videos.setdefault(video_id, {}).update(record)
+        except FileNotFoundError:
+            pass
+
+    def _compact(self):
+        try:
+            temp_file = self.journal_file + ".tmp"
+            with open(temp_file, "w", encoding="utf-8") as f:
+                for record in self._videos.values():
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.journal_file)
+            self._appended = 0
+        except OSError as e:
+            logging.error(f"⚠ Failed to compact video journal: {e}")
+
+    def advance(self, video_id, state, **fields):
+        """Records that a video reached state; for SYNCED_STATES, returns once the line is on disk."""
+        record = {"id": video_id, "state": state, "at": round(time.time(), 3), **fields}
+        with self._lock:
+            if state in FINISHED:
+                if self._videos.pop(video_id, None) is None:
+                    return  # Never journaled, nothing to close
+            else:
+                self._videos.setdefault(video_id, {}).update(record)
+            try:
+                with open(self.journal_file, "a", encoding="utf-8") as journal:
+                    journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    if state in SYNCED_STATES:
+                        journal.flush()
+                        os.fsync(journal.fileno())
+            except OSError as e:
+                logging.error(f"⚠ Failed to journal {video_id} -> {state}: {e}")
+                return
+            self._appended += 1
+            if self._appended >= COMPACT_EVERY:
+                self._compact()
+
+    def unfinished(self):
+        """Snapshot of the videos that never reached "moved" or "dropped"."""
+        with self._lock:
+            return [dict(record) for record in self._videos.values()]
+
+
+video_journal = VideoJournal.from_config(config)  # Shared by every pipeline stage
@@ -0,0 +1,40 @@
+import json
+import logging
+import os
+import threading
+
+watermark_lock = threading.Lock()
+
+_watermarks = {}  # watermark_file -> {channel_url: {"video_id", "upload_date", "updated_at"}}
+
+
+def _load_locked(watermark_file):
+    if watermark_file not in _watermarks:
+        try:
+            with open(watermark_file, "r", encoding="utf-8") as f:
+                _watermarks[watermark_file] = json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            _watermarks[watermark_file] = {}
+    return _watermarks[watermark_file]
+
+
+def get_watermark(watermark_file, channel):
+    """Returns the newest fully processed video recorded for a channel, or None if it was never scanned."""
+    with watermark_lock:
+        return _load_locked(watermark_file).get(channel)
+
+
+def set_watermark(watermark_file, channel, watermark):
+    """Records a channel's high-water mark and writes the file atomically."""
+    with watermark_lock:
+        watermarks = _load_locked(watermark_file)
+        watermarks[channel] = watermark
+
+        try:
+            temp_file = watermark_file + ".tmp"
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(watermarks, f, indent=4)
+            os.replace(temp_file, watermark_file)
+            logging.info(f"🔖 Watermark for {channel} is now {watermark['video_id']}")
+        except OSError as e:
+            logging.error(f"⚠ Failed to save watermark for {channel}: {e}")
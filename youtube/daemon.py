@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import os
+import signal
+import time
+from config.loader import get_config, reload_config
+from utils.cache import compact_cache
+from utils.thumbnails import refresh_channel_art
+from youtube.engine import create_engine
+from youtube.fetcher import CACHE_FILE, enabled_channels, warm_up, run_channels
+from youtube.supervisor import ProcessSupervisor
+from youtube.utils import update_yt_dlp
+
+config = get_config()
+
+UPDATE_STAMP_FILE = os.path.join(os.path.dirname(CACHE_FILE), "yt_dlp_update.stamp")
+
+
+def poll_interval(channel_url):
+    """Seconds between polls of one channel: its own poll_minutes, else the daemon default."""
+    default = config.get("daemon", {}).get("poll_minutes", 60)
+    for channel in config["channels"]:
+        if channel["url"] == channel_url:
+            return channel.get("poll_minutes", default) * 60
+    return default * 60
+
+
+def update_interval():
+    """Minimum seconds between yt-dlp -U checks."""
+    return config.get("update_check_hours", 24) * 3600
+
+
+def check_config():
+    """Hot-reloads config.json; a broken edit is logged and the running config kept."""
+    try:
+        if reload_config():
+            logging.info("🔁 config.json changed, reloaded")
+    except (OSError, ValueError) as e:  # json.JSONDecodeError is a ValueError
+        logging.error(f"⚠️ Keeping current config, reload failed: {e}")
+
+
+async def run_daemon():
+    """Keeps the archive, cache and library indexes warm and polls each channel on its own interval."""
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    wake = asyncio.Event()
+    state = {"cycle": None}
+
+    def request_stop():
+        logging.info("🛑 Shutdown requested, stopping after cleanup...")
+        stop.set()
+        wake.set()
+        if state["cycle"]:
+            state["cycle"].cancel()  # The supervisor terminates running yt-dlp children
+
+    for sig, handler in ((signal.SIGTERM, request_stop), (signal.SIGINT, request_stop), (signal.SIGHUP, wake.set)):
+        try:
+            loop.add_signal_handler(sig, handler)  # ✅ SIGHUP forces an immediate config check
+        except (NotImplementedError, RuntimeError, AttributeError):
+            pass  # Signal handlers aren't available on every platform/loop
+
+    supervisor = create_engine(config, ProcessSupervisor.from_config(config))
+    next_poll = {}  # channel URL -> monotonic time it's next due
+    recovery = await warm_up(enabled_channels())  # Finishes interrupted videos alongside the first poll
+    logging.info("👀 Daemon started")
+
+    try:
+        while not stop.is_set():
+            check_config()
+            await asyncio.to_thread(update_yt_dlp, UPDATE_STAMP_FILE, update_interval())
+
+            channels = enabled_channels()
+            for channel_url in channels:
+                next_poll.setdefault(channel_url, 0.0)  # Newly enabled channels are due right away
+            for channel_url in set(next_poll) - set(channels):
+                del next_poll[channel_url]
+
+            now = time.monotonic()
+            due = [channel_url for channel_url, due_at in next_poll.items() if due_at <= now]
+            if due:
+                logging.info(f"📡 Polling {len(due)} channel(s)")
+                await asyncio.to_thread(refresh_channel_art, due)
+                state["cycle"] = asyncio.create_task(run_channels(supervisor, due))
+                try:
+                    await state["cycle"]
+                except asyncio.CancelledError:
+                    if stop.is_set():
+                        break
+                    raise
+                finally:
+                    state["cycle"] = None
+                await asyncio.to_thread(compact_cache, CACHE_FILE)
+                for channel_url in due:
+                    next_poll[channel_url] = time.monotonic() + poll_interval(channel_url)
+
+            # ✅ Sleep until the next channel is due, waking regularly to notice config edits
+            reload_check = config.get("daemon", {}).get("reload_check_seconds", 30)
+            sleep_for = min(next_poll.values(), default=time.monotonic() + reload_check) - time.monotonic()
+            try:
+                await asyncio.wait_for(wake.wait(), max(1, min(sleep_for, reload_check)))
+            except asyncio.TimeoutError:
+                pass
+            wake.clear()
+    finally:
+        recovery.cancel()
+        await supervisor.shutdown()
+        await asyncio.to_thread(compact_cache, CACHE_FILE)
+        logging.info("👋 Daemon stopped")
+
+
+def start_daemon():
+    try:
+        asyncio.run(run_daemon())
+    except KeyboardInterrupt:
+        logging.info("🛑 Interrupted, running downloads were stopped.")
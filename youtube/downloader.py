@@ -1,13 +1,18 @@
 import os
-import re
+import json
 import time
 import logging
-import subprocess
-from tqdm import tqdm
-from config.loader import load_config
-from logger.logger import get_yt_dlp_log_path, cleanup_old_logs
-
-config = load_config()
+from config.loader import get_config
+from logger.logger import YtDlpOutput
+from utils.archive import is_archived, mark_archived
+from youtube.utils import extract_video_id
+from youtube.pacer import pacer
+from utils.metrics import tracer
+from youtube.progress import PROGRESS_TEMPLATE_ARGS, parse_progress_line, event_from_hook, progress_board
+from youtube.quality import (FORMATS_JSON_PREFIX, FORMAT_FIELDS, profile_for, format_selector, parse_formats_line,
+                             selection_record, describe)
+
+config = get_config()
 
 STAGING_DIRECTORY = config["staging_directory"]
 PLEX_DIRECTORY = config["plex_directory"]
@@ -16,11 +21,16 @@ MAIN_DIRECTORY = os.path.dirname(PROJECT_ROOT)
 DOWNLOAD_ARCHIVE = os.path.join(MAIN_DIRECTORY, "downloaded.txt")
 CACHE_FILE = config["cache_file"]
 
+# ✅ The download run prints its own info dict once the file is in place, so no separate --dump-json is needed
+INFO_JSON_PREFIX = "[info-json] "
+INFO_JSON_FIELDS = ("id,title,uploader,upload_date,webpage_url,extractor_key,filepath,"  # filepath: final path after move
+                    "format_id,height,vcodec,filesize_approx,duration")
+
 DOWNLOAD_PATH = os.path.join(STAGING_DIRECTORY, "%(uploader)s", "%(uploader)s - %(title)s.%(ext)s")
 
 YTDLP_OPTIONS = [
     "yt-dlp",
-    "-f", "bv*[height<=1080]+ba/b[height<=1080]",
+    "-f", "bv*[height<=1080]+ba/b[height<=1080]",  # Replaced per video by the channel's quality profile
     "-o", DOWNLOAD_PATH,
     "--merge-output-format", "mp4",
     "--remux-video", "mp4",
@@ -30,96 +40,152 @@ YTDLP_OPTIONS = [
     "--embed-metadata",
     "--embed-thumbnail",
     "--rm-cache-dir",
-    "--limit-rate", "5M",
     "--retries", "10",
     "--download-archive", DOWNLOAD_ARCHIVE,
     "--sponsorblock-remove", "sponsor,selfpromo,intro,outro",
     "--print-traffic",
-    "--match-filter", "!is_live & availability!=needs_auth & !is_short"
+    "--match-filter", "!is_live & availability!=needs_auth & !is_short",
+    "--no-quiet",  # ✅ --print would otherwise silence the normal output we log and parse
+    "--print", f"after_move:{FORMATS_JSON_PREFIX}%(formats.:.{{{FORMAT_FIELDS}}})j",  # Sizes of every offered format
+    "--print", f"after_move:{INFO_JSON_PREFIX}%(.{{{INFO_JSON_FIELDS}}})j",
+    *PROGRESS_TEMPLATE_ARGS,  # ✅ One JSON progress line per update instead of the human-readable bar
 ]
 
 
 def is_video_downloaded(video_url):
-    """Checks if the video is already recorded in yt-dlp's download archive by matching only the video ID."""
-    if not os.path.exists(DOWNLOAD_ARCHIVE):
-        logging.info(f"⚠ Archive file not found: {DOWNLOAD_ARCHIVE}")
-        return False  # Archive file doesn't exist yet
-
-    video_id = video_url.split("v=")[-1]  # ✅ Extract only the video ID from full URL
+    """Checks if the video is already recorded in yt-dlp's download archive by exact (extractor, ID) match."""
+    video_id = extract_video_id(video_url)
 
     logging.debug(f"DEBUG: Checking if video ID '{video_id}' is in {DOWNLOAD_ARCHIVE}")
 
-    with open(DOWNLOAD_ARCHIVE, "r") as archive_file:
-        for line in archive_file:
-            if video_id.strip() in line.strip():  # ✅ Now we correctly check for the video ID
-                logging.info(f"✅ Already downloaded: {video_url}, skipping.")
-                return True  # ✅ Video was already downloaded
+    if is_archived(DOWNLOAD_ARCHIVE, video_id):
+        logging.info(f"✅ Already downloaded: {video_url}, skipping.")
+        return True  # ✅ Video was already downloaded
 
     logging.debug(f"DEBUG: Video ID '{video_id}' NOT found in archive!")
     return False  # ❌ Not found in archive
 
-def download_video(video_url):
-    """Downloads a specific video using yt-dlp and returns True if downloaded, False if skipped"""
+def parse_info_line(line):
+    """Returns the info dict printed by the download run, or None if the line is regular output."""
+    if not line.startswith(INFO_JSON_PREFIX):
+        return None
+    try:
+        return json.loads(line[len(INFO_JSON_PREFIX):])
+    except json.JSONDecodeError:
+        logging.debug(f"DEBUG: Unparseable info line: {line}")
+        return None
+
+
+async def download_video(video_url, supervisor, channel=None, on_info=None, duration=None):
+    """Downloads a specific video using yt-dlp: True if downloaded, False if skipped, None if it failed.
+
+    supervisor is the ProcessSupervisor or the InProcessEngine (see youtube.engine.create_engine).
+    on_info is called with the video's info dict (title, uploader, upload_date, ...) as yt-dlp reports it,
+    including a "quality" record of the format the channel's profile selected.
+    duration (seconds, from the flat-playlist entry) turns the profile's bytes-per-minute budget into a size limit.
+    """
 
     # ✅ Step 1: Check if the video is in the archive BEFORE calling yt-dlp
     if is_video_downloaded(video_url):
         return False  # ✅ Skip the video immediately
 
-    command = YTDLP_OPTIONS + [video_url]
-    yt_dlp_log_filename = get_yt_dlp_log_path()
-    download_started = False
-
-    log_directory = os.path.dirname(yt_dlp_log_filename)
-    os.makedirs(log_directory, exist_ok=True)  # ✅ Ensure logs directory exists
-    open(yt_dlp_log_filename, "w").close()  # ✅ Create an empty log file
-
+    # ✅ Step 2: Wait for the adaptive pacer, then download under its current bandwidth cap
+    with tracer.span("pacing", video_url):
+        await pacer.acquire()
+    throttle_tracker = pacer.new_tracker()
+
+    profile_name, profile = profile_for(channel)
+    options = list(YTDLP_OPTIONS)
+    options[options.index("-f") + 1] = format_selector(profile, duration)
+    command = options + pacer.rate_limit_args() + [video_url]
+    yt_dlp_output = YtDlpOutput(extract_video_id(video_url))  # ✅ Shared per-run sink, traffic kept on failure
+
+    state = {"download_started": False, "info": None, "bytes": 0, "formats": None}
+
+    def handle_event(event):
+        # ✅ Log once when bytes actually start flowing, then feed the shared progress display
+        if event.stage == "download" and event.status == "downloading" and not state["download_started"]:
+            logging.info(f"📥 Downloading: {video_url}")
+            state["download_started"] = True
+            tracer.begin(video_url, "transfer")
+        trace_event(event)
+        pacer.observe_progress(throttle_tracker, event)
+        progress_board.update(video_url, event)
+
+    def trace_event(event):
+        # ✅ Time the byte transfer and each postprocessor (SponsorBlock cut, thumbnail embed, ...) separately
+        if event.stage == "download":
+            if event.status == "finished":
+                state["bytes"] += event.total_bytes or event.downloaded_bytes
+        elif event.status == "started":
+            tracer.end(video_url, "transfer", bytes_moved=state["bytes"])  # First postprocessor: bytes are in
+            tracer.begin(video_url, f"pp:{event.stage}")
+        elif event.status in ("finished", "error"):
+            tracer.end(video_url, f"pp:{event.stage}", outcome="ok" if event.status == "finished" else "failed")
+
+    download_started_at = time.time()
     try:
         logging.debug(f"Running yt-dlp with command: {' '.join(command)}")
 
-        # ✅ Redirect yt-dlp output directly to the log file
-        with open(yt_dlp_log_filename, "w", encoding="utf-8") as log_file:
-            process = subprocess.Popen(command, stdout=log_file, stderr=subprocess.STDOUT, text=True)
-
-        # ✅ Initialize progress bar ONLY IF downloading starts
-        progress_bar = None
-
-        while process.poll() is None:
-            time.sleep(1)
-
-            if not os.path.exists(yt_dlp_log_filename):
-                continue  # ✅ Retry if the log file hasn't been created yet
-
-            with open(yt_dlp_log_filename, "r") as log_reader:
-                log_content = log_reader.readlines()
-
-            for line in reversed(log_content):
-                line = line.strip()
-
-                # ✅ Detect when yt-dlp actually starts downloading
-                if "[download]" in line and "Destination" in line and not download_started:
-                    logging.info(f"📥 Downloading: {video_url}")
-                    download_started = True
-
-                # ✅ Ensure progress bar only starts if downloading begins
-                if download_started and not progress_bar:
-                    progress_bar = tqdm(total=100, desc="Downloading", unit="%", dynamic_ncols=True, leave=True)
-
-                # ✅ Extract progress percentage
-                match = re.search(r"(\d{1,3}\.\d+)%", line)
-                if match and progress_bar:
-                    percent_complete = float(match.group(1))
-                    progress_bar.n = int(percent_complete)
-                    progress_bar.refresh()
-                    break
-
-        process.wait()
-        if progress_bar:
-            progress_bar.close()
-
-        cleanup_old_logs()
-
-        return process.returncode == 0  # ✅ True if download succeeded, False otherwise
-
-    except subprocess.CalledProcessError as e:
+        # ✅ yt-dlp output is streamed through a pipe and parsed line by line as it arrives
+        def handle_line(line):
+            event = parse_progress_line(line)
+            if event:
+                handle_event(event)  # Progress lines are high-volume and stay out of the log
+                return
+
+            formats = parse_formats_line(line)
+            if formats is not None:
+                state["formats"] = formats  # Large and only needed for the selection record below
+                return
+
+            yt_dlp_output.write(line)
+
+            info = parse_info_line(line)
+            if info:
+                info["quality"] = selection_record(profile_name, info, state["formats"])
+                logging.info(f"🎚 {info.get('title', video_url)}: {describe(info['quality'])}")
+                state["info"] = info
+                if on_info:
+                    on_info(info)
+                return  # Free text (title, description), never a throttling signal
+
+            pacer.observe_line(throttle_tracker, line)
+
+        def handle_progress(status):
+            # ✅ In-process engine: yt-dlp's hooks report the same fields directly
+            handle_event(event_from_hook(status))
+
+        returncode = None
+        try:
+            returncode = await supervisor.run(command, channel=channel, on_line=handle_line,
+                                              on_progress=handle_progress)
+        finally:
+            progress_board.finish(video_url)
+            yt_dlp_output.close(failed=returncode != 0)
+            tracer.end(video_url, "transfer", bytes_moved=state["bytes"])  # No postprocessors ran
+            tracer.discard(video_url, prefix="pp:")  # Postprocessors cut short by a failure
+        tracer.record("download", video_url, download_started_at, time.time(), state["bytes"],
+                      "ok" if returncode == 0 else "failed")
+
+        pacer.record(throttle_tracker, succeeded=returncode == 0)
+
+        if returncode != 0:
+            logging.error(f"❌ yt-dlp exited with code {returncode} for {video_url}")
+            return None  # ❌ Failed, as opposed to skipped: the video must not count as handled
+        if not state["info"] and not state["download_started"]:
+            # ✅ Exit 0 without a download: --match-filter rejected it (live, members-only, Short) or yt-dlp's
+            # own archive check skipped it, and nothing was written
+            logging.info(f"⏭ yt-dlp skipped {video_url} (filtered out or already archived)")
+            return False
+
+        # ✅ Keep the in-memory index current (filtered-out videos never get here and aren't archived)
+        info = state["info"] or {}  # No info line (e.g. an old yt-dlp): the caller looks the metadata up
+        mark_archived(DOWNLOAD_ARCHIVE, info.get("id") or extract_video_id(video_url),
+                      info.get("extractor_key") or "youtube")
+        return True
+
+    except OSError as e:
         logging.error(f"❌ Failed to download {video_url}: {e}")
-        return None  # ❌ Return None if yt-dlp encountered an unexpected error
\ No newline at end of file
+        tracer.record("download", video_url, download_started_at, time.time(), outcome="failed")
+        return None  # ❌ yt-dlp could not be started
@@ -0,0 +1,259 @@
+import asyncio
+import logging
+import threading
+import subprocess
+
+try:
+    import yt_dlp
+except ImportError:  # Only needed for the in-process engine; the CLI path works without it
+    yt_dlp = None
+
+
+class _LineLogger:
+    """yt-dlp logger that forwards every message as a line.
+
+    It also stands in for yt-dlp's stdout: --print, --dump-json and -J output is written there with
+    to_stdout(), which bypasses the logger.
+    """
+
+    def __init__(self, before_line=None):
+        self.on_line = None
+        self.before_line = before_line  # Raises DownloadCancelled to stop the run between lines
+        self._partial = ""
+
+    def _emit(self, message):
+        if self.before_line:
+            self.before_line()
+        if self.on_line:
+            for line in str(message).splitlines():
+                self.on_line(line)
+
+    def write(self, text):
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()  # Held until its newline arrives
+        for line in lines:
+            self._emit(line)
+
+    def flush(self):
+        pass
+
+    def reset(self):
+        self._partial = ""
+
+    def debug(self, message):
+        self._emit(message)
+
+    def info(self, message):
+        self._emit(message)
+
+    def warning(self, message):
+        self._emit(f"WARNING: {message}")
+
+    def error(self, message):
+        self._emit(message)
+
+
+class _Worker:
+    """One long-lived YoutubeDL instance, reused for every call with the same options on a thread."""
+
+    def __init__(self, ydl_opts):
+        self.logger = _LineLogger(self._check_cancelled)
+        self.on_progress = None
+        self.cancelled = None  # Engine-wide shutdown event
+        self.stopped = None  # Per-call event: the caller stopped listening (e.g. a scan broke out early)
+        params = dict(ydl_opts)
+        params["logger"] = self.logger
+        params["progress_hooks"] = [self._progress_hook]
+        params["postprocessor_hooks"] = [self._postprocessor_hook]
+        self.ydl = yt_dlp.YoutubeDL(params)
+        self.ydl._out_files.out = self.logger  # ✅ Capture stdout output (--print, --dump-json, -J) as lines
+
+    def _check_cancelled(self):
+        if self.cancelled and self.cancelled.is_set():
+            raise yt_dlp.utils.DownloadCancelled("Engine is shutting down")
+        if self.stopped and self.stopped.is_set():
+            raise yt_dlp.utils.DownloadCancelled("Caller stopped reading")
+
+    def _progress_hook(self, status):
+        self._check_cancelled()
+        if self.on_progress:
+            self.on_progress(status)
+
+    def _postprocessor_hook(self, status):
+        self._check_cancelled()
+        if status.get("status") in ("started", "finished"):
+            self.logger.debug(f"[{status.get('postprocessor')}] {status['status']}")
+        if self.on_progress:
+            self.on_progress(status)  # Carries a "postprocessor" key, so it reads as a post-processing stage
+
+
+class InProcessEngine:
+    """Runs yt-dlp commands through yt_dlp.YoutubeDL instead of spawning the CLI.
+
+    Takes the same argv lists as ProcessSupervisor (e.g. YTDLP_OPTIONS + [url]) and exposes the
+    same run()/stream() interface, so callers can switch engines without changing their commands.
+    Non-yt-dlp commands (ffmpeg) are passed through to the supervisor.
+    """
+
+    def __init__(self, supervisor=None):
+        if yt_dlp is None:
+            raise RuntimeError("The in-process engine needs the yt_dlp package: pip install yt-dlp")
+        self.supervisor = supervisor  # None for blocking-only use (capture/run_sync)
+        if supervisor is not None:
+            self.max_processes = supervisor.max_processes
+            self.max_per_channel = supervisor.max_per_channel
+        self._local = threading.local()
+        self._cancelled = threading.Event()
+
+    @staticmethod
+    def _is_yt_dlp(command):
+        return command and command[0] == "yt-dlp"
+
+    def _worker(self, argv):
+        """Returns this thread's YoutubeDL for these options, creating it on first use."""
+        parsed = yt_dlp.parse_options(argv)
+        key = self._options_key(argv, parsed.urls)
+        workers = getattr(self._local, "workers", None)
+        if workers is None:
+            workers = self._local.workers = {}
+        if key not in workers:
+            workers[key] = _Worker(parsed.ydl_opts)
+            workers[key].cancelled = self._cancelled
+        # The pacer changes --limit-rate and the quality profile changes -f between calls; apply them without
+        # building a new instance
+        ydl = workers[key].ydl
+        ydl.params["ratelimit"] = parsed.ydl_opts.get("ratelimit")  # Downloaders read it live
+        format_spec = parsed.ydl_opts.get("format")
+        if ydl.params.get("format") != format_spec:
+            # ✅ The selector is compiled in YoutubeDL.__init__, so params["format"] alone changes nothing
+            ydl.params["format"] = format_spec
+            ydl.format_selector = (format_spec if format_spec in (None, "-")
+                                   else ydl.build_format_selector(format_spec))
+        return workers[key], parsed.urls
+
+    @staticmethod
+    def _options_key(argv, urls):
+        key = []
+        skip_next = False
+        for arg in argv:
+            if skip_next:
+                skip_next = False
+            elif arg in ("--limit-rate", "-r", "--format", "-f"):
+                skip_next = True
+            elif arg not in urls:
+                key.append(arg)
+        return tuple(key)
+
+    def run_sync(self, command, on_line=None, on_progress=None, stopped=None):
+        """Blocking run of a yt-dlp command on the calling thread. Returns a CLI-style exit code.
+
+        Setting stopped (a threading.Event) aborts the run at its next output line or hook call; flat
+        extraction prints a line per entry, so a listing stops between entries.
+        """
+        worker, urls = self._worker(command[1:])
+        worker.logger.reset()
+        worker.logger.on_line = on_line
+        worker.on_progress = on_progress
+        worker.stopped = stopped
+        worker.ydl._download_retcode = 0  # ✅ Sticky on the instance: one failure would fail every later call
+        try:
+            return worker.ydl.download(urls)
+        except yt_dlp.utils.DownloadCancelled:
+            return 1
+        except yt_dlp.utils.YoutubeDLError as e:
+            if on_line:
+                on_line(f"ERROR: {e}")
+            return 1
+        finally:
+            worker.logger.on_line = None
+            worker.on_progress = None
+            worker.stopped = None
+
+    def capture(self, command):
+        """Blocking run that returns (exit code, output lines), like subprocess.run(capture_output=True)."""
+        lines = []
+        returncode = self.run_sync(command, on_line=lines.append)
+        return returncode, lines
+
+    async def _run_in_thread(self, command, on_line=None, on_progress=None):
+        """run_sync on a worker thread, with callbacks delivered on the loop; cancelling stops the thread too."""
+        loop = asyncio.get_running_loop()
+        stopped = threading.Event()
+
+        def threadsafe(callback):
+            return (lambda value: loop.call_soon_threadsafe(callback, value)) if callback else None
+
+        try:
+            return await asyncio.to_thread(self.run_sync, command, threadsafe(on_line), threadsafe(on_progress),
+                                           stopped)
+        finally:
+            stopped.set()  # ✅ A cancelled caller doesn't leave the extraction running to completion
+
+    async def run(self, command, channel=None, on_line=None, on_progress=None):
+        if not self._is_yt_dlp(command):
+            return await self.supervisor.run(command, channel=channel, on_line=on_line)
+
+        async with self.supervisor.slot(channel):
+            return await self._run_in_thread(command, on_line, on_progress)
+
+    async def stream(self, command, limited=True, channel=None):
+        if not self._is_yt_dlp(command):
+            lines = self.supervisor.stream(command, limited=limited, channel=channel)
+            try:
+                async for line in lines:
+                    yield line
+            finally:
+                await lines.aclose()
+            return
+
+        queue = asyncio.Queue()
+        done = object()
+
+        async def produce():
+            try:
+                if limited:
+                    await self.run(command, channel=channel, on_line=queue.put_nowait)
+                else:
+                    await self._run_in_thread(command, on_line=queue.put_nowait)
+            finally:
+                queue.put_nowait(done)
+
+        # Lines are queued on the loop in order, so the end marker always arrives after the last line
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                line = await queue.get()
+                if line is done:
+                    break
+                yield line
+            await producer
+        finally:
+            producer.cancel()  # Stops the extraction thread at its next entry (early break in a scan)
+
+    async def shutdown(self):
+        """Aborts in-flight extractions at their next output line or hook call and stops any passthrough processes."""
+        self._cancelled.set()
+        await self.supervisor.shutdown()
+
+
+_blocking_engine = None
+
+
+def capture_yt_dlp(command, config):
+    """Blocking yt-dlp call for synchronous helpers. Returns (exit code, output lines) for either engine."""
+    global _blocking_engine
+    if config.get("engine", "subprocess") == "inprocess":
+        if _blocking_engine is None:
+            _blocking_engine = InProcessEngine()
+        return _blocking_engine.capture(command)
+
+    result = subprocess.run(command, capture_output=True, text=True)
+    return result.returncode, result.stdout.splitlines()
+
+
+def create_engine(config, supervisor):
+    """Returns the runner download code should use: the subprocess supervisor or the in-process engine."""
+    if config.get("engine", "subprocess") == "inprocess":
+        logging.info("⚙️ Using the in-process yt-dlp engine")
+        return InProcessEngine(supervisor)
+    return supervisor
@@ -1,101 +1,214 @@
 import os
-import subprocess
 import json
-import shutil
+import signal
+import asyncio
 import logging
-import time
 import threading
-from utils.cache import load_cache, save_cache
-from config.loader import load_config
-from youtube.downloader import download_video, PLEX_DIRECTORY  # Assuming downloader.py handles downloads
-from utils.sanitizer import sanitize_filename
+from utils.cache import load_cache, update_cache_entry, compact_cache
+from config.loader import get_config
+from youtube.downloader import download_video, PLEX_DIRECTORY, DOWNLOAD_ARCHIVE
+from youtube.pacer import pacer
+from youtube.scanner import ChannelScan, scan_channel
+from utils.archive import is_archived, append_archived
+from youtube.supervisor import ProcessSupervisor
+from youtube.engine import create_engine
+from youtube.pipeline import Pipeline
+from youtube.filters import filter_engine
+from utils.transfer import transfer_pool
+from utils.thumbnails import refresh_channel_art, channel_cache
+from utils.metrics import tracer
+from utils.jobqueue import job_queue, channel_key
+from utils.video_journal import video_journal
+from plex.library import library_index, staged_video_path, library_video_path
+from plex.dedupe import dedupe_index, link_duplicate
+from youtube.utils import extract_video_id
 
 # Load configuration
-config = load_config()
+config = get_config()
 CACHE_FILE = config["cache_file"]
 CHANNELS = [channel["url"] for channel in config["channels"] if channel["enabled"]]
 STAGING_DIRECTORY = config["staging_directory"]
+MAX_CHANNELS = config.get("concurrency", {}).get("max_channels", 2)  # Enumerate-stage workers
+COOKIES_PATH = os.path.join(os.path.dirname(__file__), "..", "cookies.txt")
+WATERMARK_FILE = config.get("watermark_file",
+                            os.path.join(os.path.dirname(CACHE_FILE), "channel_watermarks.json"))
+RESUMABLE_STATES = ("downloaded", "stamped")  # Everything needed to finish these is already on local disk
+SYNC_OVERLAP = 300  # Re-read this many seconds of shared results in case host clocks disagree
 
 # Load cache with thread safety
 cache_lock = threading.Lock()
 video_list = load_cache(CACHE_FILE)
+video_index = {}  # URL and video ID -> cache entry, guarded by cache_lock
 
 
-import random  # Import random for sleep timing
+def index_video(video_entry):
+    """Adds a cache entry to the lookup index under both its URL and video ID (caller holds cache_lock)."""
+    video_index[video_entry["url"]] = video_entry
+    video_index[video_entry.get("id") or extract_video_id(video_entry["url"])] = video_entry
 
-def process_single_video(video_url, channel, cookies_path):
-    """Processes a single video: fetch metadata, download, embed, and move."""
 
+def find_cached_video(video_url):
+    """Returns the cached metadata for a video URL in O(1), or None if it hasn't been fetched yet."""
     with cache_lock:
-        processed_videos = {video["url"] for video in video_list.get(channel, [])}
+        return video_index.get(video_url) or video_index.get(extract_video_id(video_url))
 
-    video_entry = None  # ✅ Ensure video_entry is always initialized
 
-    # ✅ Step 1: Check if metadata is already fetched
-    if video_url in processed_videos:
-        logging.info(f"✅ Metadata already fetched: {video_url}")
+for _videos in video_list.values():
+    for _video in _videos:
+        index_video(_video)
 
-        # ✅ Retrieve existing metadata from cache
-        with cache_lock:
-            for vid in video_list.get(channel, []):
-                if vid["url"] == video_url:
-                    video_entry = vid
-                    break  # ✅ Found the metadata, no need to continue
-    else:
-        logging.info(f"🛡 Fetching metadata for {video_url}")
-        metadata_command = ["yt-dlp", "--cookies", cookies_path, "--dump-json", video_url]
 
-        try:
-            with subprocess.Popen(metadata_command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
-                                  bufsize=1) as process:
-                for line in process.stdout:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        video_data = json.loads(line)
-                        video_entry = {
-                            "title": video_data.get("title", "Unknown"),
-                            "uploader": video_data.get("uploader", "UnknownUploader"),
-                            "url": video_data.get("webpage_url", video_url),
-                            "upload_date": video_data.get("upload_date", "9999-12-31")
-                        }
-                        break  # ✅ Exit after first valid JSON response
-                    except json.JSONDecodeError:
-                        continue
-                else:
-                    logging.error(f"❌ Failed to fetch metadata for {video_url}")
-                    return  # Exit function if metadata fetch fails
-
-            with cache_lock:
-                video_list.setdefault(channel, []).append(video_entry)
-                save_cache(video_list, CACHE_FILE, finalize=True)
+def build_cache_entry(video_data, video_url):
+    """Keeps the fields the cache stores from a yt-dlp info dict."""
+    return {
+        "id": video_data.get("id") or extract_video_id(video_url),
+        "title": video_data.get("title", "Unknown"),
+        "uploader": video_data.get("uploader", "UnknownUploader"),
+        "url": video_data.get("webpage_url", video_url),
+        "upload_date": video_data.get("upload_date", "9999-12-31"),
+        **({"filepath": video_data["filepath"]} if video_data.get("filepath") else {}),  # ✅ yt-dlp's real path
+        **({"quality": video_data["quality"]} if video_data.get("quality") else {}),  # Format the profile picked
+        **({"duration": video_data["duration"]} if video_data.get("duration") else {}),  # For the dedupe index
+    }
 
-        except Exception as e:
+
+async def remember_video(channel, video_entry):
+    """Adds a new entry to the in-memory cache and index, and journals it to disk."""
+    with cache_lock:
+        video_list.setdefault(channel, []).append(video_entry)
+        index_video(video_entry)
+    await asyncio.to_thread(update_cache_entry, channel, video_entry, CACHE_FILE)  # ✅ Journal just this entry
+
+
+async def fetch_metadata(video_url, channel, supervisor):
+    """Fetches title/uploader/upload_date with yt-dlp --dump-json and records it in the cache.
+
+    Only used as a fallback when a download ran but didn't report the video's info itself.
+    """
+    logging.info(f"🛡 Fetching metadata for {video_url}")
+    metadata_command = ["yt-dlp", "--cookies", COOKIES_PATH, "--dump-json", video_url]
+    video_entry = None
+
+    with tracer.span("metadata", video_url) as span:
+        try:
+            async for line in supervisor.stream(metadata_command, channel=channel):
+                line = line.strip()
+                if not line or video_entry:
+                    continue  # ✅ Drain the rest of the output after the first valid JSON response
+                try:
+                    video_entry = build_cache_entry(json.loads(line), video_url)
+                except json.JSONDecodeError:
+                    continue
+        except OSError as e:
             logging.error(f"⚠ Error fetching metadata for {video_url}: {str(e)}")
-            return
+            span["outcome"] = "failed"
+            return None
 
-    # ✅ Step 2: Call yt-dlp to handle downloading decision
-    downloaded = download_video(video_url)
+        if not video_entry:
+            logging.error(f"❌ Failed to fetch metadata for {video_url}")
+            span["outcome"] = "failed"
+            return None
 
-    # ✅ Step 3: Handle the result from yt-dlp
-    if downloaded is False:
-        return  # ✅ Skip to next video immediately (NO sleep timer)
+    await remember_video(channel, video_entry)
+    return video_entry
 
-    # ✅ Step 4: Embed metadata after download completes (Ensure video_entry is valid)
+
+async def download_with_metadata(video_url, channel, video_entry, supervisor, duration=None):
+    """Downloads a video, filling in its cache entry from the info the download run prints.
+
+    Returns (downloaded, video_entry) where downloaded follows download_video().
+    """
+    harvested = {}
+
+    def on_info(info):
+        harvested["info"] = info
+
+    downloaded = await download_video(video_url, supervisor, channel=channel, on_info=on_info, duration=duration)
+    if not downloaded:
+        return downloaded, video_entry  # Skipped or failed: nothing to record
     if video_entry:
-        logging.info(f"📀 Embedding metadata into {video_entry['title']}")
+        # ✅ Cached before paths/formats were recorded, or renamed since
+        updates = {field: harvested.get("info", {}).get(field) for field in ("filepath", "quality")}
+        updates = {field: value for field, value in updates.items() if value and video_entry.get(field) != value}
+        if updates:
+            video_entry.update(updates)
+            await asyncio.to_thread(update_cache_entry, channel, video_entry, CACHE_FILE)
+        return downloaded, video_entry
 
-    sanitized_title = sanitize_filename(video_entry["title"])  # ✅ Use the sanitizer function
-    video_path = os.path.join(STAGING_DIRECTORY, f"{video_entry['uploader']}",
-                              f"{video_entry['uploader']} - {sanitized_title}.mp4")
-    plex_folder = os.path.join(PLEX_DIRECTORY, video_entry["uploader"])
-    os.makedirs(plex_folder, exist_ok=True)  # Ensure the folder exists
+    if "info" in harvested:
+        logging.info(f"✅ Metadata captured from download: {video_url}")
+        video_entry = build_cache_entry(harvested["info"], video_url)
+        await remember_video(channel, video_entry)
+    else:
+        # ✅ Fallback: the download ran but didn't report its info (e.g. an old yt-dlp), ask for it explicitly
+        video_entry = await fetch_metadata(video_url, channel, supervisor)
+
+    return downloaded, video_entry
+
+
+async def settle_duplicate(channel, video_id, video_url, listing, original_id):
+    """Applies the dedupe policy to a listed video that matches one already in the library, instead of
+    downloading it. Returns False if it should be downloaded after all (hardlink impossible)."""
+    if dedupe_index.is_duplicate(video_id):
+        return True  # Settled on an earlier scan
+    original = find_cached_video(original_id) or {}
+    title = listing.get("title") or video_url
+
+    if dedupe_index.policy == "hardlink":
+        uploader = (listing.get("uploader") or listing.get("channel")
+                    or (channel_cache.get(channel) or {}).get("name") or original.get("uploader"))
+        original_path = library_index.get(original_id)
+        if not uploader or not original_path:
+            return False
+        video_entry = {"id": video_id, "title": title, "uploader": uploader, "url": video_url,
+                       "upload_date": original.get("upload_date", "9999-12-31")}  # Stamps the shared inode alike
+        final_path = os.path.splitext(library_video_path(video_entry, PLEX_DIRECTORY))[0] + \
+            os.path.splitext(original_path)[1]
+        if not await asyncio.to_thread(link_duplicate, original_path, final_path):
+            return False
+        video_entry["filepath"] = final_path
+        await remember_video(channel, video_entry)
+        await asyncio.to_thread(library_index.record, video_id, final_path)
+        logging.info(f"🔗 {title} duplicates {original.get('title', original_id)}, hardlinked to {final_path}")
+    else:
+        logging.info(f"♻️ Skipping {title}: duplicate of {original.get('title', original_id)}")
 
-    final_path = os.path.join(plex_folder, os.path.basename(video_path))
+    await asyncio.to_thread(dedupe_index.mark_duplicate, video_id, original_id)
+    return True
 
-    # ✅ Step 5: Identify and delete the .jpg file after embedding
-    thumbnail_path = video_path.replace(".mp4", ".jpg")  # Assume same name as video
+
+async def settle_downloaded_duplicate(video_entry, channel, video_id, video_path, final_path):
+    """Replaces a finished download whose first KBs match a library file with a hardlink to it (or drops it,
+    under the skip policy). Returns False if it isn't a duplicate and should be moved as usual."""
+    original_id = await asyncio.to_thread(dedupe_index.find_file, video_id, video_path)
+    if not original_id:
+        return False
+    if dedupe_index.policy == "hardlink":
+        original_path = library_index.get(original_id)
+        final_path = os.path.splitext(final_path)[0] + os.path.splitext(original_path)[1]
+        if not await asyncio.to_thread(link_duplicate, original_path, final_path):
+            return False
+        await asyncio.to_thread(library_index.record, video_id, final_path)
+        original = find_cached_video(original_id)
+        if original and channel and original.get("upload_date") != video_entry.get("upload_date"):
+            video_entry["upload_date"] = original["upload_date"]  # One inode, so the stamper needs one date
+            await asyncio.to_thread(update_cache_entry, channel, video_entry, CACHE_FILE)
+    os.remove(video_path)
+    logging.info(f"♻️ {video_path} is identical to library video {original_id}, "
+                 f"{'hardlinked' if dedupe_index.policy == 'hardlink' else 'discarded'} instead of moved")
+    await asyncio.to_thread(dedupe_index.mark_duplicate, video_id, original_id)
+    await asyncio.to_thread(video_journal.advance, video_id, "moved")
+    return True
+
+
+async def move_to_plex(video_entry, channel=None):
+    """Deletes the embedded thumbnail and hands the finished video to the transfer pool for the move to Plex."""
+    video_id = video_entry.get("id") or extract_video_id(video_entry["url"])
+    video_path = staged_video_path(video_entry, STAGING_DIRECTORY)  # ✅ yt-dlp's reported path, no guessing
+    final_path = library_video_path(video_entry, PLEX_DIRECTORY)
+
+    # ✅ Identify and delete the .jpg file after embedding
+    thumbnail_path = os.path.splitext(video_path)[0] + ".jpg"  # Same name as the video
     logging.debug(f"DEBUG: Checking for thumbnail file: {thumbnail_path}")
 
     if os.path.exists(thumbnail_path):
@@ -106,48 +219,264 @@ def process_single_video(video_url, channel, cookies_path):
             logging.error(f"❌ Failed to delete thumbnail: {thumbnail_path} - {e}")
     else:
         logging.debug(f"DEBUG: No thumbnail found to delete: {thumbnail_path}")
+    await asyncio.to_thread(video_journal.advance, video_id, "stamped")  # Staged file is final, only the move is left
 
-    # ✅ Step 6: Move to final Plex storage
-    plex_folder = os.path.join(PLEX_DIRECTORY, video_entry["uploader"])
-    os.makedirs(plex_folder, exist_ok=True)  # Ensure the folder exists
+    # ✅ An exact copy of a library file is linked (or dropped) instead of moved
+    if os.path.exists(video_path) and await settle_downloaded_duplicate(video_entry, channel, video_id, video_path,
+                                                                         final_path):
+        return True
 
+    # ✅ Move to final Plex storage (rename on the same filesystem, verified kernel copy otherwise)
     logging.debug(f"DEBUG: Checking if file exists at {video_path}")
     if not os.path.exists(video_path):
-        logging.error(f"❌ File not found at expected location: {video_path}")
-        return  # Exit early if the file is missing
+        if not os.path.exists(final_path):
+            logging.error(f"❌ File not found at expected location: {video_path}")
+            return False  # Exit early if the file is missing
+        logging.info(f"✅ Already in the library: {final_path}")  # Interrupted after the move itself
+    else:
+        logging.info(f"📂 Moving file to {final_path}")
+        with tracer.span("move", video_entry["url"]) as span:
+            span["bytes"] = os.path.getsize(video_path)
+            try:
+                await transfer_pool.transfer(video_path, final_path)
+            except Exception as e:
+                logging.error(f"❌ Failed to move file to Plex: {e}")
+                span["outcome"] = "failed"
+                return False  # Stays "stamped" in the journal, so the next start retries the move
+    await asyncio.to_thread(library_index.record, video_id, final_path)
+    await asyncio.to_thread(dedupe_index.record, video_id, video_entry["title"], video_entry.get("duration"),
+                            channel, final_path)
+    await asyncio.to_thread(video_journal.advance, video_id, "moved")
+    return True
+
+
+async def finish_video_job(video_id, result=None):
+    """Hands a handled video's lease back: done for every host only if it's in this host's archive.
+
+    Anything else (filtered out, or settled as a duplicate) goes back to pending, since other hosts
+    import done jobs straight into their own archive.
+    """
+    if is_archived(DOWNLOAD_ARCHIVE, video_id):
+        await job_queue.finish(video_id, result=result)
+    else:
+        await job_queue.finish(video_id, done=False)
+
+
+def resolve_metadata(video_url):
+    """Returns cached metadata for a video, or None if the download run still has to provide it."""
+    video_entry = find_cached_video(video_url)
+
+    if video_entry:
+        logging.info(f"✅ Metadata already fetched: {video_url}")
+    return video_entry
+
 
-    logging.info(f"📂 Moving file to {final_path}")
+def build_pipeline(supervisor, full_scan=False):
+    """Wires enumerate -> metadata -> download -> finalize stages with bounded queues."""
+    stage_config = config.get("pipeline", {})
+    queue_size = stage_config.get("queue_size", 16)
+    pipeline = Pipeline()
+    scans = {}  # channel -> ChannelScan, so finished videos can advance the channel's watermark
+
+    async def enumerate_channel(channel, emit):
+        if not await job_queue.acquire(channel_key(channel), "channel", channel):
+            logging.info(f"⏭ {channel} is being scanned by another worker, skipping it this time")
+            return
+        scanned = False
+        try:
+            scans[channel] = ChannelScan(channel, WATERMARK_FILE, find_cached_video)
+            # ✅ Judged on flat-playlist fields, no extra calls; changed rules re-check the whole catalogue once
+            is_rejected, accept, rules_changed = filter_engine.for_channel(channel)
+            await scan_channel(supervisor, scans[channel], COOKIES_PATH,
+                               lambda video_id: (is_archived(DOWNLOAD_ARCHIVE, video_id) or is_rejected(video_id)
+                                                 or dedupe_index.is_duplicate(video_id)),
+                               emit, full_scan=full_scan or rules_changed, accept=accept)
+            scanned = True
+        finally:
+            await job_queue.finish(channel_key(channel), ok=scanned)  # Back to pending for the next poll
+            await asyncio.to_thread(filter_engine.save)
+
+    async def fetch_stage(item, emit):
+        channel, video_url, listing = item
+        tracer.begin(video_url, "video")  # ✅ End-to-end span, closed when the video leaves the pipeline
+        video_entry = resolve_metadata(video_url)
+        await asyncio.to_thread(video_journal.advance, extract_video_id(video_url),
+                                "metadata" if video_entry else "discovered", channel=channel, url=video_url)
+        await emit((channel, video_url, video_entry, listing))
+
+    async def download_stage(item, emit):
+        channel, video_url, video_entry, listing = item
+        video_id = extract_video_id(video_url)
+        if not await job_queue.acquire(video_id, "video", channel):
+            logging.info(f"⏭ {video_url} is done or in progress on another worker")
+            await asyncio.to_thread(video_journal.advance, video_id, "dropped")
+            scans[channel].video_done()
+            tracer.end(video_url, "video", outcome="skipped")
+            return
+
+        # ✅ Re-uploads and mirrors of a library video are linked or skipped before anything is downloaded
+        original_id = dedupe_index.find(video_id, listing.get("title"), listing.get("duration"), channel)
+        if original_id and await settle_duplicate(channel, video_id, video_url, listing, original_id):
+            await finish_video_job(video_id, find_cached_video(video_id))
+            await asyncio.to_thread(video_journal.advance, video_id, "dropped")
+            scans[channel].video_done()
+            tracer.end(video_url, "video", outcome="skipped")
+            return
+
+        # ✅ The lease is renewed in the background until finalize hands it back
+        await asyncio.to_thread(video_journal.advance, video_id, "downloading")
+        downloaded, video_entry = await download_with_metadata(video_url, channel, video_entry, supervisor,
+                                                              listing.get("duration"))
+        if downloaded is False:
+            await finish_video_job(video_id, video_entry)  # Done for all only if archived (not filtered)
+            await asyncio.to_thread(video_journal.advance, video_id, "dropped")
+            scans[channel].video_done()
+            tracer.end(video_url, "video", outcome="skipped")
+            return  # ✅ Already downloaded or filtered out: nothing to finalize
+        if downloaded and video_entry:
+            await asyncio.to_thread(video_journal.advance, video_id, "downloaded", entry=video_entry)
+            await emit((channel, video_id, video_entry))
+        else:
+            # ❌ yt-dlp failed (or left no metadata): the watermark stays behind it so the next scan retries
+            await job_queue.finish(video_id, ok=False)
+            await asyncio.to_thread(video_journal.advance, video_id, "dropped")
+            scans[channel].video_done(ok=False)
+            tracer.end(video_url, "video", outcome="failed")
+
+    async def finalize_stage(item, emit):
+        channel, video_id, video_entry = item
+        logging.info(f"📀 Embedding metadata into {video_entry['title']}")
+        moved = await move_to_plex(video_entry, channel)
+        if moved:
+            await finish_video_job(video_id, video_entry)  # ✅ Published to the other hosts
+        else:
+            await job_queue.finish(video_id, ok=False)
+        scans[channel].video_done(ok=moved)
+        tracer.end(video_entry["url"], "video", outcome="ok" if moved else "failed")
+
+    async def abandon_video(channel, video_url, video_id=None):
+        # ❌ A stage raised: the video still leaves the pipeline as failed, so its span closes and the watermark
+        # stays behind it instead of waiting for a completion that never comes
+        await job_queue.finish(video_id or extract_video_id(video_url), ok=False)  # No-op unless leased here
+        scans[channel].video_done(ok=False)
+        tracer.end(video_url, "video", outcome="failed")
+
+    pipeline.add_stage("enumerate", enumerate_channel, MAX_CHANNELS, queue_size)
+    pipeline.add_stage("metadata", fetch_stage, stage_config.get("metadata_workers", 2), queue_size,
+                       on_error=lambda item: abandon_video(item[0], item[1]))
+    pipeline.add_stage("download", download_stage, stage_config.get("download_workers", 2), queue_size,
+                       on_error=lambda item: abandon_video(item[0], item[1]))
+    pipeline.add_stage("finalize", finalize_stage, stage_config.get("finalize_workers", 2), queue_size,
+                       on_error=lambda item: abandon_video(item[0], item[2]["url"], item[1]))
+    return pipeline
+
+
+def enabled_channels():
+    """Enabled channel URLs from the live config (picks up hot reloads in daemon mode)."""
+    return [channel["url"] for channel in config["channels"] if channel["enabled"]]
+
+
+async def recover_interrupted(resumed, interrupted):
+    """Finishes videos a previous run downloaded but never moved, from the journal and local files alone."""
+    await asyncio.gather(*(asyncio.wrap_future(future) for future in resumed), return_exceptions=True)
+    for record in interrupted:
+        logging.info(f"🩹 Resuming {record['entry']['title']} after the '{record['state']}' step")
+        await move_to_plex(record["entry"], record.get("channel"))
+
+
+async def warm_up(channels):
+    """Startup work shared by one-shot and daemon runs. Returns the task finishing interrupted videos."""
+    if not len(library_index):
+        await asyncio.to_thread(library_index.rebuild, PLEX_DIRECTORY, video_list)  # ✅ First run: index what's there
+    resumed = transfer_pool.resume_pending()  # ✅ Finish moves a previous run was interrupted in
+
+    interrupted = []
+    for record in video_journal.unfinished():
+        if record["state"] in RESUMABLE_STATES and record.get("entry"):
+            interrupted.append(record)
+        else:
+            # Not downloaded yet: that needs the network, and the channel scan will find it again
+            await asyncio.to_thread(video_journal.advance, record["id"], "dropped")
+    if interrupted:
+        logging.info(f"🩹 {len(interrupted)} video(s) were interrupted after downloading, finishing them")
+
+    await asyncio.to_thread(refresh_channel_art, channels)  # ✅ No-op for channels checked within their TTL
+    return asyncio.create_task(recover_interrupted(resumed, interrupted))
+
+
+async def import_shared_results():
+    """Pulls videos other hosts finished into this host's archive and cache, and reclaims expired leases."""
+    if not job_queue.shared:
+        return
+    reclaimed = await asyncio.to_thread(job_queue.reclaim_expired)
+    if reclaimed:
+        logging.info(f"♻️ Reclaimed {reclaimed} job(s) from workers that stopped renewing their lease")
+
+    results = await asyncio.to_thread(job_queue.results_since, job_queue.synced_until - SYNC_OVERLAP)
+    new_ids = []
+    for channel, video_id, video_entry, updated in results:
+        job_queue.synced_until = max(job_queue.synced_until, updated)
+        if not is_archived(DOWNLOAD_ARCHIVE, video_id):
+            new_ids.append(video_id)
+        if video_entry and channel and not find_cached_video(video_entry["url"]):
+            await remember_video(channel, video_entry)
+    await asyncio.to_thread(append_archived, DOWNLOAD_ARCHIVE, new_ids)
+    if new_ids:
+        logging.info(f"🔗 Imported {len(new_ids)} video(s) downloaded by other workers")
+
+
+async def run_channels(supervisor, channels, full_scan=False):
+    """Runs the given channels through a fresh pipeline; caches and indexes stay warm between calls."""
+    await import_shared_results()
+    pipeline = build_pipeline(supervisor, full_scan=full_scan or config.get("full_scan", False))
+    reporter = asyncio.create_task(report_metrics(pipeline))
     try:
-        shutil.move(video_path, final_path)
-    except Exception as e:
-        logging.error(f"❌ Failed to move file to Plex: {e}")
-
-    # ✅ Step 7: Sleep for a random 30-60 seconds before processing the next video (ONLY IF A VIDEO WAS DOWNLOADED)
-    sleep_time = random.randint(30, 60)
-    logging.info(f"⏳ Sleeping for {sleep_time} seconds before next video")
-    time.sleep(sleep_time)
-
-def get_all_videos():
-    """Sequentially processes each video for all enabled channels."""
-    for channel in CHANNELS:
-        logging.info(f"🛡 Processing videos from {channel}")
-        cookies_path = os.path.join(os.path.dirname(__file__), "..", "cookies.txt")
-
-        # Fetch video URLs (ONE AT A TIME)
-        yt_dlp_command = ["yt-dlp", "--flat-playlist", "--cookies", cookies_path, "--dump-json", "--playlist-reverse",
-                          channel]
-
-        with subprocess.Popen(yt_dlp_command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
-                              bufsize=1) as process:
-            for line in process.stdout:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    video_data = json.loads(line)
-                    process_single_video(video_data["url"], channel, cookies_path)
-                except json.JSONDecodeError:
-                    continue
+        await pipeline.run(channels)
+    finally:
+        reporter.cancel()
+        await job_queue.release_held()  # ✅ Interrupted work is claimable again right away, not after the lease
+        tracer.set_queue_depths(pipeline.queue_depths())
+        await asyncio.to_thread(tracer.write_prometheus)
+    logging.info(f"🚦 Pacing budget: {pacer.budget()}")
+    logging.info(f"⏱ Stage timings:\n{tracer.summary_table()}")
+
+
+async def report_metrics(pipeline):
+    """Refreshes the Prometheus textfile (queue depths, stage latencies) while a pipeline runs."""
+    interval = config.get("metrics", {}).get("interval_seconds", 15)
+    while True:
+        await asyncio.sleep(interval)
+        tracer.set_queue_depths(pipeline.queue_depths())
+        await asyncio.to_thread(tracer.write_prometheus)
+
+
+async def run_all_videos(full_scan=False):
+    """Runs every enabled channel through the staged pipeline under one process supervisor."""
+    supervisor = create_engine(config, ProcessSupervisor.from_config(config))
+
+    main_task = asyncio.current_task()
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGTERM, main_task.cancel)  # ✅ Treat SIGTERM like Ctrl+C
+    except (NotImplementedError, RuntimeError):
+        pass  # Signal handlers aren't available on every platform/loop
+
+    recovery = await warm_up(CHANNELS)
+    try:
+        await run_channels(supervisor, CHANNELS, full_scan=full_scan)
+        await recovery
+    finally:
+        recovery.cancel()
+        await supervisor.shutdown()
+        await asyncio.to_thread(compact_cache, CACHE_FILE)
+
+
+def get_all_videos(full_scan=False):
+    """Processes new videos for all enabled channels; full_scan re-walks every channel's whole catalogue."""
+    try:
+        asyncio.run(run_all_videos(full_scan=full_scan))
+    except KeyboardInterrupt:
+        logging.info("🛑 Interrupted, running downloads were stopped.")
 
 if __name__ == "__main__":
     get_all_videos()
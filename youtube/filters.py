@@ -1,3 +1,190 @@
-def filter_videos(videos):
-    # filter out live or member-only videos
-    return [video for video in videos if video['availability'] != 'needs_auth' and not video['is_live']]
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from config.loader import get_config
+
+config = get_config()
+
+# Same intent as the downloader's --match-filter, but applied to flat-playlist entries before any per-video call
+DEFAULT_RULES = {
+    "skip_live": True,  # Live now, upcoming, or a live stream still being processed
+    "skip_shorts": True,
+    "shorts_max_seconds": None,  # Opt-in: without a /shorts/ URL, anything this short counts as a Short
+    "exclude_availability": ["needs_auth", "subscriber_only", "premium_only"],
+    "min_duration": None,  # Seconds
+    "max_duration": None,
+    "title_include": None,  # Regex the title must match (case-insensitive)
+    "title_exclude": None,  # Regex the title must not match
+    "uploaded_after": None,  # YYYYMMDD
+    "max_age_days": None,
+}
+LIVE_STATUSES = ("is_live", "is_upcoming", "post_live")
+TRANSIENT_REASONS = ("live",)  # A stream becomes a regular video once it ends, so don't remember these
+
+
+def _upload_date(entry):
+    """YYYYMMDD from a flat-playlist entry, which often only carries a timestamp (or nothing)."""
+    if entry.get("upload_date"):
+        return entry["upload_date"]
+    timestamp = entry.get("timestamp") or entry.get("release_timestamp")
+    if timestamp:
+        return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y%m%d")
+    return None
+
+
+@lru_cache(maxsize=64)
+def _compile(fingerprint):
+    """Builds the checks for one rule set once; entries missing a field pass that check (yt-dlp's filter still applies)."""
+    rules = {**DEFAULT_RULES, **json.loads(fingerprint)}
+    checks = []
+
+    if rules["skip_live"]:
+        checks.append(("live", lambda e: e.get("is_live") or e.get("live_status") in LIVE_STATUSES))
+    if rules["skip_shorts"]:
+        limit = rules["shorts_max_seconds"]
+        checks.append(("short", lambda e: "/shorts/" in (e.get("url") or "")
+                       or (limit and e.get("duration") is not None and e["duration"] <= limit)))
+    if rules["exclude_availability"]:
+        excluded = frozenset(rules["exclude_availability"])
+        checks.append(("availability", lambda e: e.get("availability") in excluded))
+    if rules["min_duration"] is not None:
+        checks.append(("too short", lambda e: e.get("duration") is not None and e["duration"] < rules["min_duration"]))
+    if rules["max_duration"] is not None:
+        checks.append(("too long", lambda e: e.get("duration") is not None and e["duration"] > rules["max_duration"]))
+    if rules["title_include"]:
+        include = re.compile(rules["title_include"], re.IGNORECASE)
+        checks.append(("title", lambda e: e.get("title") is not None and not include.search(e["title"])))
+    if rules["title_exclude"]:
+        exclude = re.compile(rules["title_exclude"], re.IGNORECASE)
+        checks.append(("title", lambda e: e.get("title") is not None and exclude.search(e["title"])))
+
+    uploaded_after = str(rules["uploaded_after"] or "")
+    max_age_days = rules["max_age_days"]
+    if uploaded_after or max_age_days is not None:
+        def too_old(entry):
+            cutoff = uploaded_after
+            if max_age_days is not None:  # Relative to now, not to when the rules were compiled (daemon mode)
+                cutoff = max(cutoff, (datetime.now(timezone.utc) - timedelta(days=max_age_days)).strftime("%Y%m%d"))
+            return (_upload_date(entry) or "99999999") < cutoff
+
+        checks.append(("too old", too_old))
+
+    def reject_reason(entry):
+        for reason, rejects in checks:
+            if rejects(entry):
+                return reason
+        return None
+
+    return reject_reason
+
+
+def compile_rules(rules=None):
+    """Returns reject_reason(entry) -> None if the entry passes, else the name of the failed check."""
+    return _compile(json.dumps(rules or {}, sort_keys=True))
+
+
+def rules_version(rules=None):
+    """Short hash of the effective rules (defaults included), stored with each rejection it produced."""
+    effective = json.dumps({**DEFAULT_RULES, **(rules or {})}, sort_keys=True)
+    return hashlib.sha1(effective.encode("utf-8")).hexdigest()[:12]
+
+
+def filter_videos(videos, rules=None):
+    """Keeps the flat-playlist entries that pass rules (the defaults: no live, member-only or Shorts)."""
+    reject_reason = compile_rules(rules)
+    return [video for video in videos if reject_reason(video) is None]
+
+
+class FilterEngine:
+    """Per-channel pre-download filters, with rejected entries remembered so each is only evaluated once.
+
+    A channel's rules are the defaults, overridden by the top-level "filters" key, overridden by the
+    channel's own "filters". Each rejection stores the version of the rules that made it; once the
+    effective rules change (config or defaults), rejections from older versions are dropped and the
+    channel is fully rescanned, so the videos behind its watermark get re-evaluated too.
+    """
+
+    def __init__(self, state_file):
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            with open(state_file, "r", encoding="utf-8") as f:
+                self._rejected = json.load(f)  # channel -> {video_id: {"reason": ..., "rules": version}}
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._rejected = {}
+        for channel_url, state in self._rejected.items():
+            if "videos" in state and "rules" in state:
+                # Written before rejections were versioned: keep them as stale so the channel gets rescanned
+                self._rejected[channel_url] = {video_id: {"reason": reason, "rules": None}
+                                               for video_id, reason in state["videos"].items()}
+
+    @classmethod
+    def from_config(cls, config):
+        state_directory = os.path.dirname(config["cache_file"])
+        return cls(config.get("rejected_file", os.path.join(state_directory, "rejected_videos.json")))
+
+    @staticmethod
+    def rules_for(channel_url):
+        """The channel's effective rules, read from the live config so hot reloads apply."""
+        rules = dict(config.get("filters", {}))
+        for channel in config["channels"]:
+            if channel["url"] == channel_url:
+                rules.update(channel.get("filters", {}))
+        return rules
+
+    def for_channel(self, channel_url):
+        """Returns (is_rejected(video_id), accept(entry), rules_changed) for one channel scan.
+
+        rules_changed is True if rejections made under other rules were dropped; the caller should walk the
+        whole catalogue so those videos are seen again.
+        """
+        rules = self.rules_for(channel_url)
+        version = rules_version(rules)
+        reject_reason = _compile(json.dumps(rules, sort_keys=True))
+
+        with self._lock:
+            rejected = self._rejected.setdefault(channel_url, {})
+            stale = [video_id for video_id, rejection in rejected.items() if rejection["rules"] != version]
+            for video_id in stale:
+                del rejected[video_id]
+            if stale:
+                logging.info(f"🔁 Filter rules for {channel_url} changed, re-evaluating {len(stale)} skipped video(s)")
+                self._dirty = True
+
+        def accept(entry):
+            video_id = entry.get("id")
+            if video_id in rejected:
+                return False
+            reason = reject_reason(entry)
+            if reason is None:
+                return True
+            if reason not in TRANSIENT_REASONS:
+                with self._lock:
+                    rejected[video_id] = {"reason": reason, "rules": version}
+                    self._dirty = True
+            logging.info(f"🚫 Skipping {entry.get('title') or video_id} ({reason})")
+            return False
+
+        return rejected.__contains__, accept, bool(stale)
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                temp_file = self.state_file + ".tmp"
+                with open(temp_file, "w", encoding="utf-8") as f:
+                    json.dump(self._rejected, f)
+                os.replace(temp_file, self.state_file)
+                self._dirty = False
+            except OSError as e:
+                logging.error(f"⚠️ Failed to save rejected videos: {e}")
+
+
+filter_engine = FilterEngine.from_config(config)
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from config.loader import get_config
+
+config = get_config()
+
+# Output that means YouTube wants us to slow down, looked for in yt-dlp's own ERROR:/WARNING: lines only:
+# other lines carry titles and paths ("[download] Destination: ..."), which can say anything
+THROTTLE_PATTERNS = re.compile(
+    r"HTTP Error 429|Too Many Requests|Sign in to confirm|rate[- ]limit|try again later",
+    re.IGNORECASE,
+)
+DIAGNOSTIC_PREFIXES = ("ERROR:", "WARNING:")
+THROTTLE_STATUS = re.compile(r"HTTP/[\d.]+ 429\b")  # A 429 status line from --print-traffic
+
+_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_rate(value):
+    """Parses yt-dlp style rates such as '5M' or '500K' into bytes per second."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    match = re.fullmatch(r"\s*([\d.]+)\s*([KMG]?)i?B?\s*", str(value), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid rate: {value}")
+    return int(float(match.group(1)) * _UNITS[match.group(2).upper()])
+
+
+class Pacer:
+    """AIMD pacing for downloads: spacing between starts plus a bandwidth cap, both adapted to throttling.
+
+    Clean downloads shrink the delay and raise the cap additively; a throttling signal (HTTP 429,
+    "Sign in to confirm", sustained slow speed) doubles the delay and halves the cap. Starts are
+    spaced with a token bucket so a short burst is allowed after idle time.
+    """
+
+    def __init__(self, state_file, min_delay=5, max_delay=900, initial_delay=30, delay_step=2,
+                 min_rate="1M", max_rate="20M", initial_rate="5M", rate_step="256K",
+                 burst=1, slow_speed="50K", slow_samples=30):
+        self.state_file = state_file
+        self.min_delay, self.max_delay, self.delay_step = min_delay, max_delay, delay_step
+        self.min_rate, self.max_rate = parse_rate(min_rate), parse_rate(max_rate)
+        self.rate_step = parse_rate(rate_step)
+        self.burst = max(1, burst)
+        self.slow_speed = parse_rate(slow_speed)
+        self.slow_samples = slow_samples
+
+        self.delay = initial_delay
+        self.rate_limit = parse_rate(initial_rate)
+        self.throttle_count = 0
+        self.last_throttled_at = None
+        self._next_start = 0.0  # Theoretical arrival time for the token bucket
+        self._load_state()
+
+    @classmethod
+    def from_config(cls, config):
+        options = dict(config.get("pacing", {}))
+        state_file = options.pop("state_file", os.path.join(os.path.dirname(config["cache_file"]),
+                                                            "pacer_state.json"))
+        return cls(state_file, **options)
+
+    def _load_state(self):
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        self.delay = min(max(state.get("delay", self.delay), self.min_delay), self.max_delay)
+        self.rate_limit = min(max(state.get("rate_limit", self.rate_limit), self.min_rate), self.max_rate)
+        self.throttle_count = state.get("throttle_count", 0)
+        self.last_throttled_at = state.get("last_throttled_at")
+
+    def _save_state(self):
+        try:
+            temp_file = self.state_file + ".tmp"
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(self.budget(), f, indent=4)
+            os.replace(temp_file, self.state_file)
+        except OSError as e:
+            logging.error(f"⚠ Failed to save pacer state: {e}")
+
+    def budget(self):
+        """The current pacing budget: seconds between download starts and the bandwidth cap in bytes/s."""
+        return {
+            "delay": round(self.delay, 1),
+            "rate_limit": self.rate_limit,
+            "throttle_count": self.throttle_count,
+            "last_throttled_at": self.last_throttled_at,
+        }
+
+    def rate_limit_args(self):
+        return ["--limit-rate", str(self.rate_limit)] if self.rate_limit else []
+
+    async def acquire(self):
+        """Waits until the next download may start."""
+        now = time.monotonic()
+        start = max(self._next_start, now)
+        wait = start - now - (self.burst - 1) * self.delay
+        self._next_start = start + self.delay
+        if wait > 0:
+            logging.info(f"⏳ Pacing: waiting {wait:.0f} seconds before next download")
+            await asyncio.sleep(wait)
+
+    def new_tracker(self):
+        """Per-download state for spotting throttling in its output."""
+        return {"throttled": False, "slow_samples": 0}
+
+    def observe_line(self, tracker, line):
+        if (line.startswith(DIAGNOSTIC_PREFIXES) and THROTTLE_PATTERNS.search(line)) or THROTTLE_STATUS.search(line):
+            tracker["throttled"] = True
+
+    def observe_progress(self, tracker, event):
+        if event.stage != "download" or event.status != "downloading" or event.speed is None:
+            return
+        tracker["slow_samples"] = tracker["slow_samples"] + 1 if event.speed < self.slow_speed else 0
+        if tracker["slow_samples"] >= self.slow_samples:
+            tracker["throttled"] = True
+
+    def record(self, tracker, succeeded):
+        """Adjusts the budget after a download: back off multiplicatively, recover additively."""
+        if tracker["throttled"]:
+            self.delay = min(self.delay * 2, self.max_delay)
+            self.rate_limit = max(self.rate_limit // 2, self.min_rate)
+            self.throttle_count += 1
+            self.last_throttled_at = int(time.time())
+            logging.warning(f"🐢 Throttling detected, backing off: {self.budget()}")
+        elif succeeded:
+            self.delay = max(self.delay - self.delay_step, self.min_delay)
+            self.rate_limit = min(self.rate_limit + self.rate_step, self.max_rate)
+        else:
+            return
+        self._save_state()
+
+
+pacer = Pacer.from_config(config)  # Shared by every download worker
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+
+
+class Stage:
+    """One step of the pipeline: a bounded input queue drained by a fixed number of workers."""
+
+    def __init__(self, name, handler, workers=1, queue_size=16, on_error=None):
+        self.name = name
+        self.handler = handler  # async handler(item, emit); emit(result) forwards to the next stage
+        self.on_error = on_error  # async on_error(item), run when handler raised so the item can be closed out
+        self.workers = workers
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.next_stage = None
+
+    async def emit(self, item):
+        """Forwards an item downstream, waiting while the next stage's queue is full (backpressure)."""
+        if self.next_stage is not None:
+            await self.next_stage.queue.put(item)
+
+    async def _worker(self):
+        while True:
+            item = await self.queue.get()
+            try:
+                await self.handler(item, self.emit)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"❌ {self.name} stage failed for {item}: {e}")
+                await self._recover(item)
+            finally:
+                self.queue.task_done()
+
+    async def _recover(self, item):
+        if self.on_error is None:
+            return
+        try:
+            await self.on_error(item)
+        except Exception as e:
+            logging.error(f"❌ {self.name} stage could not clean up after {item}: {e}")
+
+
+class Pipeline:
+    """Chains stages with bounded queues so a slow stage never blocks the ones before it."""
+
+    def __init__(self):
+        self.stages = []
+
+    def add_stage(self, name, handler, workers=1, queue_size=16, on_error=None):
+        stage = Stage(name, handler, workers, queue_size, on_error)
+        if self.stages:
+            self.stages[-1].next_stage = stage
+        self.stages.append(stage)
+        return stage
+
+    def queue_depths(self):
+        return {stage.name: stage.queue.qsize() for stage in self.stages}
+
+    async def run(self, items):
+        """Feeds items into the first stage and returns once every stage has drained."""
+        workers = [
+            asyncio.create_task(stage._worker(), name=f"{stage.name}-{i}")
+            for stage in self.stages
+            for i in range(stage.workers)
+        ]
+        try:
+            for item in items:
+                await self.stages[0].queue.put(item)
+
+            # Items only move forward, so draining the stages in order means everything is done
+            for stage in self.stages:
+                await stage.queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
@@ -0,0 +1,115 @@
+import json
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from tqdm import tqdm
+
+# yt-dlp prints one machine-readable line per progress update (see --progress-template in downloader.py)
+DOWNLOAD_PROGRESS_PREFIX = "[progress] "
+POSTPROCESS_PROGRESS_PREFIX = "[progress-pp] "
+PROGRESS_FIELDS = "status,downloaded_bytes,total_bytes,total_bytes_estimate,speed,eta,filename"
+
+PROGRESS_TEMPLATE_ARGS = [
+    "--newline",
+    "--progress-template", f"download:{DOWNLOAD_PROGRESS_PREFIX}%(progress.{{{PROGRESS_FIELDS}}})j",
+    "--progress-template", f"postprocess:{POSTPROCESS_PROGRESS_PREFIX}%(progress.{{status,postprocessor}})j",
+]
+
+
+@dataclass
+class ProgressEvent:
+    """One progress update for a download: bytes so far, speed (B/s), ETA (s) and stage."""
+    stage: str  # "download" or the postprocessor name (e.g. "SponsorBlock", "EmbedThumbnail")
+    status: str  # "downloading", "finished", "started", "processing", "error"
+    downloaded_bytes: int = 0
+    total_bytes: Optional[int] = None
+    speed: Optional[float] = None
+    eta: Optional[int] = None
+    filename: Optional[str] = None
+
+
+def _event_from_dict(progress, stage="download"):
+    return ProgressEvent(
+        stage=progress.get("postprocessor") or stage,
+        status=progress.get("status") or "",
+        downloaded_bytes=int(progress.get("downloaded_bytes") or 0),
+        total_bytes=progress.get("total_bytes") or progress.get("total_bytes_estimate"),
+        speed=progress.get("speed"),
+        eta=progress.get("eta"),
+        filename=progress.get("filename"),
+    )
+
+
+def parse_progress_line(line):
+    """Returns a ProgressEvent for a --progress-template line, or None for any other output."""
+    for prefix in (DOWNLOAD_PROGRESS_PREFIX, POSTPROCESS_PROGRESS_PREFIX):
+        if line.startswith(prefix):
+            try:
+                return _event_from_dict(json.loads(line[len(prefix):]))
+            except (json.JSONDecodeError, AttributeError, TypeError, ValueError):
+                return None
+    return None
+
+
+def event_from_hook(status):
+    """Converts a yt-dlp progress_hooks dict (in-process engine) into a ProgressEvent."""
+    return _event_from_dict(status)
+
+
+class ProgressBoard:
+    """One aggregated progress bar for every download in flight, instead of one tqdm bar per process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._downloads = {}  # key -> per-download byte counters, speed and current stage
+        self._bar = None
+
+    def update(self, key, event):
+        with self._lock:
+            state = self._downloads.setdefault(
+                key, {"file": None, "file_total": 0, "completed": 0, "current": 0, "total": 0, "speed": 0,
+                      "stage": "download"})
+            state["stage"] = event.stage
+
+            if event.stage == "download":
+                # Video and audio are separate files: bank the finished one and start counting the next
+                if event.filename and event.filename != state["file"]:
+                    state["completed"] += max(state["file_total"], state["current"])
+                    state["current"] = state["file_total"] = 0
+                    state["file"] = event.filename
+                state["current"] = event.downloaded_bytes
+                if event.total_bytes:
+                    state["file_total"] = event.total_bytes
+                    state["total"] = state["completed"] + event.total_bytes
+                state["speed"] = (event.speed or 0) if event.status == "downloading" else 0
+
+            self._render()
+
+    def finish(self, key):
+        with self._lock:
+            self._downloads.pop(key, None)
+            if not self._downloads and self._bar:
+                self._bar.close()
+                self._bar = None
+            else:
+                self._render()
+
+    def _render(self):
+        if self._bar is None:
+            self._bar = tqdm(total=0, desc="Downloading", unit="B", unit_scale=True, dynamic_ncols=True,
+                             leave=False)
+
+        downloaded = sum(state["completed"] + state["current"] for state in self._downloads.values())
+        total = sum(state["total"] for state in self._downloads.values())
+        speed = sum(state["speed"] for state in self._downloads.values())
+        processing = sum(1 for state in self._downloads.values() if state["stage"] != "download")
+
+        self._bar.total = max(total, downloaded)
+        self._bar.n = downloaded
+        self._bar.set_postfix(active=len(self._downloads), processing=processing,
+                              speed=f"{speed / 1_000_000:.1f}MB/s", refresh=False)
+        self._bar.refresh()
+
+
+progress_board = ProgressBoard()  # Shared by every download in the process
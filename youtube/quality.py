@@ -0,0 +1,141 @@
+"""Per-channel quality profiles: yt-dlp format selectors, and what each selection saved.
+
+    python -m youtube.quality    # Bytes downloaded vs. the default selection, per profile
+"""
+import json
+import logging
+from config.loader import get_config
+from utils.cache import load_cache
+
+config = get_config()
+
+DEFAULT_PROFILE_NAME = "default"
+DEFAULT_PROFILE = {
+    "max_height": 1080,
+    "codecs": [],  # vcodec prefixes in order of preference, e.g. ["av01", "vp09", "avc1"]
+    "bytes_per_minute": None,  # Size budget for the whole video (video + audio)
+}
+AUDIO_BYTES_PER_MINUTE = 1_000_000  # ~128 kbps, set aside from the budget for the audio stream
+
+FORMATS_JSON_PREFIX = "[formats-json] "
+FORMAT_FIELDS = "format_id,height,vcodec,acodec,tbr,filesize,filesize_approx"
+
+
+def profile_for(channel_url):
+    """Returns (name, profile) for a channel: its "quality" profile name or inline dict, else the default."""
+    profiles = config.get("quality_profiles", {})
+    selected = DEFAULT_PROFILE_NAME
+    for channel in config["channels"]:
+        if channel["url"] == channel_url:
+            selected = channel.get("quality", DEFAULT_PROFILE_NAME)
+    if isinstance(selected, dict):
+        return "custom", {**DEFAULT_PROFILE, **selected}
+    if selected not in profiles and selected != DEFAULT_PROFILE_NAME:
+        logging.warning(f"⚠️ Unknown quality profile '{selected}' for {channel_url}, using the default")
+    return selected, {**DEFAULT_PROFILE, **profiles.get(selected, {})}
+
+
+def format_selector(profile, duration=None):
+    """Builds the -f value: preferred codecs first, within the size budget when the duration is known.
+
+    yt-dlp applies it to the formats it already extracts for the download, using their filesize or
+    filesize_approx; formats of unknown size pass the budget filter. If nothing fits the budget, the
+    best format within the height limit is taken instead.
+    """
+    height = f"[height<={profile['max_height']}]" if profile.get("max_height") else ""
+    codecs = [f"[vcodec^={codec}]" for codec in profile.get("codecs") or []] + [""]
+
+    budget = ""
+    if profile.get("bytes_per_minute") and duration:
+        limit = int(max(profile["bytes_per_minute"] - AUDIO_BYTES_PER_MINUTE, 0) * duration / 60)
+        budget = f"[filesize<?{limit}][filesize_approx<?{limit}]"
+
+    choices = [f"bv*{height}{codec}{budget}+ba" for codec in codecs]
+    if budget:
+        choices += [f"bv*{height}{codec}+ba" for codec in codecs]
+    choices.append(f"b{height}")
+    return "/".join(dict.fromkeys(choices))  # Without codecs or a budget this is the old fixed selector
+
+
+def parse_formats_line(line):
+    """Returns the format list printed by the download run, or None if the line is regular output."""
+    if not line.startswith(FORMATS_JSON_PREFIX):
+        return None
+    try:
+        return json.loads(line[len(FORMATS_JSON_PREFIX):])
+    except json.JSONDecodeError:
+        logging.debug(f"DEBUG: Unparseable formats line: {line}")
+        return None
+
+
+def _size(format_info):
+    return format_info.get("filesize") or format_info.get("filesize_approx") or 0
+
+
+def _best(formats):
+    return max(formats, key=lambda f: (f.get("height") or 0, f.get("tbr") or 0, _size(f)), default=None)
+
+
+def baseline_bytes(formats):
+    """Estimated size of what the default profile (best video up to 1080p + best audio) would have fetched."""
+    videos = [f for f in formats if f.get("vcodec") not in (None, "none")
+              and (f.get("height") or 0) <= DEFAULT_PROFILE["max_height"]]
+    audios = [f for f in formats if f.get("vcodec") == "none" and f.get("acodec") not in (None, "none")]
+    video = _best(videos)
+    if video is None:
+        return None
+    audio = _best(audios) if video.get("acodec") in (None, "none") else None
+    return _size(video) + (_size(audio) if audio else 0) or None
+
+
+def selection_record(profile_name, info, formats):
+    """What the download run picked, for the cache: profile, format, codec, height and estimated bytes."""
+    chosen = {f.get("format_id"): f for f in formats or []}
+    selected = [chosen[format_id] for format_id in str(info.get("format_id") or "").split("+") if format_id in chosen]
+    return {
+        "profile": profile_name,
+        "format_id": info.get("format_id"),
+        "height": info.get("height"),
+        "vcodec": info.get("vcodec"),
+        "bytes": sum(_size(f) for f in selected) or info.get("filesize") or info.get("filesize_approx"),
+        "baseline_bytes": baseline_bytes(formats or []),
+    }
+
+
+def profile_report(cache):
+    """Per profile: videos, bytes downloaded, default-selection estimate and bytes saved."""
+    report = {}
+    for videos in cache.values():
+        for video in videos:
+            quality = video.get("quality")
+            if not quality:
+                continue
+            totals = report.setdefault(quality["profile"], {"videos": 0, "bytes": 0, "baseline_bytes": 0, "saved": 0})
+            totals["videos"] += 1
+            totals["bytes"] += quality.get("bytes") or 0
+            if quality.get("bytes") and quality.get("baseline_bytes"):
+                totals["baseline_bytes"] += quality["baseline_bytes"]
+                totals["saved"] += quality["baseline_bytes"] - quality["bytes"]
+    return report
+
+
+def describe(selection):
+    """One log line for a selection, e.g. "'small' picked 397+251 (480p av01), ~41 MB vs ~156 MB by default"."""
+    def megabytes(value):
+        return f"~{value / 1024 ** 2:.0f} MB" if value else "unknown size"
+    return (f"'{selection['profile']}' picked {selection['format_id']} ({selection['height']}p {selection['vcodec']}), "
+            f"{megabytes(selection['bytes'])} vs {megabytes(selection['baseline_bytes'])} by default")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    report = profile_report(load_cache(config["cache_file"]))
+    if not report:
+        logging.info("No downloads with a recorded format selection yet.")
+    for name, totals in sorted(report.items()):
+        logging.info(f"🎚 {name}: {totals['videos']} video(s), {totals['bytes'] / 1024 ** 3:.2f} GB downloaded, "
+                     f"{totals['saved'] / 1024 ** 3:.2f} GB saved vs. the default selection")
+
+
+if __name__ == "__main__":
+    main()
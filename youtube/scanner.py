@@ -0,0 +1,116 @@
+import json
+import time
+import logging
+from utils.watermarks import get_watermark, set_watermark
+
+# With a watermark, stop after this many consecutive already-downloaded entries even if the
+# watermark video itself never shows up (e.g. it was deleted or made private)
+KNOWN_STREAK_LIMIT = 10
+
+
+async def iter_flat_playlist(supervisor, command):
+    """Yields flat-playlist entries as yt-dlp prints them; stopping early terminates yt-dlp."""
+    lines = supervisor.stream(command, limited=False)
+    try:
+        async for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+    finally:
+        await lines.aclose()
+
+
+class ChannelScan:
+    """Tracks one channel's emitted videos so its watermark only advances once all of them are handled."""
+
+    def __init__(self, channel, watermark_file, find_entry):
+        self.channel = channel
+        self.watermark_file = watermark_file
+        self.find_entry = find_entry  # video ID -> cache entry, used for the watermark's upload date
+        self.newest = None  # Flat-playlist entry of the newest video this scan emitted
+        self.expected = 0
+        self.completed = 0
+        self.failed = False
+        self.enumerated = False
+
+    def video_done(self, ok=True):
+        self.completed += 1
+        self.failed = self.failed or not ok
+        self._maybe_commit()
+
+    def finish_enumeration(self):
+        self.enumerated = True
+        self._maybe_commit()
+
+    def _maybe_commit(self):
+        if not self.enumerated or self.completed < self.expected or self.newest is None:
+            return
+        if self.failed:
+            logging.warning(f"⚠ Some videos from {self.channel} failed; keeping the previous watermark")
+            return
+        newest_entry = self.find_entry(self.newest.get("id")) or {}
+        set_watermark(self.watermark_file, self.channel, {
+            "video_id": self.newest.get("id"),
+            "upload_date": self.newest.get("upload_date") or newest_entry.get("upload_date"),
+            "updated_at": int(time.time()),
+        })
+
+
+async def scan_channel(supervisor, scan, cookies_path, is_known, emit, full_scan=False, accept=None):
+    """Emits a channel's unprocessed videos oldest-first as (channel, url, flat-playlist entry).
+
+    With a watermark the playlist is walked newest-first and the walk stops at known territory;
+    without one (or with full_scan) the whole catalogue is walked oldest-first as before.
+    accept(entry) filters entries before anything is emitted; rejected ones still advance the watermark
+    once is_known() remembers them.
+    """
+    accept = accept or (lambda entry: True)
+    channel = scan.channel
+    watermark = None if full_scan else get_watermark(scan.watermark_file, channel)
+    base_command = ["yt-dlp", "--flat-playlist", "--cookies", cookies_path, "--dump-json"]
+
+    if watermark is None:
+        logging.info(f"🛡 Full scan of {channel}")
+        async for entry in iter_flat_playlist(supervisor, base_command + ["--playlist-reverse", channel]):
+            if not accept(entry):
+                if is_known(entry.get("id")):
+                    scan.newest = entry  # Rejected for good; a transient rejection (still live) mustn't be the mark
+                continue
+            scan.newest = entry
+            scan.expected += 1
+            await emit((channel, entry["url"], entry))
+        scan.finish_enumeration()
+        return
+
+    logging.info(f"🛡 Scanning {channel} for videos newer than {watermark['video_id']}")
+    new_entries = []
+    newest = None
+    known_streak = 0
+    async for entry in iter_flat_playlist(supervisor, base_command + [channel]):
+        if entry.get("id") == watermark["video_id"]:
+            break  # ✅ Reached the newest video we already processed
+        if is_known(entry.get("id")):
+            known_streak += 1
+            if known_streak >= KNOWN_STREAK_LIMIT:
+                break
+            continue
+        known_streak = 0
+        if accept(entry):
+            new_entries.append(entry)
+        elif not is_known(entry.get("id")):
+            continue  # Rejected for now (e.g. still live): the watermark mustn't move past it
+        newest = newest or entry
+
+    logging.info(f"🆕 {len(new_entries)} new video(s) on {channel}")
+    if newest:
+        scan.newest = newest
+
+    # Process oldest-first, same as a full scan
+    for entry in reversed(new_entries):
+        scan.expected += 1
+        await emit((channel, entry["url"], entry))
+    scan.finish_enumeration()
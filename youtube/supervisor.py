@@ -0,0 +1,128 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+STREAM_LIMIT = 16 * 1024 * 1024  # --dump-json lines can be far larger than asyncio's 64 KiB default
+TERMINATE_TIMEOUT = 10  # Seconds to wait after SIGTERM before killing a child
+
+
+class ProcessSupervisor:
+    """Runs yt-dlp/ffmpeg children concurrently under global and per-channel limits."""
+
+    def __init__(self, max_processes=4, max_per_channel=1):
+        self.max_processes = max_processes
+        self.max_per_channel = max_per_channel
+        self._global_slots = asyncio.Semaphore(max_processes)
+        self._channel_slots = {}
+        self._processes = set()
+        self._closing = False
+
+    @classmethod
+    def from_config(cls, config):
+        limits = config.get("concurrency", {})
+        return cls(
+            max_processes=limits.get("max_processes", 4),
+            max_per_channel=limits.get("max_per_channel", 1),
+        )
+
+    @property
+    def running(self):
+        return len(self._processes)
+
+    @asynccontextmanager
+    async def slot(self, channel=None):
+        """Holds one global slot (and one slot for the channel, if given) for the duration of the block."""
+        if channel is None:
+            async with self._global_slots:
+                yield
+            return
+
+        # ✅ Take the channel slot first so a waiting channel never sits on a global slot
+        channel_slot = self._channel_slots.setdefault(channel, asyncio.Semaphore(self.max_per_channel))
+        async with channel_slot:
+            async with self._global_slots:
+                yield
+
+    async def _spawn(self, command):
+        if self._closing:
+            raise asyncio.CancelledError("Supervisor is shutting down")
+
+        logging.debug(f"Running: {' '.join(command)}")
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            limit=STREAM_LIMIT,
+        )
+        self._processes.add(process)
+        return process
+
+    async def _reap(self, process):
+        """Makes sure a child is gone, terminating it first if we are leaving early."""
+        try:
+            if process.returncode is None:
+                process.terminate()
+                try:
+                    await asyncio.wait_for(process.wait(), TERMINATE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    process.kill()
+                    await process.wait()
+        except ProcessLookupError:
+            pass
+        finally:
+            self._processes.discard(process)
+
+    async def stream(self, command, limited=True, channel=None):
+        """Yields decoded output lines of a child as they arrive.
+
+        Long-lived enumeration streams pass limited=False so they don't hold a slot
+        that the downloads they feed would need.
+        """
+        lines = self._stream(command)
+        try:
+            if limited:
+                async with self.slot(channel):
+                    async for line in lines:
+                        yield line
+            else:
+                async for line in lines:
+                    yield line
+        finally:
+            await lines.aclose()  # ✅ Reap the child right away if the caller stopped reading early
+
+    async def _stream(self, command):
+        process = await self._spawn(command)
+        try:
+            while True:
+                raw_line = await process.stdout.readline()
+                if not raw_line:
+                    break
+                yield raw_line.decode("utf-8", errors="replace").rstrip("\r\n")
+            await process.wait()
+        finally:
+            await self._reap(process)
+
+    async def run(self, command, channel=None, on_line=None, on_progress=None):
+        """Runs a child to completion, feeding each output line to on_line. Returns the exit code.
+
+        on_progress is accepted for parity with the in-process engine; a child reports progress as lines.
+        """
+        async with self.slot(channel):
+            process = await self._spawn(command)
+            try:
+                while True:
+                    raw_line = await process.stdout.readline()
+                    if not raw_line:
+                        break
+                    if on_line:
+                        on_line(raw_line.decode("utf-8", errors="replace").rstrip("\r\n"))
+                return await process.wait()
+            finally:
+                await self._reap(process)
+
+    async def shutdown(self):
+        """Stops accepting work and terminates every running child."""
+        self._closing = True
+        if self._processes:
+            logging.info(f"🛑 Stopping {len(self._processes)} running process(es)...")
+        await asyncio.gather(*(self._reap(process) for process in list(self._processes)), return_exceptions=True)
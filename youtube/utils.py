@@ -1,6 +1,43 @@
+import os
+import time
 import subprocess
 import logging
+from urllib.parse import urlparse, parse_qs
+
+def update_yt_dlp(stamp_file=None, min_interval=0):
+    """Runs yt-dlp -U. With a stamp_file, skips the check if one ran less than min_interval seconds ago."""
+    if stamp_file and min_interval:
+        try:
+            since_last = time.time() - os.path.getmtime(stamp_file)
+        except OSError:
+            since_last = None
+        if since_last is not None and since_last < min_interval:
+            logging.debug(f"DEBUG: Last yt-dlp update check was {since_last / 3600:.1f}h ago, skipping")
+            return False
 
-def update_yt_dlp():
     logging.info("🔄 Checking for yt-dlp updates...")
     subprocess.run(["yt-dlp", "-U"], check=False)
+    if stamp_file:
+        with open(stamp_file, "a", encoding="utf-8"):
+            pass
+        os.utime(stamp_file)  # ✅ The stamp file's mtime records when we last checked
+    return True
+
+def extract_video_id(video_url):
+    """Extracts the YouTube video ID from watch, shorts, live and youtu.be URLs (or a bare ID)."""
+    parsed = urlparse(video_url)
+    if not parsed.netloc:
+        return video_url.strip()  # Flat-playlist entries can already be bare IDs
+
+    if parsed.netloc.endswith("youtu.be"):
+        return parsed.path.lstrip("/").split("/")[0]
+
+    query_id = parse_qs(parsed.query).get("v")
+    if query_id:
+        return query_id[0]
+
+    path_parts = [part for part in parsed.path.split("/") if part]
+    if len(path_parts) >= 2 and path_parts[0] in ("shorts", "live", "embed", "v"):
+        return path_parts[1]
+
+    return path_parts[-1] if path_parts else video_url.strip()